@@ -11,14 +11,12 @@ import time
 import json
 import logging
 from pathlib import Path
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from webdriver_manager.chrome import ChromeDriverManager
+
+from driver_pool import lease_driver, release_driver
 
 # 配置日志
 logging.basicConfig(level=logging.INFO, 
@@ -28,40 +26,22 @@ logger = logging.getLogger('age_verification')
 # 确保cookies目录存在
 Path("cookies").mkdir(exist_ok=True)
 
-def setup_driver(use_headless=True):
-    """设置并返回Chrome WebDriver"""
-    chrome_options = Options()
-    
-    if use_headless:
-        chrome_options.add_argument('--headless')
-    
-    # 添加反检测参数
-    chrome_options.add_argument('--disable-blink-features=AutomationControlled')
-    chrome_options.add_argument('--no-sandbox')
-    chrome_options.add_argument('--disable-dev-shm-usage')
-    chrome_options.add_argument('--disable-gpu')
-    chrome_options.add_argument('--disable-infobars')
-    chrome_options.add_argument('--disable-extensions')
-    chrome_options.add_argument('--window-size=1920,1080')
-    chrome_options.add_argument('--start-maximized')
+def setup_driver(use_headless=True, browser_type="chrome"):
+    """从共享浏览器池获取WebDriver
     
-    # 设置用户代理
-    chrome_options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/96.0.4664.110 Safari/537.36')
-    
-    # 添加实验性选项
-    chrome_options.add_experimental_option('excludeSwitches', ['enable-automation'])
-    chrome_options.add_experimental_option('useAutomationExtension', False)
+    Args:
+        use_headless (bool): 是否使用无头模式
+        browser_type (str): 浏览器类型，'chrome' 或 'edge'
     
+    Returns:
+        WebDriver: 浏览器实例，使用完毕后调用release_driver()归还
+    """
     try:
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=chrome_options)
+        driver = lease_driver(browser_type, use_headless)
         
         # 设置页面加载超时
         driver.set_page_load_timeout(30)
         
-        # 执行JavaScript来绕过反爬虫检测
-        driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-        
         logger.info("WebDriver已成功初始化")
         return driver
     except Exception as e:
@@ -158,16 +138,18 @@ def save_cookies(driver):
         logger.error(f"保存cookies时出错: {str(e)}")
         return False
 
-def handle_age_verification_for_game(game_url, use_headless=True, existing_driver=None):
+def handle_age_verification_for_game(game_url, use_headless=True, existing_driver=None, browser_type="chrome"):
     """处理特定游戏的年龄验证
     
     Args:
         game_url (str): 游戏URL或AppID
         use_headless (bool): 是否使用无头模式，默认为True
-        existing_driver: 已存在的WebDriver实例，如果提供则使用它而不是创建新的
+        existing_driver: 已存在的WebDriver实例，如果提供则使用它而不是从浏览器池租用
+        browser_type (str): 需要租用浏览器时使用的浏览器类型
     
     Returns:
         tuple: (bool, webdriver) 第一个元素表示是否成功处理了年龄验证，第二个元素是WebDriver实例
+               （租用的浏览器在验证失败时已经归还，此时返回None）
     """
     # 处理输入的游戏URL或AppID
     if game_url.isdigit():
@@ -192,9 +174,9 @@ def handle_age_verification_for_game(game_url, use_headless=True, existing_drive
             driver = existing_driver
             logger.info("使用提供的WebDriver实例")
         else:
-            driver = setup_driver(use_headless=use_headless)
+            driver = setup_driver(use_headless=use_headless, browser_type=browser_type)
             should_close_driver = True
-            logger.info("创建了新的WebDriver实例")
+            logger.info("从浏览器池租用了WebDriver实例")
             
             # 如果是新创建的driver，需要加载cookies
             load_cookies(driver)
@@ -316,23 +298,30 @@ def handle_age_verification_for_game(game_url, use_headless=True, existing_drive
         if verification_success:
             save_cookies(driver)
         
+        # 验证失败时归还自己租用的浏览器，并且不再返回给调用者，浏览器只在这一处归还
+        if should_close_driver and not verification_success:
+            _release_leased_driver(driver)
+            return False, None
+        
         # 返回验证结果和driver实例
         return verification_success, driver
         
     except Exception as e:
         logger.error(f"处理年龄验证时出错: {e}")
-        # 如果处理过程中出错，仍然返回driver实例，方便调用者处理
+        if should_close_driver:
+            _release_leased_driver(driver)
+            return False, None
+        # 调用者提供的driver仍然返回，由调用者处理
         return False, driver
-    finally:
-        # 仅当需要关闭driver且发生错误时才关闭
-        # 正常情况下，我们希望返回driver以便后续使用
-        if should_close_driver and not verification_success:
-            try:
-                driver.quit()
-                logger.info("由于验证失败，已关闭自动创建的WebDriver")
-            except Exception as e:
-                logger.error(f"关闭WebDriver失败: {e}")
-                pass
+
+
+def _release_leased_driver(driver):
+    """归还年龄验证过程中租用的浏览器"""
+    try:
+        release_driver(driver)
+        logger.info("由于验证失败，已归还租用的WebDriver")
+    except Exception as e:
+        logger.error(f"归还WebDriver失败: {e}")
 
 # 测试代码
 if __name__ == "__main__":
@@ -0,0 +1,238 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+页面内自动滚动 - 用一个注入的异步脚本在页面中完成整个滚动加载循环
+
+逐步滚动时每一步都需要多次Python与浏览器驱动之间的往返（滚动、等待、查找元素、
+检查高度、查找"加载更多"按钮）。这里把滚动循环放到页面中执行：脚本自己滚动、
+点击加载更多按钮、统计评论数量，满足以下任一条件时停止：
+  - 评论数量达到目标值
+  - 页面中出现列表结束标记（如"没有更多评论"）
+  - 连续K轮评论数量和页面高度都没有增长
+  - 达到最大滚动轮数或总超时时间
+
+脚本按时间分段运行，每段结束时把当前状态返回给Python，用于报告进度，
+然后带着状态继续下一段。
+
+多个任务共用一个WebDriver会话时（见 browser_contexts），一段脚本运行期间其他任务
+无法发送命令。此时使用逐轮模式：每次调用只统计上一轮的结果并滚动一次，立即返回，
+轮与轮之间的等待在Python中进行，不占用浏览器会话。
+"""
+
+import time
+import logging
+
+logger = logging.getLogger("auto_scroll")
+
+# 每段脚本运行的时间（秒）
+DEFAULT_CHUNK_SECONDS = 10
+# 连续多少轮没有增长视为加载完成
+DEFAULT_NO_GROWTH_CYCLES = 3
+# 脚本超时之外额外预留的时间（秒）
+SCRIPT_TIMEOUT_MARGIN = 15
+
+# 一段滚动循环：每轮点击可见的加载更多按钮、滚动到底部、等待、统计数量
+AUTO_SCROLL_SCRIPT = """
+var opts = arguments[0];
+var done = arguments[arguments.length - 1];
+var state = opts.state || {cycles: 0, noGrowth: 0, lastCount: -1, lastHeight: -1, count: 0, selector: null};
+var chunkEnd = Date.now() + opts.chunkMs;
+// 逐轮模式：滚动后立即返回，下次调用时再统计结果
+var singleStep = opts.singleStep;
+
+function measure() {
+    for (var i = 0; i < opts.selectors.length; i++) {
+        var n = document.querySelectorAll(opts.selectors[i]).length;
+        if (n > 0) {
+            return {selector: opts.selectors[i], count: n};
+        }
+    }
+    return {selector: null, count: 0};
+}
+
+function clickLoadMore() {
+    var clicked = 0;
+    for (var i = 0; i < opts.loadMore.length; i++) {
+        var buttons = document.querySelectorAll(opts.loadMore[i]);
+        for (var j = 0; j < buttons.length; j++) {
+            if (buttons[j].offsetParent !== null) {
+                buttons[j].click();
+                clicked++;
+            }
+        }
+    }
+    return clicked;
+}
+
+function endMarkerVisible() {
+    for (var i = 0; i < opts.endMarkers.length; i++) {
+        var marker = opts.endMarkers[i];
+        var elements = document.querySelectorAll(marker[0]);
+        for (var j = 0; j < elements.length; j++) {
+            if ((elements[j].innerText || elements[j].textContent || '').indexOf(marker[1]) !== -1) {
+                return true;
+            }
+        }
+    }
+    return false;
+}
+
+function step() {
+    state.clicked = (state.clicked || 0) + clickLoadMore();
+    window.scrollTo(0, document.body.scrollHeight);
+    if (singleStep) {
+        state.pending = true;
+        done(state);
+    } else {
+        setTimeout(evaluate, opts.pauseMs);
+    }
+}
+
+function evaluate() {
+    state.pending = false;
+    var m = measure();
+    var height = document.body.scrollHeight;
+    state.cycles++;
+    if (m.count > state.lastCount || height > state.lastHeight) {
+        state.noGrowth = 0;
+    } else {
+        state.noGrowth++;
+    }
+    state.lastCount = Math.max(state.lastCount, m.count);
+    state.lastHeight = height;
+    state.count = m.count;
+    state.selector = m.selector;
+    state.height = height;
+
+    var reason = null;
+    if (opts.target && m.count >= opts.target) {
+        reason = 'target';
+    } else if (endMarkerVisible()) {
+        reason = 'end_marker';
+    } else if (state.noGrowth >= opts.noGrowthCycles) {
+        reason = 'no_growth';
+    } else if (opts.maxCycles && state.cycles >= opts.maxCycles) {
+        reason = 'max_cycles';
+    }
+    if (reason) {
+        state.done = true;
+        state.reason = reason;
+        done(state);
+    } else if (!singleStep && Date.now() >= chunkEnd) {
+        done(state);
+    } else {
+        step();
+    }
+}
+
+if (singleStep && state.pending) {
+    evaluate();
+} else {
+    step();
+}
+"""
+
+# 停止原因的说明，用于日志
+STOP_REASONS = {
+    "target": "评论数量达到目标",
+    "end_marker": "检测到列表结束标记",
+    "no_growth": "连续多轮没有加载出新内容",
+    "max_cycles": "达到最大滚动次数",
+    "timeout": "达到最大滚动时间"
+}
+
+
+class AutoScroller:
+    """在页面中自主滚动，直到达到目标数量、不再增长或超时"""
+
+    def __init__(self, driver, selectors, target=None, no_growth_cycles=DEFAULT_NO_GROWTH_CYCLES,
+                 pause=2, timeout=1800, max_cycles=None, load_more_selectors=None,
+                 chunk_seconds=DEFAULT_CHUNK_SECONDS, end_markers=None):
+        """初始化自动滚动
+
+        Args:
+            driver: WebDriver实例
+            selectors: 统计评论数量的CSS选择器列表，使用第一个有匹配的选择器
+            target: 目标评论数量，None表示不限制
+            no_growth_cycles: 连续多少轮没有增长时停止
+            pause: 每轮滚动后的等待时间（秒）
+            timeout: 总超时时间（秒）
+            max_cycles: 最大滚动轮数，None表示不限制
+            load_more_selectors: "加载更多"按钮的CSS选择器列表
+            chunk_seconds: 每段脚本运行的时间（秒），每段结束时报告一次进度
+            end_markers: 列表结束标记，元素为 (CSS选择器, 文本)，匹配的元素包含该文本时停止
+        """
+        self.driver = driver
+        self.selectors = list(selectors)
+        self.target = target
+        self.no_growth_cycles = no_growth_cycles
+        self.pause = pause
+        self.timeout = timeout
+        self.max_cycles = max_cycles
+        self.load_more_selectors = list(load_more_selectors or [])
+        self.chunk_seconds = max(chunk_seconds, pause)
+        self.end_markers = [list(marker) for marker in (end_markers or [])]
+        # 会话由多个浏览器上下文共用时逐轮执行，不长时间占用会话
+        self.single_step = getattr(driver, "shared_session", False)
+
+    def run(self, on_progress=None):
+        """执行滚动加载
+
+        Args:
+            on_progress: 每段结束时调用的回调函数，参数为当前状态字典
+                         （count、selector、height、cycles、noGrowth等）
+
+        Returns:
+            dict: 最终状态，reason字段为停止原因
+        """
+        try:
+            previous_timeout = self.driver.timeouts.script
+        except Exception:
+            previous_timeout = None
+        self.driver.set_script_timeout(self.chunk_seconds + self.pause + SCRIPT_TIMEOUT_MARGIN)
+
+        start_time = time.time()
+        last_report = start_time
+        state = None
+        try:
+            while True:
+                remaining = self.timeout - (time.time() - start_time)
+                if remaining <= 0:
+                    state = dict(state or {}, done=True, reason="timeout")
+                    break
+                options = {
+                    "selectors": self.selectors,
+                    "target": self.target or 0,
+                    "noGrowthCycles": self.no_growth_cycles,
+                    "pauseMs": int(self.pause * 1000),
+                    "chunkMs": int(min(self.chunk_seconds, remaining) * 1000),
+                    "maxCycles": self.max_cycles or 0,
+                    "loadMore": self.load_more_selectors,
+                    "endMarkers": self.end_markers,
+                    "singleStep": self.single_step,
+                    "state": state
+                }
+                state = self.driver.execute_async_script(AUTO_SCROLL_SCRIPT, options) or {}
+                state["elapsed"] = time.time() - start_time
+                if state.get("done"):
+                    if on_progress:
+                        on_progress(state)
+                    break
+                if self.single_step:
+                    # 逐轮模式下每轮之间的等待不占用浏览器会话，其他上下文的命令可以执行
+                    if on_progress and time.time() - last_report >= self.chunk_seconds:
+                        last_report = time.time()
+                        on_progress(state)
+                    time.sleep(self.pause)
+                elif on_progress:
+                    on_progress(state)
+        finally:
+            if previous_timeout:
+                self.driver.set_script_timeout(previous_timeout)
+
+        state["elapsed"] = time.time() - start_time
+        logger.info(f"自动滚动结束: {STOP_REASONS.get(state.get('reason'), state.get('reason'))}，"
+                    f"共 {state.get('cycles', 0)} 轮，检测到 {state.get('count', 0)} 条评论，"
+                    f"用时 {state['elapsed']:.1f} 秒")
+        return state
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+HTML解析后端性能对比
+
+对爬取时保存的 source_*.html 页面源码，分别用每个可用的解析后端
+解析整页、查找评论元素并提取各字段，输出每个阶段的平均耗时。
+
+用法:
+    python bench_html_parsers.py [页面源码目录或文件...] [--repeat 3]
+"""
+
+import os
+import sys
+import glob
+import time
+import argparse
+
+from html_parser import available_backends, parse_html
+from selector_plan import SelectorPlan, FieldRule
+from tap_crawler import (COMMENT_ITEM_SELECTORS, USERNAME_SELECTORS, CONTENT_SELECTORS, TIME_SELECTORS,
+                         LIKE_SELECTORS)
+
+# 与TapCrawler.find_comment_elements一致的评论元素选择器（不含匹配所有元素的通配选择器）
+COMMENT_SELECTORS = [selector for selector in COMMENT_ITEM_SELECTORS if not selector.endswith("*")]
+
+
+def collect_files(paths):
+    """收集需要测试的页面源码文件"""
+    files = []
+    for path in paths or ["."]:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, "source_*.html"))))
+        elif os.path.isfile(path):
+            files.append(path)
+    return files
+
+
+def new_plan():
+    return SelectorPlan([
+        FieldRule("用户名", USERNAME_SELECTORS, lambda tag: tag.text.strip()),
+        FieldRule("评论内容", CONTENT_SELECTORS, lambda tag: tag.text.strip()),
+        FieldRule("评论时间", TIME_SELECTORS, lambda tag: tag.text.strip()),
+        FieldRule("点赞数", LIKE_SELECTORS, lambda tag: tag.text.strip())
+    ])
+
+
+def bench_file(html, backend, repeat):
+    """返回 (解析耗时, 查找耗时, 提取耗时, 评论数)，耗时为多次运行的平均值（秒）"""
+    parse_total = select_total = extract_total = 0.0
+    count = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        document = parse_html(html, backend)
+        parsed = time.perf_counter()
+
+        items = []
+        for selector in COMMENT_SELECTORS:
+            items = document.select(selector)
+            if items:
+                break
+        selected = time.perf_counter()
+
+        plan = new_plan()
+        for item in items:
+            plan.extract(item)
+        extracted = time.perf_counter()
+
+        parse_total += parsed - start
+        select_total += selected - parsed
+        extract_total += extracted - selected
+        count = len(items)
+    return parse_total / repeat, select_total / repeat, extract_total / repeat, count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="对比HTML解析后端的性能")
+    parser.add_argument("paths", nargs="*", help="页面源码文件或目录（默认当前目录下的source_*.html）")
+    parser.add_argument("--repeat", type=int, default=3, help="每个文件重复运行的次数")
+    args = parser.parse_args()
+
+    files = collect_files(args.paths)
+    if not files:
+        print("未找到页面源码文件（source_*.html），请先运行爬虫保存页面源码")
+        sys.exit(1)
+
+    backends = available_backends()
+    print(f"可用的解析后端: {', '.join(backends)}")
+    totals = {backend: [0.0, 0.0, 0.0] for backend in backends}
+
+    for path in files:
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            html = f.read()
+        print(f"\n{os.path.basename(path)} ({len(html) / 1024:.0f} KB)")
+        for backend in backends:
+            parse_time, select_time, extract_time, count = bench_file(html, backend, args.repeat)
+            totals[backend][0] += parse_time
+            totals[backend][1] += select_time
+            totals[backend][2] += extract_time
+            print(f"  {backend:<12} 解析 {parse_time * 1000:8.1f} ms  查找 {select_time * 1000:8.1f} ms  "
+                  f"提取 {extract_time * 1000:8.1f} ms  ({count} 条评论)")
+
+    print("\n合计:")
+    baseline = sum(totals["html.parser"])
+    for backend in backends:
+        total = sum(totals[backend])
+        speedup = baseline / total if total else 0
+        print(f"  {backend:<12} {total * 1000:8.1f} ms  (相对html.parser {speedup:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
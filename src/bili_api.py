@@ -0,0 +1,490 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+B站评论接口解析 - 把评论接口返回的JSON直接转换为评论记录
+
+记录格式与BiliCrawler从页面提取的格式一致：
+编号、隶属关系、被评论者昵称、被评论者ID、用户名、用户ID、评论内容、发布时间、点赞数、
+评论ID、父评论ID、根评论ID（一级评论的父评论ID和根评论ID为空，可用reply_index.py建立线程索引）
+
+BiliReplyClient 不需要浏览器，直接通过HTTP请求评论接口：一级评论按游标分页，
+二级评论分页使用有上限的线程池并发请求，并按站点限速。
+第一页之后的请求失败时抛出 IncompleteRepliesError，调用方可以从失败的游标继续获取。
+"""
+
+import os
+import re
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from rate_limit import HostRateLimiter
+from json_cache import JsonCache, CACHE_DIR
+
+logger = logging.getLogger("bili_api")
+
+# 评论接口的URL规则（主评论分页、旧版分页接口、楼中楼回复）
+REPLY_API_PATTERNS = [
+    r"api\.bilibili\.com/x/v2/reply(/wbi)?/main",
+    r"api\.bilibili\.com/x/v2/reply\?",
+    r"api\.bilibili\.com/x/v2/reply/reply"
+]
+
+API_BASE = "https://api.bilibili.com"
+# HTTP引擎请求的接口地址，可以指向本地的fixture_server.py进行离线测试
+HTTP_API_BASE = os.environ.get("BILI_API_BASE_URL", API_BASE)
+# 每页评论数（接口上限为20）
+PAGE_SIZE = 20
+# 一级评论排序方式：0按时间，1按点赞数，2按回复数
+REPLY_SORT = 1
+
+
+def reply_page_url(oid, page, page_size=PAGE_SIZE, sort=REPLY_SORT, base=API_BASE):
+    """一级评论分页接口地址（按页码分页，可以并发请求）"""
+    return f"{base}/x/v2/reply?type=1&oid={oid}&pn={page}&ps={page_size}&sort={sort}"
+
+
+def main_reply_url(oid, next_cursor=0, mode=3, page_size=PAGE_SIZE, base=API_BASE):
+    """一级评论游标分页接口地址（mode=3按热度，mode=2按时间）"""
+    return f"{base}/x/v2/reply/main?type=1&oid={oid}&mode={mode}&next={next_cursor}&ps={page_size}"
+
+
+def video_info_url(video_id, base=API_BASE):
+    """视频信息接口地址，video_id为BV号或av号"""
+    video_id = str(video_id)
+    if video_id.lower().startswith("av") and video_id[2:].isdigit():
+        return f"{base}/x/web-interface/view?aid={video_id[2:]}"
+    return f"{base}/x/web-interface/view?bvid={video_id}"
+
+
+def sub_reply_page_url(oid, root, page, page_size=PAGE_SIZE, base=API_BASE):
+    """楼中楼回复分页接口地址"""
+    return f"{base}/x/v2/reply/reply?type=1&oid={oid}&root={root}&pn={page}&ps={page_size}"
+
+
+def _format_time(timestamp):
+    """把Unix时间戳转换为发布时间字符串"""
+    try:
+        return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(int(timestamp)))
+    except (TypeError, ValueError):
+        return ""
+
+
+def parse_reply(item):
+    """解析单条评论
+
+    Returns:
+        dict: 包含rpid、root、parent、mid、uname、message、ctime、like、rcount、replies
+    """
+    member = item.get('member') or {}
+    content = item.get('content') or {}
+    return {
+        'rpid': str(item.get('rpid', '')),
+        'root': str(item.get('root', 0) or 0),
+        'parent': str(item.get('parent', 0) or 0),
+        'mid': str(member.get('mid') or item.get('mid', '')),
+        'uname': member.get('uname', ''),
+        'message': content.get('message', ''),
+        'ctime': _format_time(item.get('ctime')),
+        'like': str(item.get('like', 0)),
+        'rcount': int(item.get('rcount', 0) or 0),
+        'replies': [parse_reply(sub) for sub in (item.get('replies') or [])]
+    }
+
+
+def parse_reply_page(data):
+    """解析一页评论接口响应
+
+    Args:
+        data: 接口返回的JSON（已解析为dict）
+
+    Returns:
+        dict: {"replies": 评论列表, "is_end": 是否最后一页, "next": 下一页游标}，
+              响应不是成功的评论数据时返回None
+    """
+    if not isinstance(data, dict) or data.get('code') != 0:
+        return None
+    body = data.get('data') or {}
+    items = list(body.get('top_replies') or [])
+    upper_top = (body.get('upper') or {}).get('top')
+    if upper_top:
+        items.insert(0, upper_top)
+    items.extend(body.get('replies') or [])
+
+    cursor = body.get('cursor') or {}
+    page = body.get('page') or {}
+    if cursor:
+        is_end = bool(cursor.get('is_end'))
+        next_cursor = cursor.get('next')
+    else:
+        # 旧版分页接口和楼中楼接口使用页码
+        num, size, count = page.get('num', 1), page.get('size', 20), page.get('count', 0)
+        is_end = not items or num * size >= count
+        next_cursor = num + 1
+    return {
+        'replies': [parse_reply(item) for item in items],
+        'is_end': is_end,
+        'next': next_cursor
+    }
+
+
+class ReplyTree:
+    """按接口返回顺序收集一级评论和二级评论，并去除重复"""
+
+    def __init__(self):
+        self.roots = []  # 一级评论，按出现顺序
+        self.children = {}  # 一级评论rpid -> 二级评论列表
+        self._seen = set()
+
+    def __len__(self):
+        return len(self.roots) + sum(len(subs) for subs in self.children.values())
+
+    def add_reply(self, reply):
+        """加入一条评论（根据root字段判断层级），重复的评论会被忽略"""
+        if reply['rpid'] in self._seen:
+            return False
+        self._seen.add(reply['rpid'])
+        if reply['root'] == '0':
+            self.roots.append(reply)
+            self.children.setdefault(reply['rpid'], [])
+            for sub in reply['replies']:
+                self.add_reply(sub)
+        else:
+            self.children.setdefault(reply['root'], []).append(reply)
+        return True
+
+    def add_page(self, page):
+        """加入parse_reply_page()解析出的一页评论
+
+        Returns:
+            int: 新增的评论数量
+        """
+        if not page:
+            return 0
+        before = len(self)
+        for reply in page['replies']:
+            self.add_reply(reply)
+        return len(self) - before
+
+    def truncate(self, max_roots):
+        """只保留前max_roots条一级评论及其二级评论，None表示不限制"""
+        if max_roots is None or len(self.roots) <= max_roots:
+            return
+        for root in self.roots[max_roots:]:
+            self.children.pop(root['rpid'], None)
+        self.roots = self.roots[:max_roots]
+
+    def incomplete_roots(self):
+        """返回二级评论没有收集完整的一级评论（接口只附带少量预览回复）"""
+        return [root for root in self.roots if root['rcount'] > len(self.children.get(root['rpid'], []))]
+
+    def to_records(self):
+        """转换为与页面提取一致的评论记录列表"""
+        records = []
+        for i, root in enumerate(self.roots):
+            records.append({
+                '编号': i + 1,
+                '隶属关系': '一级评论',
+                '被评论者昵称': '',
+                '被评论者ID': '',
+                '用户名': root['uname'],
+                '用户ID': root['mid'],
+                '评论内容': root['message'],
+                '发布时间': root['ctime'],
+                '点赞数': root['like'],
+                '评论ID': root['rpid'],
+                '父评论ID': '',
+                '根评论ID': ''
+            })
+            for j, sub in enumerate(self.children.get(root['rpid'], [])):
+                records.append({
+                    '编号': f"{i + 1}.{j + 1}",
+                    '隶属关系': '二级评论',
+                    '被评论者昵称': root['uname'],
+                    '被评论者ID': root['mid'],
+                    '用户名': sub['uname'],
+                    '用户ID': sub['mid'],
+                    '评论内容': sub['message'],
+                    '发布时间': sub['ctime'],
+                    '点赞数': sub['like'],
+                    '评论ID': sub['rpid'],
+                    # 回复其他二级评论时parent是被回复的那条评论
+                    '父评论ID': sub['parent'] if sub['parent'] != '0' else root['rpid'],
+                    '根评论ID': root['rpid']
+                })
+        return records
+
+
+class IncompleteRepliesError(Exception):
+    """第一页之后的评论页面请求失败，已获取的评论树不完整"""
+
+    def __init__(self, cursor, tree, failed_pages=0):
+        """
+        Args:
+            cursor: 请求失败的一级评论游标，从这里继续获取即可补全；一级评论已完整时为None
+            tree: 失败之前已经获取到的评论树
+            failed_pages: 请求失败的二级评论页数
+        """
+        if cursor is not None:
+            message = f"游标 {cursor} 的一级评论页面请求失败，评论列表不完整"
+        else:
+            message = f"{failed_pages} 页二级评论请求失败，评论列表不完整"
+        super().__init__(message)
+        self.cursor = cursor
+        self.tree = tree
+        self.failed_pages = failed_pages
+
+
+# HTTP引擎同时请求的二级评论页数
+DEFAULT_MAX_WORKERS = 4
+# 每个站点每秒最多请求数
+DEFAULT_REQUESTS_PER_SECOND = 5
+# 单个请求的超时时间（秒）
+REQUEST_TIMEOUT = 20
+REQUEST_HEADERS = {
+    "User-Agent": ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                   "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"),
+    "Accept": "application/json, text/plain, */*",
+    "Referer": "https://www.bilibili.com/"
+}
+
+
+class BiliReplyClient:
+    """不依赖浏览器的B站评论接口客户端"""
+
+    def __init__(self, base=None, max_workers=DEFAULT_MAX_WORKERS, requests_per_second=DEFAULT_REQUESTS_PER_SECOND,
+                 timeout=REQUEST_TIMEOUT, cookies=None):
+        """
+        Args:
+            base: 接口地址，默认使用HTTP_API_BASE
+            max_workers: 同时请求的二级评论页数
+            requests_per_second: 每个站点每秒最多请求数
+            timeout: 单个请求的超时时间（秒）
+            cookies: 可选的cookies字典（如登录后的SESSDATA）
+        """
+        self.base = (base or HTTP_API_BASE).rstrip('/')
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        self.rate_limiter = HostRateLimiter(requests_per_second)
+        self.session = requests.Session()
+        self.session.headers.update(REQUEST_HEADERS)
+        if cookies:
+            self.session.cookies.update(cookies)
+        retry = Retry(total=3, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504),
+                      allowed_methods=("GET",))
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.max_workers, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def get_json(self, url):
+        """按站点限速请求接口并解析JSON，失败时返回None"""
+        self.rate_limiter.wait(url)
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+            if response.status_code != 200:
+                logger.warning(f"接口返回状态码 {response.status_code}: {url}")
+                return None
+            return response.json()
+        except (requests.RequestException, ValueError) as e:
+            logger.warning(f"请求接口失败: {url} {e}")
+            return None
+
+    def get_content(self, url):
+        """按站点限速请求二进制内容（如弹幕分段），失败时返回None"""
+        self.rate_limiter.wait(url)
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+            if response.status_code != 200:
+                logger.warning(f"接口返回状态码 {response.status_code}: {url}")
+                return None
+            return response.content
+        except requests.RequestException as e:
+            logger.warning(f"请求接口失败: {url} {e}")
+            return None
+
+    def fetch_video_info(self, video_id):
+        """获取视频的aid、标题和各分P的cid、时长
+
+        Returns:
+            dict: {"aid", "title", "pages": [{"cid", "duration"}, ...]}，获取失败时返回None
+        """
+        data = self.get_json(video_info_url(video_id, self.base))
+        if not isinstance(data, dict) or data.get('code') != 0:
+            return None
+        body = data.get('data') or {}
+        if not body.get('aid'):
+            return None
+        pages = [{"cid": page.get('cid'), "duration": int(page.get('duration') or 0)}
+                 for page in (body.get('pages') or []) if page.get('cid')]
+        if not pages and body.get('cid'):
+            pages = [{"cid": body['cid'], "duration": int(body.get('duration') or 0)}]
+        return {"aid": body['aid'], "title": body.get('title', ''), "pages": pages}
+
+    def fetch_main_replies(self, oid, tree, on_progress=None, max_roots=None, start_cursor=0):
+        """按游标分页获取全部一级评论（附带每条评论的预览回复），加入tree
+
+        Args:
+            max_roots: 一级评论数量达到该值后停止翻页，None表示获取到最后一页
+            start_cursor: 起始游标（中途失败后从失败的游标继续）
+
+        Returns:
+            bool: 第一页是否获取成功
+
+        Raises:
+            IncompleteRepliesError: 之后的页面请求失败（cursor为失败页面的游标）
+        """
+        next_cursor = start_cursor
+        pages = 0
+        while True:
+            page = parse_reply_page(self.get_json(main_reply_url(oid, next_cursor, base=self.base)))
+            if not page:
+                if pages == 0 and start_cursor == 0:
+                    return False
+                raise IncompleteRepliesError(next_cursor, tree)
+            pages += 1
+            added = tree.add_page(page)
+            if on_progress:
+                on_progress(len(tree.roots), len(tree))
+            if page['is_end'] or not added or page['next'] in (None, next_cursor):
+                return True
+            if max_roots is not None and len(tree.roots) >= max_roots:
+                tree.truncate(max_roots)
+                return True
+            next_cursor = page['next']
+
+    def fetch_sub_replies(self, oid, tree, on_progress=None):
+        """并发获取所有回复数超过预览数量的评论的全部二级评论，加入tree
+
+        Returns:
+            int: 请求失败的页数（对应的一级评论仍在incomplete_roots()中，再次调用即可补全）
+        """
+        sub_urls = []
+        for root in tree.incomplete_roots():
+            pages = (root['rcount'] + PAGE_SIZE - 1) // PAGE_SIZE
+            sub_urls.extend(sub_reply_page_url(oid, root['rpid'], page, base=self.base)
+                            for page in range(1, pages + 1))
+        failed = 0
+        if not sub_urls:
+            return failed
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bili-api") as executor:
+            # map按提交顺序返回结果，二级评论的顺序与接口一致
+            for done, data in enumerate(executor.map(self.get_json, sub_urls), 1):
+                page = parse_reply_page(data)
+                if page is None:
+                    failed += 1
+                tree.add_page(page)
+                if on_progress and (done % 10 == 0 or done == len(sub_urls)):
+                    on_progress(done, len(sub_urls))
+        return failed
+
+    def fetch_reply_tree(self, oid, on_main_progress=None, on_sub_progress=None, max_roots=None,
+                         tree=None, start_cursor=0):
+        """获取一个视频的全部评论
+
+        Args:
+            max_roots: 最多获取的一级评论数量（及其全部二级评论），None表示全部
+            tree: 继续补全的评论树（IncompleteRepliesError.tree），None表示从头获取
+            start_cursor: 一级评论的起始游标，None表示一级评论已完整，只补全二级评论
+
+        Returns:
+            ReplyTree: 评论树，第一页就无法获取时返回None
+
+        Raises:
+            IncompleteRepliesError: 之后的页面请求失败，tree为已获取的评论
+        """
+        tree = tree if tree is not None else ReplyTree()
+        if start_cursor is not None and not self.fetch_main_replies(oid, tree, on_main_progress, max_roots,
+                                                                    start_cursor):
+            return None
+        tree.truncate(max_roots)
+        failed = self.fetch_sub_replies(oid, tree, on_sub_progress)
+        if failed:
+            raise IncompleteRepliesError(None, tree, failed)
+        return tree
+
+    def close(self):
+        self.session.close()
+
+
+# 短链接解析结果的缓存（短链接指向的视频不会改变，不设置过期时间）
+SHORT_LINK_CACHE_FILE = os.path.join(CACHE_DIR, "bili_short_links.json")
+
+
+def is_short_link(url):
+    return "b23.tv/" in (url or "")
+
+
+def canonical_video_url(url):
+    """把视频页面URL转换为标准格式（去掉分享追踪参数，保留分P参数），无法识别时原样返回"""
+    id_match = re.search(r'bilibili\.com/video/(BV[0-9A-Za-z]{10}|av\d+)', url or "")
+    if not id_match:
+        return url
+    part_match = re.search(r'[?&]p=(\d+)', url)
+    part = f"?p={part_match.group(1)}" if part_match else ""
+    return f"https://www.bilibili.com/video/{id_match.group(1)}{part}"
+
+
+class ShortLinkResolver:
+    """通过HTTP重定向解析b23.tv短链接，结果持久化缓存"""
+
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, timeout=REQUEST_TIMEOUT, cache_file=SHORT_LINK_CACHE_FILE):
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        self.cache = JsonCache(cache_file)
+        self.session = requests.Session()
+        self.session.headers.update(REQUEST_HEADERS)
+        adapter = HTTPAdapter(pool_maxsize=self.max_workers,
+                              max_retries=Retry(total=2, backoff_factor=0.5, allowed_methods=("GET", "HEAD")))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    @staticmethod
+    def _key(url):
+        url = url.strip()
+        return url if url.startswith("http") else "https://" + url
+
+    def resolve(self, url):
+        """解析一个短链接
+
+        Returns:
+            str: 标准格式的视频URL，解析失败时返回None
+        """
+        key = self._key(url)
+        cached = self.cache.get(key)
+        if cached:
+            return cached
+        try:
+            # 只需要跟随重定向得到最终地址，不读取页面内容
+            response = self.session.get(key, allow_redirects=True, timeout=self.timeout, stream=True)
+            final_url = response.url
+            response.close()
+        except requests.RequestException as e:
+            logger.warning(f"解析短链接失败: {url} {e}")
+            return None
+        if is_short_link(final_url):
+            logger.warning(f"短链接没有重定向到视频页面: {url}")
+            return None
+        resolved = canonical_video_url(final_url)
+        self.cache.set(key, resolved)
+        return resolved
+
+    def resolve_all(self, urls):
+        """并发解析列表中的所有短链接（已缓存的直接使用缓存）
+
+        Returns:
+            dict: 短链接 -> 标准URL（解析失败的短链接不包含在内）
+        """
+        short_links = list(dict.fromkeys(url.strip() for url in urls if is_short_link(url)))
+        if not short_links:
+            return {}
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="b23") as executor:
+            results = dict(zip(short_links, executor.map(self.resolve, short_links)))
+        return {url: resolved for url, resolved in results.items() if resolved}
+
+    def close(self):
+        self.session.close()
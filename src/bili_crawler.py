@@ -3,6 +3,11 @@ B站爬虫适配器 - 专门用于爬取哔哩哔哩网站的评论
 """
 
 from crawler_base import BaseCrawler, CsvWriter
+from bili_api import (REPLY_API_PATTERNS, PAGE_SIZE, ReplyTree, IncompleteRepliesError, parse_reply_page,
+                      reply_page_url, sub_reply_page_url, BiliReplyClient, ShortLinkResolver, is_short_link)
+from page_fetch import PageFetcher
+from reply_index import write_reply_index
+from bili_danmaku import DanmakuFetcher
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
@@ -12,15 +17,124 @@ import time
 import sys
 import os
 
+# 滚动加载评论的参数：出现结束标记或达到目标数量时会提前停止，这里只是上限
+SCROLL_MAX_COUNT = 500
+SCROLL_PAUSE_TIME = 2.5
+SCROLL_MAX_TIME = 1800
+# 有结束标记作为主要判断，连续多轮没有增长只作为兜底（网络慢时避免过早停止）
+SCROLL_NO_GROWTH_CYCLES = 6
+# HTTP引擎中途请求失败时，从失败的位置继续获取的次数
+HTTP_RESUME_RETRIES = 2
+# 评论列表底部的结束标记
+END_MARKER_SELECTORS = [".reply-end", ".reply-end-mark", ".bottom-page", ".reply-list > .reply-end-mark"]
+
+# 在页面中遍历所有一级评论及其二级评论，一次返回嵌套的评论树
+EXTRACT_REPLIES_SCRIPT = """
+function text(root, selector) {
+    var el = root.querySelector(selector);
+    return el ? (el.innerText || el.textContent || '').trim() : '';
+}
+function extract(item) {
+    var user = item.querySelector('.user-name');
+    return {
+        user: user ? (user.innerText || user.textContent || '').trim() : '',
+        href: user ? (user.getAttribute('href') || user.getAttribute('data-user-id') || '') : '',
+        content: text(item, '.reply-content'),
+        time: text(item, '.reply-time'),
+        likes: text(item, '.like-count')
+    };
+}
+var replies = [];
+var items = document.querySelectorAll('.reply-item');
+for (var i = 0; i < items.length; i++) {
+    var reply = extract(items[i]);
+    if (!reply.user && !reply.content) {
+        continue;
+    }
+    reply.subs = [];
+    var subs = items[i].querySelectorAll('.sub-reply-item');
+    for (var j = 0; j < subs.length; j++) {
+        reply.subs.push(extract(subs[j]));
+    }
+    replies.push(reply);
+}
+return replies;
+"""
+
+# 一次点击所有可见的"查看更多"按钮，返回点击的数量
+CLICK_VIEW_MORE_SCRIPT = """
+var clicked = 0;
+var buttons = document.querySelectorAll('.reply-item .view-more');
+for (var i = 0; i < buttons.length; i++) {
+    if ((buttons[i].innerText || '').indexOf('查看') !== -1) {
+        var target = buttons[i].querySelector('.view-more-btn') || buttons[i];
+        target.click();
+        clicked++;
+    }
+}
+return clicked;
+"""
+
+# 仍然显示"查看"的按钮数量（二级评论尚未加载）
+PENDING_VIEW_MORE_SCRIPT = """
+var pending = 0;
+var buttons = document.querySelectorAll('.reply-item .view-more');
+for (var i = 0; i < buttons.length; i++) {
+    if ((buttons[i].innerText || '').indexOf('查看') !== -1) {
+        pending++;
+    }
+}
+return pending;
+"""
+
+def _user_id(user_link):
+    """从用户主页链接中提取用户ID"""
+    id_match = re.search(r'space\.bilibili\.com/(\d+)', user_link or "")
+    if id_match:
+        return id_match.group(1)
+    return user_link if (user_link or "").isdigit() else ""
+
+def _like_count(likes):
+    likes = (likes or "").strip()
+    return likes if likes.isdigit() else "0"
+
 class BiliCrawler(BaseCrawler):
     """B站爬虫类，专门用于爬取哔哩哔哩网站的评论"""
     
-    def __init__(self, use_headless=False):
-        """初始化B站爬虫"""
-        super().__init__(use_headless)
+    platform_name = "bilibili"
+    
+    def __init__(self, use_headless=False, lean_mode=False, capture_mode=True, fetch_mode=True, driver=None,
+                 http_mode=True, api_base=None, max_comments=None, danmaku=False):
+        """初始化B站爬虫
+        
+        Args:
+            max_comments: 每个视频最多爬取的一级评论数（包含其二级评论），None表示爬取到评论列表结束
+            http_mode: 是否优先不使用浏览器，直接通过HTTP请求评论接口（浏览器仅在接口不可用时启动）
+            api_base: HTTP引擎使用的接口地址，默认使用bili_api.HTTP_API_BASE
+            danmaku: 是否同时爬取视频的弹幕（通过HTTP接口，保存为单独的CSV）
+        """
+        super().__init__(use_headless, lean_mode=lean_mode, capture_mode=capture_mode, fetch_mode=fetch_mode,
+                         driver=driver, lazy_driver=http_mode)
+        self.http_mode = http_mode
+        self.danmaku = danmaku
+        self.http_client = BiliReplyClient(api_base) if http_mode or danmaku else None
+        self.video_infos = {}
+        self.short_links = ShortLinkResolver()
+        self.max_comments = max_comments
         self.data_writer = CsvWriter()
         # 默认使用CSV格式保存数据，适用于B站的大量评论
     
+    def cleanup(self):
+        """关闭HTTP连接池，并清理浏览器（如果启动过）"""
+        if self.http_client is not None:
+            self.http_client.close()
+        self.short_links.close()
+        super().cleanup()
+    
+    def get_end_markers(self):
+        """B站评论列表加载完毕时底部显示"没有更多评论" """
+        return [(selector, "没有更多评论") for selector in END_MARKER_SELECTORS]
+    
     def get_comment_selectors(self):
         """获取B站评论元素的CSS选择器"""
         return [
@@ -93,13 +207,34 @@ class BiliCrawler(BaseCrawler):
             print(f'第{self.progress["game_count"] + 1}个视频：无法从 URL {url} 中提取标准video_id，使用 {video_id} 作为标识')
             return video_id
     
+    @classmethod
+    def prepare_urls(cls, urls):
+        """在开始爬取前并发解析列表中的所有b23.tv短链接，浏览器直接访问标准的视频URL"""
+        if not any(is_short_link(url) for url in urls):
+            return urls
+        print("检测到B站短链接，正在批量解析...")
+        resolver = ShortLinkResolver()
+        try:
+            resolved = resolver.resolve_all(urls)
+        finally:
+            resolver.close()
+        print(f"已解析 {len(resolved)} 个短链接")
+        return [resolved.get(url.strip(), url) for url in urls]
+    
     def normalize_url(self, url):
         """标准化URL格式"""
         url = url.strip()  # 去除首尾空白
         
-        # 处理短链接
-        if 'b23.tv' in url:
+        # 处理短链接：优先通过HTTP重定向解析（结果会被缓存），失败时再用浏览器打开
+        if is_short_link(url):
             print("检测到B站短链接，尝试解析完整链接...")
+            resolved = self.short_links.resolve(url)
+            if resolved:
+                url = resolved
+                print(f"已解析为完整链接: {url}")
+        
+        # HTTP解析失败时在浏览器中打开短链接
+        if is_short_link(url):
             try:
                 self.driver.get(url)
                 time.sleep(2)  # 等待重定向
@@ -135,11 +270,30 @@ class BiliCrawler(BaseCrawler):
         # 提取视频ID
         video_id = self.extract_video_id(url)
         
+        # 弹幕只能通过接口获取，与评论的获取方式无关
+        if self.danmaku:
+            try:
+                self.fetch_danmaku(url, video_id)
+            except Exception as e:
+                error_message = f"获取视频 {video_id} 的弹幕时出错: {e}"
+                print(error_message)
+                self.write_error_log(error_message)
+        
+        # 优先直接通过HTTP请求评论接口，不启动浏览器
+        saved, tree = self.fetch_comments_over_http(url, video_id)
+        if saved:
+            return
+        # HTTP引擎获取到的部分评论留在评论树中，与浏览器获取的评论按评论ID合并
+        tree = tree or ReplyTree()
+        
         # 设置页面加载超时时间
         self.driver.set_page_load_timeout(90)  # 增加到90秒超时
+        
+        # 在访问页面前开始收集评论接口的响应
+        self.start_network_capture(REPLY_API_PATTERNS)
         try:
             print(f"正在访问URL: {url}")
-            self.driver.get(url)
+            self.navigate(url)
             print("页面加载成功")
         except Exception as e:
             print(f"访问URL时出错: {e}")
@@ -162,6 +316,15 @@ class BiliCrawler(BaseCrawler):
         # 获取视频标题
         video_title = self.get_video_title()
         print(f"获取到视频标题: {video_title}")
+        csv_filename = self.get_output_filename(video_id, video_title)
+        
+        # 优先在页面中直接请求评论接口，无需滚动加载
+        if self.fetch_comments_in_page(tree):
+            self.stop_network_capture()
+            fetched_comments = tree.to_records()
+            print(f"通过评论接口获取到 {len(fetched_comments)} 条评论（含二级评论）")
+            self.save_api_comments(fetched_comments, csv_filename, video_id)
+            return
         
         # 处理迷你播放器
         self.handle_mini_player()
@@ -180,7 +343,12 @@ class BiliCrawler(BaseCrawler):
         
         # 在爬取评论之前滚动到页面底部
         print("开始滚动页面以加载评论...")
-        comments_found = self.scroll_to_bottom(max_scroll_count=45, scroll_pause_time=4)
+        # 达到目标数量或出现"没有更多评论"标记时立即停止滚动
+        if self.max_comments is not None:
+            print(f"目标评论数: {self.max_comments}")
+        comments_found = self.scroll_to_bottom(max_scroll_count=SCROLL_MAX_COUNT, scroll_pause_time=SCROLL_PAUSE_TIME,
+                                               max_scroll_time=SCROLL_MAX_TIME, target_count=self.max_comments,
+                                               no_growth_cycles=SCROLL_NO_GROWTH_CYCLES)
         if not comments_found:
             print("警告：未检测到评论，但仍将尝试提取页面内容")
         
@@ -194,9 +362,21 @@ class BiliCrawler(BaseCrawler):
         except Exception as e:
             print(f"保存源码失败: {e}")
         
-        # 查找评论元素
-        reply_items = self.driver.find_elements(By.CSS_SELECTOR, '.reply-item')
-        if not reply_items or len(reply_items) == 0:
+        # 其次使用网络抓取到的评论接口数据，不再依赖页面结构
+        captured_comments = self.extract_captured_comments(tree)
+        if captured_comments:
+            print(f"从评论接口响应中提取到 {len(captured_comments)} 条评论（含二级评论）")
+            self.save_api_comments(captured_comments, csv_filename, video_id)
+            return
+        
+        # 一次点击所有"查看更多"按钮展开二级评论，再用一次页面脚本提取全部评论
+        self.expand_sub_replies()
+        extract_start = time.time()
+        reply_tree = self.driver.execute_script(EXTRACT_REPLIES_SCRIPT) or []
+        if self.max_comments is not None:
+            reply_tree = reply_tree[:self.max_comments]
+        print(f"页面内提取 {len(reply_tree)} 条一级评论，用时 {time.time() - extract_start:.2f} 秒")
+        if not reply_tree:
             error_message = f'第{self.progress["game_count"] + 1}个视频被跳过：ID {video_id} URL {url} 没有找到评论'
             print(error_message)
             self.write_error_log(error_message)
@@ -204,213 +384,327 @@ class BiliCrawler(BaseCrawler):
             self.save_progress(self.progress)
             return
         
-        print(f"找到 {len(reply_items)} 条一级评论，开始处理...")
+        # 检查是否继续之前的进度
+        start_index = self.progress.get("first_comment_index", 0)
+        if start_index > 0:
+            print(f"继续上次进度，从第 {start_index + 1} 条一级评论开始保存...")
+        comments_data = self.build_dom_records(reply_tree, start_index)
         
-        # 创建文件名
+        try:
+            self.write_records(comments_data, csv_filename)
+            print(f"已保存 {len(comments_data)} 条评论（含二级评论）到 {csv_filename}")
+        except Exception as e:
+            error_message = f"保存CSV {csv_filename} 时出错: {e}"
+            print(error_message)
+            self.write_error_log(error_message)
+        
+        # 处理完成，重置评论索引并增加视频计数
+        self.progress["first_comment_index"] = 0
+        self.progress["game_count"] += 1
+        self.save_progress(self.progress)
+        
+        print(f"视频 {video_id} 的评论处理完成")
+    
+    def get_output_filename(self, video_id, video_title, kind="comments"):
+        """根据视频ID和标题生成输出文件名，kind为comments（评论）或danmaku（弹幕）"""
         if video_title and video_title != video_id:
             # 清理视频标题中的非法字符
             video_title = re.sub(r'[\\/*?:"<>|]', "", video_title)
             # 限制标题长度
             if len(video_title) > 50:
                 video_title = video_title[:47] + "..."
-            csv_filename = f"{video_id}_{video_title}_comments.csv"
-        else:
-            csv_filename = f"{video_id}_comments.csv"
-        
-        # 初始化列表存储评论数据
-        comments_data = []
-        
-        # 处理一级评论
-        for i, reply_item in enumerate(reply_items):
-            try:
-                # 检查是否继续之前的进度
-                if i < self.progress.get("first_comment_index", 0):
-                    continue
-                
-                # 更新当前处理的评论索引
-                self.progress["first_comment_index"] = i
-                self.save_progress(self.progress)
-                
-                # 提取一级评论数据
-                comment_data = self.extract_reply_item(reply_item, i, video_id)
-                if comment_data:
-                    comments_data.append(comment_data)
-                
-                # 尝试点击"查看更多"按钮获取二级评论
-                try:
-                    # 检查是否有二级评论
-                    view_more_buttons = reply_item.find_elements(By.CSS_SELECTOR, ".view-more")
-                    if view_more_buttons and len(view_more_buttons) > 0:
-                        for view_more_button in view_more_buttons:
-                            # 尝试点击查看更多按钮
-                            if "查看" in view_more_button.text:
-                                self.driver.execute_script("arguments[0].scrollIntoView();", view_more_button)
-                                self.driver.execute_script("window.scrollBy(0, -100);")
-                                view_more_button.click()
-                                time.sleep(2)  # 等待二级评论加载
-                                
-                                # 提取二级评论
-                                sub_comments_data = self.extract_sub_comments(i, video_id, comment_data['用户名'], comment_data['用户ID'])
-                                if sub_comments_data:
-                                    comments_data.extend(sub_comments_data)
-                                break
-                except Exception as e:
-                    print(f"处理二级评论时出错: {e}")
-                
-                # 每10条评论保存一次
-                if (i + 1) % 10 == 0 or i == len(reply_items) - 1:
-                    # 保存到CSV文件
-                    self.data_writer.write(comments_data, csv_filename)
-                    print(f"已处理 {i+1}/{len(reply_items)} 条评论并保存结果")
-                    comments_data = []  # 清空已保存的数据
-            
-            except Exception as e:
-                error_message = f"处理第 {i+1} 条评论时出错: {str(e)}"
-                print(error_message)
-                self.write_error_log(error_message)
-                self.progress["first_comment_index"] = i + 1
-                self.save_progress(self.progress)
-        
-        # 处理完成，重置评论索引并增加视频计数
+            return f"{video_id}_{video_title}_{kind}.csv"
+        return f"{video_id}_{kind}.csv"
+    
+    def write_records(self, records, csv_filename):
+        """写入评论CSV，并把评论的父子关系加入旁边的线程索引"""
+        self.data_writer.write(records, csv_filename)
+        if not any(record.get('评论ID') for record in records):
+            return  # 页面提取的记录没有评论ID，无法建立索引
+        try:
+            write_reply_index(csv_filename, records)
+        except Exception as e:
+            print(f"写入评论线程索引时出错: {e}")
+    
+    def save_api_comments(self, comments, csv_filename, video_id):
+        """保存从接口获取的评论，并把进度推进到下一个视频"""
+        self.write_records(comments, csv_filename)
         self.progress["first_comment_index"] = 0
         self.progress["game_count"] += 1
         self.save_progress(self.progress)
-        
         print(f"视频 {video_id} 的评论处理完成")
     
-    def extract_reply_item(self, reply_item, index, video_id):
-        """提取一级评论数据"""
-        try:
-            # 提取用户名
-            username_element = reply_item.find_element(By.CSS_SELECTOR, ".user-name")
-            username = username_element.text
-            
-            # 尝试提取用户ID
-            user_id = ""
-            try:
-                user_link = username_element.get_attribute("href")
-                if user_link:
-                    id_match = re.search(r'space\.bilibili\.com/(\d+)', user_link)
-                    if id_match:
-                        user_id = id_match.group(1)
-            except Exception:
-                pass
-            
-            # 提取评论内容
-            content_element = reply_item.find_element(By.CSS_SELECTOR, ".reply-content")
-            content = content_element.text
-            
-            # 提取时间
-            time_text = ""
-            try:
-                time_element = reply_item.find_element(By.CSS_SELECTOR, ".reply-time")
-                time_text = time_element.text
-            except Exception:
-                pass
+    def fetch_comments_over_http(self, url, video_id):
+        """不使用浏览器，直接通过HTTP获取全部评论并保存
+        
+        一级评论按游标分页获取，二级评论分页由有上限的线程池并发请求，并按站点限速。
+        
+        Args:
+            url: 视频URL
+            video_id: 视频ID（用于输出文件名）
             
-            # 提取点赞数
-            likes = "0"
+        Returns:
+            tuple: (是否获取完整并已保存, 评论树)。中途请求失败且重试后仍失败时不保存，
+                   返回已获取的部分评论树，由浏览器方式补全；未启用或接口不可用时为 (False, None)
+        """
+        if not self.http_mode:
+            return False, None
+        # BV号区分大小写，从原始URL中读取
+        id_match = re.search(r'(BV[0-9A-Za-z]{10}|av\d+)', url)
+        if not id_match:
+            return False, None
+        
+        print(f"尝试通过HTTP接口获取评论: {self.http_client.base}")
+        fetch_start = time.time()
+        info = self.get_video_info(id_match.group(1))
+        if not info:
+            print("无法通过HTTP接口获取视频信息，改用浏览器加载页面...")
+            return False, None
+        
+        def on_main_progress(roots, total):
+            self.report_progress("fetch", None, f"已通过HTTP接口获取 {roots} 条一级评论")
+        
+        def on_sub_progress(done, pages):
+            self.report_progress("fetch", done / pages, f"已获取二级评论 {done}/{pages} 页")
+        
+        tree = None
+        cursor = 0
+        for attempt in range(HTTP_RESUME_RETRIES + 1):
             try:
-                like_element = reply_item.find_element(By.CSS_SELECTOR, ".like-count")
-                likes = like_element.text.strip()
-                if not likes or not likes.isdigit():
-                    likes = "0"
-            except Exception:
-                pass
-            
-            # 返回评论数据
-            return {
-                '编号': index + 1,
-                '隶属关系': '一级评论',
-                '被评论者昵称': '',
-                '被评论者ID': '',
-                '用户名': username,
-                '用户ID': user_id,
-                '评论内容': content,
-                '发布时间': time_text,
-                '点赞数': likes
-            }
+                tree = self.http_client.fetch_reply_tree(info["aid"], on_main_progress, on_sub_progress,
+                                                         max_roots=self.max_comments, tree=tree, start_cursor=cursor)
+                cursor = 0
+                break
+            except IncompleteRepliesError as e:
+                tree = e.tree
+                cursor = e.cursor
+                print(f"{e}，已获取 {len(tree)} 条评论，从失败的位置重试 ({attempt + 1}/{HTTP_RESUME_RETRIES})...")
+        else:
+            self.record_timing("http_fetch", time.time() - fetch_start, url)
+            print("HTTP接口获取的评论不完整，改用浏览器加载页面补全...")
+            return False, tree
+        self.record_timing("http_fetch", time.time() - fetch_start, url)
+        if not tree or not len(tree):
+            print("HTTP接口不可用或没有返回评论，改用浏览器加载页面...")
+            return False, None
         
-        except Exception as e:
-            print(f"提取一级评论数据失败: {e}")
-            return None
+        records = tree.to_records()
+        print(f"通过HTTP接口获取到 {len(records)} 条评论（含二级评论）")
+        csv_filename = self.get_output_filename(video_id, info["title"] or video_id)
+        self.save_api_comments(records, csv_filename, video_id)
+        return True, tree
+    
+    def get_video_info(self, bvid):
+        """通过HTTP接口获取视频信息（aid、标题、各分P的cid和时长），同一视频只请求一次"""
+        if bvid not in self.video_infos:
+            self.video_infos[bvid] = self.http_client.fetch_video_info(bvid)
+        return self.video_infos[bvid]
     
-    def extract_sub_comments(self, parent_index, video_id, parent_nickname, parent_user_id):
-        """提取二级评论数据"""
-        sub_comments_data = []
+    def fetch_danmaku(self, url, video_id):
+        """通过HTTP接口并发下载视频的分段弹幕，逐段写入单独的CSV文件
+        
+        Returns:
+            int: 获取到的弹幕数量，无法获取时为0
+        """
+        id_match = re.search(r'(BV[0-9A-Za-z]{10}|av\d+)', url)
+        info = self.get_video_info(id_match.group(1)) if id_match else None
+        if not info or not info["pages"]:
+            print("无法通过HTTP接口获取视频的cid，跳过弹幕")
+            return 0
+        part_match = re.search(r'[?&]p=(\d+)', url)
+        part = int(part_match.group(1)) if part_match else 1
+        page = info["pages"][min(max(part, 1), len(info["pages"])) - 1]
+        
+        csv_filename = self.get_output_filename(video_id, info["title"] or video_id, kind="danmaku")
+        if os.path.isfile(csv_filename):
+            # 弹幕每次都完整获取，避免追加重复数据
+            os.remove(csv_filename)
         
+        def on_segment(index, total, added, count):
+            self.report_progress("danmaku", index / total if total else None,
+                                 f"弹幕分段 {index}/{total or '?'}：{added} 条，累计 {count} 条")
+        
+        print(f"开始获取弹幕（cid {page['cid']}，时长 {page['duration']} 秒）...")
+        fetch_start = time.time()
+        fetcher = DanmakuFetcher(self.http_client)
+        count, failed = fetcher.fetch(page["cid"], page["duration"],
+                                      lambda records: self.data_writer.write(records, csv_filename), on_segment)
+        self.record_timing("http_fetch", time.time() - fetch_start, url)
+        if failed:
+            self.write_error_log(f"视频 {video_id} 有 {failed} 个弹幕分段获取失败")
+        print(f"已保存 {count} 条弹幕到 {csv_filename}，用时 {time.time() - fetch_start:.2f} 秒")
+        return count
+    
+    def get_video_aid(self):
+        """从页面的初始数据中读取视频的aid（评论接口的oid）"""
         try:
-            # 获取当前评论项的所有二级评论
-            sub_replies = self.driver.find_elements(By.CSS_SELECTOR, f".reply-item:nth-child({parent_index + 1}) .sub-reply-item")
-            
-            if not sub_replies or len(sub_replies) == 0:
-                print(f"未找到评论项 {parent_index + 1} 的二级评论")
-                return []
+            return self.driver.execute_script(
+                "var s = window.__INITIAL_STATE__ || {};"
+                "return s.aid || (s.videoData && s.videoData.aid) || null;"
+            )
+        except Exception:
+            return None
+    
+    def fetch_comments_in_page(self, tree):
+        """在已打开的视频页面中并发请求评论接口，评论加入tree（按评论ID去重）
+        
+        请求在页面上下文中发出，自动带上浏览器的cookies。先按页码分批获取一级评论，
+        再为回复数超过预览数量的评论并发获取全部二级评论。请求失败的分页会重试一次。
+        
+        Args:
+            tree: 评论树，可以包含HTTP引擎已获取的部分评论
             
-            print(f"发现 {len(sub_replies)} 条二级评论")
+        Returns:
+            bool: 是否获取到完整的评论，接口不可用或有分页始终失败时为False（tree中保留已获取的评论）
+        """
+        if not self.fetch_mode:
+            return False
+        oid = self.get_video_aid()
+        if not oid:
+            print("未能从页面中读取视频aid，无法直接请求评论接口")
+            return False
+        
+        print("尝试在页面中直接请求评论接口...")
+        fetcher = PageFetcher(self.driver)
+        failed = 0
+        try:
+            # 一级评论：按页码分批并发请求，直到遇到最后一页
+            for batch in fetcher.iter_page_batches(lambda page: reply_page_url(oid, page)):
+                finished = False
+                pages = [(reply_page_url(oid, page_number), parse_reply_page(result["data"]))
+                         for page_number, result in batch]
+                failed_urls = [page_url for page_url, page in pages if page is None]
+                if failed_urls:
+                    retried = iter(fetcher.fetch_batch(failed_urls))
+                    pages = [(page_url, page if page is not None else parse_reply_page(next(retried)["data"]))
+                             for page_url, page in pages]
+                for page_url, page in pages:
+                    if finished:
+                        break  # 最后一页之后的分页不需要
+                    if page is None:
+                        failed += 1
+                        continue
+                    tree.add_page(page)
+                    if not page["replies"] or page["is_end"]:
+                        finished = True
+                if all(page is None for page_url, page in pages):
+                    finished = True  # 整批都失败，接口不可用
+                self.report_progress("fetch", None, f"已通过接口获取 {len(tree.roots)} 条一级评论")
+                if self.max_comments is not None and len(tree.roots) >= self.max_comments:
+                    finished = True
+                if finished:
+                    break
+            tree.truncate(self.max_comments)
             
-            # 提取每条二级评论
-            for j, sub_reply in enumerate(sub_replies):
-                try:
-                    # 提取用户名
-                    username_element = sub_reply.find_element(By.CSS_SELECTOR, ".user-name")
-                    username = username_element.text
-                    
-                    # 尝试提取用户ID
-                    user_id = ""
-                    try:
-                        user_link = username_element.get_attribute("href")
-                        if user_link:
-                            id_match = re.search(r'space\.bilibili\.com/(\d+)', user_link)
-                            if id_match:
-                                user_id = id_match.group(1)
-                    except Exception:
-                        pass
-                    
-                    # 提取评论内容
-                    content_element = sub_reply.find_element(By.CSS_SELECTOR, ".reply-content")
-                    content = content_element.text
-                    
-                    # 提取时间
-                    time_text = ""
-                    try:
-                        time_element = sub_reply.find_element(By.CSS_SELECTOR, ".reply-time")
-                        time_text = time_element.text
-                    except Exception:
-                        pass
-                    
-                    # 提取点赞数
-                    likes = "0"
-                    try:
-                        like_element = sub_reply.find_element(By.CSS_SELECTOR, ".like-count")
-                        likes = like_element.text.strip()
-                        if not likes or not likes.isdigit():
-                            likes = "0"
-                    except Exception:
-                        pass
-                    
-                    # 添加二级评论数据
-                    sub_comments_data.append({
-                        '编号': f"{parent_index + 1}.{j + 1}",
-                        '隶属关系': '二级评论',
-                        '被评论者昵称': parent_nickname,
-                        '被评论者ID': parent_user_id,
-                        '用户名': username,
-                        '用户ID': user_id,
-                        '评论内容': content,
-                        '发布时间': time_text,
-                        '点赞数': likes
-                    })
-                
-                except Exception as e:
-                    print(f"提取二级评论数据失败: {e}")
+            # 二级评论：所有需要的分页一次性交给引擎并发请求
+            sub_urls = []
+            for root in tree.incomplete_roots():
+                pages = (root['rcount'] + PAGE_SIZE - 1) // PAGE_SIZE
+                sub_urls.extend(sub_reply_page_url(oid, root['rpid'], page) for page in range(1, pages + 1))
+            if sub_urls:
+                print(f"开始获取二级评论，共 {len(sub_urls)} 页...")
+                failed_urls = []
+                for start in range(0, len(sub_urls), fetcher.max_in_flight * 5):
+                    chunk = sub_urls[start:start + fetcher.max_in_flight * 5]
+                    for sub_url, result in zip(chunk, fetcher.fetch_batch(chunk)):
+                        page = parse_reply_page(result["data"])
+                        if page is None:
+                            failed_urls.append(sub_url)
+                        tree.add_page(page)
+                    done = start + len(chunk)
+                    self.report_progress("fetch", done / len(sub_urls), f"已获取二级评论 {done}/{len(sub_urls)} 页")
+                if failed_urls:
+                    print(f"{len(failed_urls)} 页二级评论请求失败，重试...")
+                    for result in fetcher.fetch_batch(failed_urls):
+                        page = parse_reply_page(result["data"])
+                        if page is None:
+                            failed += 1
+                        tree.add_page(page)
+        except Exception as e:
+            print(f"在页面中请求评论接口时出错: {e}")
+            return False
+        if failed:
+            print(f"页面中有 {failed} 页评论请求失败，评论不完整，改用滚动加载补全...")
+            return False
+        return len(tree) > 0
+    
+    def extract_captured_comments(self, tree=None):
+        """从网络抓取到的评论接口响应中提取评论
+        
+        Args:
+            tree: 评论树，可以包含之前已获取的部分评论（按评论ID去重合并）
             
-            return sub_comments_data
+        Returns:
+            list: 评论记录列表（一级评论后紧跟其二级评论），没有抓取到数据时为空列表
+        """
+        tree = tree if tree is not None else ReplyTree()
+        for response in self.stop_network_capture():
+            tree.add_page(parse_reply_page(response["data"]))
+        tree.truncate(self.max_comments)
+        return tree.to_records()
+    
+    def expand_sub_replies(self, timeout=10):
+        """一次点击页面中所有"查看更多"按钮，等待二级评论加载完成"""
+        clicked = self.driver.execute_script(CLICK_VIEW_MORE_SCRIPT) or 0
+        if not clicked:
+            return 0
+        print(f"已展开 {clicked} 条评论的二级评论，等待加载...")
+        try:
+            # 按钮在二级评论加载后变为分页控件，剩余按钮为0时视为加载完成
+            WebDriverWait(self.driver, timeout, poll_frequency=0.5).until(
+                lambda driver: driver.execute_script(PENDING_VIEW_MORE_SCRIPT) == 0)
+        except Exception:
+            print("部分二级评论在等待时间内没有加载完成")
+        return clicked
+    
+    def build_dom_records(self, reply_tree, start_index=0):
+        """把页面脚本返回的评论树转换为评论记录
         
-        except Exception as e:
-            print(f"获取二级评论失败: {e}")
-            return []
-
+        Args:
+            reply_tree: EXTRACT_REPLIES_SCRIPT返回的列表，每条一级评论带有subs列表
+            start_index: 从第几条一级评论开始（用于继续之前的进度）
+            
+        Returns:
+            list: 评论记录列表（一级评论后紧跟其二级评论）
+        """
+        records = []
+        for i, reply in enumerate(reply_tree):
+            if i < start_index:
+                continue
+            parent_nickname = reply['user']
+            parent_user_id = _user_id(reply['href'])
+            records.append({
+                '编号': i + 1,
+                '隶属关系': '一级评论',
+                '被评论者昵称': '',
+                '被评论者ID': '',
+                '用户名': parent_nickname,
+                '用户ID': parent_user_id,
+                '评论内容': reply['content'],
+                '发布时间': reply['time'],
+                '点赞数': _like_count(reply['likes']),
+                # 页面中没有可靠的评论ID，ID列留空（不写入线程索引）
+                '评论ID': '',
+                '父评论ID': '',
+                '根评论ID': ''
+            })
+            for j, sub in enumerate(reply.get('subs') or []):
+                records.append({
+                    '编号': f"{i + 1}.{j + 1}",
+                    '隶属关系': '二级评论',
+                    '被评论者昵称': parent_nickname,
+                    '被评论者ID': parent_user_id,
+                    '用户名': sub['user'],
+                    '用户ID': _user_id(sub['href']),
+                    '评论内容': sub['content'],
+                    '发布时间': sub['time'],
+                    '点赞数': _like_count(sub['likes']),
+                    '评论ID': '',
+                    '父评论ID': '',
+                    '根评论ID': ''
+                })
+        return records
+    
     def get_video_title(self):
         """获取B站视频标题
         
@@ -471,10 +765,26 @@ if __name__ == "__main__":
     try:
         # 创建B站爬虫实例
         use_headless = input("是否使用无头模式运行浏览器(无界面，推荐用于解决闪退问题)? [y/n]: ").strip().lower() == 'y'
-        crawler = BiliCrawler(use_headless)
+        workers = input("并行浏览器数量 (默认1，多个浏览器可同时处理不同视频): ").strip()
+        workers = int(workers) if workers.isdigit() else 1
+        lean_mode = input("是否启用精简加载模式(不加载图片、字体和视频，节省流量和时间)? [y/n]: ").strip().lower() == 'y'
+        max_comments = input("每个视频最多爬取的一级评论数 (直接回车表示爬取全部): ").strip()
+        max_comments = int(max_comments) if max_comments.isdigit() else None
+        danmaku = input("是否同时爬取视频弹幕? [y/n]: ").strip().lower() == 'y'
         
-        # 运行爬虫
-        crawler.run('video_list.txt')  # B站使用video_list.txt作为URL列表文件
+        if workers > 1 and input("是否在同一个浏览器中使用隔离上下文并行(内存占用更少)? [y/n]: ").strip().lower() == 'y':
+            # 上下文模式：所有任务共享一个浏览器进程，每个任务使用独立的上下文
+            BiliCrawler.run_in_contexts('video_list.txt', contexts=workers, use_headless=use_headless, lean_mode=lean_mode,
+                                        crawler_kwargs={"max_comments": max_comments, "danmaku": danmaku})
+        elif workers > 1:
+            # 并行模式：每个工作进程持有一个浏览器
+            BiliCrawler.run_parallel('video_list.txt', workers=workers, use_headless=use_headless, lean_mode=lean_mode,
+                                     crawler_kwargs={"max_comments": max_comments, "danmaku": danmaku})
+        else:
+            crawler = BiliCrawler(use_headless, lean_mode=lean_mode, max_comments=max_comments, danmaku=danmaku)
+            
+            # 运行爬虫
+            crawler.run('video_list.txt')  # B站使用video_list.txt作为URL列表文件
     except Exception as e:
         print(f"程序运行时发生未处理的异常: {e}")
         # 记录错误
@@ -0,0 +1,208 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+B站弹幕获取 - 并发下载分段弹幕（seg.so，protobuf格式），逐段解码并写入
+
+弹幕接口按视频时间每6分钟分为一段，一个视频可能有几十万条弹幕。
+DanmakuFetcher 同时请求多个分段，但按分段顺序逐段解码、写入，
+内存中最多只保留正在请求的几个分段，不会一次持有全部弹幕。
+
+protobuf只用到了很少的一部分（varint和长度前缀字段），这里直接解码，不依赖protobuf库。
+
+记录格式：弹幕ID、视频内时间、弹幕内容、发送时间、用户哈希、模式、字号、颜色、弹幕池
+"""
+
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from bili_api import API_BASE
+
+logger = logging.getLogger("bili_danmaku")
+
+# 每个分段覆盖的视频时长（秒）
+SEGMENT_SECONDS = 360
+# 同时请求的分段数
+DEFAULT_MAX_WORKERS = 4
+# 视频时长未知时最多请求的分段数（遇到空分段时提前结束）
+MAX_UNKNOWN_SEGMENTS = 100
+
+# DanmakuElem 的字段号 -> (字段名, 类型)
+DANMAKU_FIELDS = {
+    1: ("id", "int"),
+    2: ("progress", "int"),
+    3: ("mode", "int"),
+    4: ("fontsize", "int"),
+    5: ("color", "int"),
+    6: ("mid_hash", "str"),
+    7: ("content", "str"),
+    8: ("ctime", "int"),
+    9: ("weight", "int"),
+    10: ("action", "str"),
+    11: ("pool", "int"),
+    12: ("id_str", "str"),
+    13: ("attr", "int")
+}
+
+
+def danmaku_segment_url(cid, segment_index, base=API_BASE):
+    """分段弹幕接口地址，segment_index从1开始"""
+    return f"{base}/x/v2/dm/web/seg.so?type=1&oid={cid}&segment_index={segment_index}"
+
+
+def segment_count(duration):
+    """视频时长（秒）对应的分段数，时长未知时返回None"""
+    if not duration:
+        return None
+    return max(1, (int(duration) + SEGMENT_SECONDS - 1) // SEGMENT_SECONDS)
+
+
+def _read_varint(data, pos):
+    result = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+
+
+def iter_fields(data):
+    """逐个返回protobuf消息中的字段
+
+    Yields:
+        tuple: (字段号, 值)，varint字段的值为int，长度前缀字段的值为memoryview
+    """
+    data = memoryview(data)
+    pos = 0
+    end = len(data)
+    while pos < end:
+        key, pos = _read_varint(data, pos)
+        field, wire_type = key >> 3, key & 0x07
+        if wire_type == 0:
+            value, pos = _read_varint(data, pos)
+        elif wire_type == 2:
+            length, pos = _read_varint(data, pos)
+            value = data[pos:pos + length]
+            pos += length
+        elif wire_type == 1:
+            value = int.from_bytes(data[pos:pos + 8], "little")
+            pos += 8
+        elif wire_type == 5:
+            value = int.from_bytes(data[pos:pos + 4], "little")
+            pos += 4
+        else:
+            raise ValueError(f"不支持的protobuf字段类型: {wire_type}")
+        yield field, value
+
+
+def decode_danmaku(message):
+    """解码一条DanmakuElem"""
+    elem = {}
+    for field, value in iter_fields(message):
+        name, kind = DANMAKU_FIELDS.get(field, (None, None))
+        if name is None:
+            continue
+        if kind == "str":
+            elem[name] = bytes(value).decode("utf-8", errors="replace")
+        else:
+            elem[name] = value if isinstance(value, int) else 0
+    return elem
+
+
+def iter_segment(data):
+    """逐条解码一个分段（DmSegMobileReply）中的弹幕，数据无法解码时停止"""
+    try:
+        for field, value in iter_fields(data):
+            if field == 1 and isinstance(value, memoryview):
+                yield decode_danmaku(value)
+    except (IndexError, ValueError) as e:
+        logger.warning(f"弹幕分段数据解码失败: {e}")
+
+
+def danmaku_record(elem):
+    """把解码后的弹幕转换为记录"""
+    ctime = elem.get("ctime")
+    return {
+        '弹幕ID': elem.get("id_str") or str(elem.get("id", "")),
+        '视频内时间': f"{elem.get('progress', 0) / 1000:.3f}",
+        '弹幕内容': elem.get("content", ""),
+        '发送时间': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(ctime)) if ctime else "",
+        '用户哈希': elem.get("mid_hash", ""),
+        '模式': elem.get("mode", 1),
+        '字号': elem.get("fontsize", 25),
+        '颜色': f"#{elem.get('color', 0xFFFFFF):06X}",
+        '弹幕池': elem.get("pool", 0)
+    }
+
+
+class DanmakuFetcher:
+    """并发下载分段弹幕，按分段顺序解码并写入"""
+
+    def __init__(self, client, max_workers=DEFAULT_MAX_WORKERS):
+        """
+        Args:
+            client: BiliReplyClient（复用其连接池、重试和按站点限速）
+            max_workers: 同时请求的分段数，也是内存中最多保留的分段数
+        """
+        self.client = client
+        self.max_workers = max(1, max_workers)
+
+    def fetch_segment(self, cid, segment_index):
+        return self.client.get_content(danmaku_segment_url(cid, segment_index, self.client.base))
+
+    def iter_segments(self, cid, duration=0):
+        """按顺序返回每个分段的原始数据，后续分段在后台并发预取
+
+        Yields:
+            tuple: (分段序号, 总分段数或None, 分段数据)，请求失败的分段数据为None
+        """
+        total = segment_count(duration)
+        last = total or MAX_UNKNOWN_SEGMENTS
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bili-dm") as executor:
+            pending = {}
+            next_index = 1
+            try:
+                for current in range(1, last + 1):
+                    # 保持max_workers个分段在请求中
+                    while next_index <= last and len(pending) < self.max_workers:
+                        pending[next_index] = executor.submit(self.fetch_segment, cid, next_index)
+                        next_index += 1
+                    data = pending.pop(current).result()
+                    yield current, total, data
+                    # 时长未知时遇到空分段即结束
+                    if total is None and not data:
+                        return
+            finally:
+                for future in pending.values():
+                    future.cancel()
+
+    def fetch(self, cid, duration, write, on_segment=None):
+        """下载并写入一个视频（分P）的全部弹幕
+
+        Args:
+            cid: 视频分P的cid
+            duration: 视频时长（秒），0表示未知
+            write: 写入函数，参数为一个分段的记录列表
+            on_segment: 每处理完一个分段后调用，参数为 (分段序号, 总分段数或None, 本段弹幕数, 累计弹幕数)
+
+        Returns:
+            tuple: (弹幕总数, 失败的分段数)
+        """
+        count = 0
+        failed = 0
+        for index, total, data in self.iter_segments(cid, duration):
+            if data is None:
+                failed += 1
+                records = []
+            else:
+                records = [danmaku_record(elem) for elem in iter_segment(data)]
+            if records:
+                write(records)
+                count += len(records)
+            if on_segment:
+                on_segment(index, total, len(records), count)
+        return count, failed
@@ -0,0 +1,242 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+隔离的浏览器上下文 - 在同一个浏览器进程中并行运行多个爬取任务
+
+并行爬取时每个任务启动一个完整的浏览器进程，每个进程占用数百MB内存。
+这里通过CDP的 Target.createBrowserContext 在一个浏览器中创建多个隔离的上下文
+（类似互不相干的无痕窗口，cookies和缓存各自独立），每个任务在自己的上下文中运行。
+
+WebDriver会话同一时刻只能执行一个命令、操作一个窗口，因此由 ContextScheduler 调度：
+每个任务在自己的线程中运行（爬虫代码不需要修改），所有WebDriver命令都经过
+调度器排队执行，执行前自动切换到该任务所在的窗口，锁只在切换窗口和执行这一个命令期间持有。
+任务在两个命令之间等待（滚动间隔、sleep）时不占用会话，其他任务的命令可以穿插执行。
+
+为了让各任务真正交替推进，调度器在WebDriver实例上设置 shared_session = True，
+长时间运行的页面脚本据此改为短命令：AutoScroller 每次调用只滚动一轮，
+PageFetcher 启动请求后立即返回再轮询结果。页面加载（driver.get）仍会在加载期间占用会话。
+"""
+
+import time
+import logging
+import threading
+from contextlib import contextmanager
+
+from selenium.webdriver.remote.command import Command
+
+from driver_pool import browser_rss_mb
+
+logger = logging.getLogger("browser_contexts")
+
+
+class BrowserContext:
+    """一个隔离的浏览器上下文及其中的标签页"""
+
+    def __init__(self, name, context_id, target_id, handle):
+        self.name = name
+        self.context_id = context_id
+        self.target_id = target_id
+        self.handle = handle
+        self.handles = [handle]  # 该上下文拥有的窗口，第一个为主标签页
+
+
+class ContextScheduler:
+    """在一个WebDriver会话上复用多个隔离上下文，按线程把命令路由到对应的窗口"""
+
+    def __init__(self, driver):
+        """接管WebDriver实例的命令执行
+
+        Args:
+            driver: WebDriver实例（Chrome或Edge），调用detach()之前不应再直接使用
+        """
+        self.driver = driver
+        self.contexts = []
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        self._original_execute = driver.execute
+        self._current_handle = None
+        driver.execute = self._execute
+        # 通知页面脚本（AutoScroller、PageFetcher）使用短命令，不长时间占用会话
+        driver.shared_session = True
+
+    def _execute(self, driver_command, params=None):
+        """所有WebDriver命令（包括元素上的命令）都经过这里，锁只覆盖切换窗口和这一个命令"""
+        context = getattr(self._local, "context", None)
+        with self._lock:
+            if context is None:
+                return self._original_execute(driver_command, params)
+
+            if driver_command != Command.SWITCH_TO_WINDOW and self._current_handle != context.handle:
+                self._original_execute(Command.SWITCH_TO_WINDOW, {'handle': context.handle})
+                self._current_handle = context.handle
+
+            response = self._original_execute(driver_command, params)
+
+            if driver_command == Command.SWITCH_TO_WINDOW:
+                handle = (params or {}).get('handle')
+                self._current_handle = handle
+                self._claim(context, handle)
+                context.handle = handle
+            elif driver_command == Command.W3C_GET_WINDOW_HANDLES:
+                # 只返回当前任务自己的窗口，避免任务切换到其他上下文的标签页
+                all_handles = response.get('value') or []
+                for handle in all_handles:
+                    if not self._owner(handle):
+                        self._claim(context, handle)
+                context.handles = [h for h in context.handles if h in all_handles]
+                response['value'] = list(context.handles)
+            elif driver_command == Command.CLOSE:
+                if context.handle in context.handles:
+                    context.handles.remove(context.handle)
+                self._current_handle = None
+            return response
+
+    def _owner(self, handle):
+        for context in self.contexts:
+            if handle in context.handles:
+                return context
+        return None
+
+    def _claim(self, context, handle):
+        """把新出现的窗口（例如页面中window.open打开的标签页）归属到当前任务"""
+        if handle and handle not in context.handles and not self._owner(handle):
+            context.handles.append(handle)
+
+    def create_context(self, name=None):
+        """创建一个隔离的浏览器上下文，并在其中打开一个空白标签页
+
+        Returns:
+            BrowserContext: 新建的上下文
+        """
+        with self._lock:
+            known_handles = set(self._original_execute(Command.W3C_GET_WINDOW_HANDLES)['value'])
+            context_id = self.driver.execute_cdp_cmd('Target.createBrowserContext', {})['browserContextId']
+            target_id = self.driver.execute_cdp_cmd('Target.createTarget', {
+                'url': 'about:blank', 'browserContextId': context_id
+            })['targetId']
+
+            # ChromeDriver使用targetId作为窗口句柄，这里兼容句柄不一致的情况
+            handle = None
+            for attempt in range(20):
+                handles = self._original_execute(Command.W3C_GET_WINDOW_HANDLES)['value']
+                if target_id in handles:
+                    handle = target_id
+                    break
+                new_handles = [h for h in handles if h not in known_handles and not self._owner(h)]
+                if new_handles:
+                    handle = new_handles[0]
+                    break
+                time.sleep(0.1)
+            if handle is None:
+                raise RuntimeError(f"无法找到新建上下文的窗口: {target_id}")
+
+            context = BrowserContext(name or f"context-{len(self.contexts) + 1}", context_id, target_id, handle)
+            self.contexts.append(context)
+            logger.info(f"已创建隔离的浏览器上下文: {context.name}")
+            return context
+
+    def close_context(self, context):
+        """关闭上下文中的所有标签页并销毁上下文（cookies和缓存随之丢弃）"""
+        with self._lock:
+            for handle in list(context.handles):
+                try:
+                    self._original_execute(Command.SWITCH_TO_WINDOW, {'handle': handle})
+                    self._original_execute(Command.CLOSE)
+                except Exception:
+                    pass
+            self._current_handle = None
+            try:
+                self.driver.execute_cdp_cmd('Target.disposeBrowserContext', {'browserContextId': context.context_id})
+            except Exception as e:
+                logger.debug(f"销毁浏览器上下文失败: {e}")
+            if context in self.contexts:
+                self.contexts.remove(context)
+
+    @contextmanager
+    def use(self, context):
+        """在当前线程中使用指定的上下文，期间所有WebDriver命令都会发送到该上下文的窗口"""
+        previous = getattr(self._local, "context", None)
+        self._local.context = context
+        try:
+            yield context
+        finally:
+            self._local.context = previous
+
+    def run_jobs(self, jobs):
+        """在各自的上下文中并行运行任务
+
+        Args:
+            jobs: 列表，元素为 (上下文, 任务函数)，任务函数在独立线程中以上下文为参数调用
+
+        Returns:
+            list: 与jobs一一对应的异常对象，任务成功时为None
+        """
+        errors = [None] * len(jobs)
+
+        def runner(index, context, job):
+            with self.use(context):
+                try:
+                    job(context)
+                except Exception as e:
+                    logger.error(f"上下文 {context.name} 中的任务出错: {e}")
+                    errors[index] = e
+
+        threads = [threading.Thread(target=runner, args=(i, context, job), name=f"job-{context.name}")
+                   for i, (context, job) in enumerate(jobs)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return errors
+
+    def memory_report(self):
+        """统计每个上下文的内存（JS堆、DOM节点数）和整个浏览器进程树的内存
+
+        Returns:
+            dict: {"contexts": {名称: {"js_heap_mb", "nodes", "documents"}},
+                   "process_rss_mb": 浏览器进程树RSS（未安装psutil时为None）}
+        """
+        report = {"contexts": {}, "process_rss_mb": browser_rss_mb(self.driver)}
+        for context in list(self.contexts):
+            with self.use(context):
+                try:
+                    self.driver.execute_cdp_cmd('Performance.enable', {})
+                    metrics = self.driver.execute_cdp_cmd('Performance.getMetrics', {})['metrics']
+                    values = {metric['name']: metric['value'] for metric in metrics}
+                    report["contexts"][context.name] = {
+                        "js_heap_mb": values.get('JSHeapUsedSize', 0) / (1024 * 1024),
+                        "nodes": int(values.get('Nodes', 0)),
+                        "documents": int(values.get('Documents', 0))
+                    }
+                except Exception as e:
+                    logger.debug(f"读取上下文 {context.name} 的性能指标失败: {e}")
+        return report
+
+    def detach(self):
+        """关闭所有上下文并恢复WebDriver实例原来的命令执行方式"""
+        for context in list(self.contexts):
+            self.close_context(context)
+        self.driver.execute = self._original_execute
+        self.driver.shared_session = False
+        try:
+            handles = self.driver.window_handles
+            if handles:
+                self.driver.switch_to.window(handles[0])
+        except Exception:
+            pass
+
+
+def format_memory_report(report):
+    """把内存统计格式化为多行文本，对比每个上下文与整个浏览器进程"""
+    lines = []
+    contexts = report.get("contexts", {})
+    for name, values in contexts.items():
+        lines.append(f"  {name}: JS堆 {values['js_heap_mb']:.1f} MB，DOM节点 {values['nodes']}，文档 {values['documents']}")
+    rss = report.get("process_rss_mb")
+    if rss is not None:
+        per_context = rss / len(contexts) if contexts else rss
+        lines.append(f"  浏览器进程树: {rss:.0f} MB，共 {len(contexts)} 个上下文，平均每个上下文 {per_context:.0f} MB")
+    else:
+        lines.append("  浏览器进程树: 未安装psutil，无法统计")
+    return "\n".join(lines)
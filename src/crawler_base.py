@@ -3,18 +3,13 @@
 此模块包含爬取各类网站评论的通用功能和基础架构
 """
 
-from selenium import webdriver
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import NoSuchElementException
 from selenium.common.exceptions import TimeoutException
 from selenium.common.exceptions import WebDriverException
 from selenium.common.exceptions import ElementClickInterceptedException
-from selenium.webdriver.chrome.service import Service
 from selenium.common.exceptions import NoSuchWindowException
-from selenium.webdriver.chrome.options import Options
 from bs4 import BeautifulSoup
 import pickle
 import time
@@ -23,14 +18,15 @@ import csv
 import re
 import json
 import sys
-import tempfile
-import shutil
 from abc import ABC, abstractmethod
-import platform
 import io
 import random
 import logging
 import traceback
+import contextlib
+import threading
+import multiprocessing
+import queue
 from datetime import datetime, timedelta
 import urllib.parse
 from typing import Dict, List, Optional, Tuple, Union, Any
@@ -39,28 +35,142 @@ from tqdm import tqdm
 from colorama import Fore, Style
 import requests
 
+from driver_pool import get_driver_pool, lease_driver, release_driver, create_driver, note_page
+from profile_pool import get_profile_pool
+from lean_mode import enable_lean_mode, measure_page, format_page_stats
+from network_capture import NetworkCapture
+from auto_scroll import AutoScroller, DEFAULT_NO_GROWTH_CYCLES
+from browser_contexts import ContextScheduler, format_memory_report
+
+# 并行模式下同一站点默认的最大并发任务数
+DEFAULT_PER_HOST_LIMIT = 3
+
+# 耗时指标的中文名称
+TIMING_LABELS = {
+    "browser_launch": "浏览器启动",
+    "navigation": "页面导航",
+    "http_fetch": "HTTP接口请求",
+    "element_discovery": "评论元素定位"
+}
+
+# 检查列表结束标记：参数为 [CSS选择器, 文本] 列表，任一匹配元素包含对应文本即返回true
+END_MARKER_SCRIPT = """
+var markers = arguments[0];
+for (var i = 0; i < markers.length; i++) {
+    var elements = document.querySelectorAll(markers[i][0]);
+    for (var j = 0; j < elements.length; j++) {
+        if ((elements[j].innerText || elements[j].textContent || '').indexOf(markers[i][1]) !== -1) {
+            return true;
+        }
+    }
+}
+return false;
+"""
+
+# 评论区位置标记，按优先级排列；"text:"前缀表示按标题文本匹配
+COMMENT_SECTION_INDICATORS = [
+    "[class*='comment']",
+    "text:h3:评论",
+    "#comment",
+    "#comments",
+    "[class*='review']",
+    "[class*='review-list']",
+    "[class*='list']"
+]
+
+# 查找第一个存在的评论区标记并滚动到该位置，返回使用的标记
+COMMENT_SECTION_SCROLL_SCRIPT = """
+var indicators = arguments[0];
+for (var i = 0; i < indicators.length; i++) {
+    var indicator = indicators[i];
+    var target = null;
+    if (indicator.indexOf('text:') === 0) {
+        var parts = indicator.split(':');
+        var nodes = document.getElementsByTagName(parts[1]);
+        for (var j = 0; j < nodes.length; j++) {
+            if (nodes[j].textContent.indexOf(parts[2]) !== -1) {
+                target = nodes[j];
+                break;
+            }
+        }
+    } else {
+        try {
+            target = document.querySelector(indicator);
+        } catch (e) {
+            target = null;
+        }
+    }
+    if (target) {
+        target.scrollIntoView(true);
+        return indicator;
+    }
+}
+return null;
+"""
+
+# 一次性统计所有选择器的匹配数量和页面高度，可选地随后滚动到底部
+COMMENT_PROBE_SCRIPT = """
+var selectors = arguments[0];
+var counts = [];
+for (var i = 0; i < selectors.length; i++) {
+    try {
+        counts.push(document.querySelectorAll(selectors[i]).length);
+    } catch (e) {
+        counts.push(-1);
+    }
+}
+var height = document.documentElement.scrollHeight;
+if (arguments[1]) {
+    window.scrollTo(0, height);
+}
+return {counts: counts, height: height};
+"""
+
 class BaseCrawler(ABC):
     """爬虫基类，提供通用功能和抽象方法"""
     
-    def __init__(self, use_headless=False, temp_dir=None):
+    # 进度文件路径，并行模式下每个工作进程使用各自的进度文件
+    progress_file = os.path.join("logs", "progress.txt")
+    
+    # 平台名称，用于选择精简模式的拦截规则和放行列表
+    platform_name = None
+    
+    def __init__(self, use_headless=False, temp_dir=None, lean_mode=False, capture_mode=True, fetch_mode=True,
+                 auto_scroll=True, driver=None, lazy_driver=False):
         """
         初始化爬虫
         
         参数:
             use_headless: 是否使用无头模式
-            temp_dir: 临时目录路径，如果为None则自动创建
+            temp_dir: 浏览器用户数据目录，如果为None则从共享浏览器池中租用浏览器
+            lean_mode: 是否启用精简加载模式（拦截图片、字体、音视频和统计脚本）
+            capture_mode: 是否优先从评论接口的网络响应中提取数据（失败时回退到页面提取）
+            fetch_mode: 是否在页面加载后直接在页面中请求评论接口（无需滚动，失败时回退到滚动加载）
+            auto_scroll: 是否由页面内的脚本自主完成滚动循环（否则每次滚动由Python控制）
+            driver: 外部提供的WebDriver实例（如隔离上下文模式下共享的浏览器），由调用方负责关闭
+            lazy_driver: 是否在第一次使用浏览器时才启动（不需要浏览器的任务不会启动浏览器）
         """
         self.mini_flag = True  # 用于标记是否需要处理迷你播放器
+        self.timings = {}  # 各阶段耗时（秒），浏览器启动与页面导航分开记录
+        self.lean_mode = lean_mode
+        self.page_stats = {}  # 最近一次页面加载的传输量统计
+        self.capture_mode = capture_mode
+        self.network_capture = None  # 当前页面的网络抓取器，滚动过程中定期收集接口响应
+        self.fetch_mode = fetch_mode
+        self.auto_scroll = auto_scroll
+        self.progress_callback = None  # 进度回调函数，Web界面在这里检查任务是否已被取消
         
-        # 创建临时目录
-        if temp_dir is None:
-            current_folder = os.path.dirname(os.path.abspath(__file__))
-            self.temp_dir = tempfile.mkdtemp(dir=current_folder)
-        else:
-            self.temp_dir = temp_dir
+        # 使用共享浏览器池时，配置目录由浏览器池从配置目录池中租用
+        self.profile_pool = get_profile_pool()
+        self.temp_dir = temp_dir
+        self.external_driver = driver is not None
+        self.use_headless = use_headless
+        self._provided_driver = driver
+        self._driver = None
         
         # 初始化浏览器
-        self.driver = self._init_browser(use_headless)
+        if not lazy_driver:
+            self._start_driver()
         
         # 初始化进度
         self.progress = self._load_progress()
@@ -68,9 +178,28 @@ class BaseCrawler(ABC):
         # 确保logs目录存在
         os.makedirs("logs", exist_ok=True)
     
+    @property
+    def driver(self):
+        """WebDriver实例，第一次访问时才启动或租用浏览器"""
+        if self._driver is None:
+            self._start_driver()
+        return self._driver
+    
+    def _start_driver(self):
+        """启动（或接管外部提供的）浏览器，并按需启用精简加载模式"""
+        self._driver = self._provided_driver or self._init_browser(self.use_headless)
+        if self.lean_mode:
+            print("已启用精简加载模式，将拦截图片、字体、音视频和统计脚本...")
+            self.lean_mode = enable_lean_mode(self._driver, self.platform_name)
+    
+    @property
+    def browser_started(self):
+        """浏览器是否已经启动"""
+        return self._driver is not None
+    
     def _init_browser(self, use_headless):
         """
-        初始化浏览器
+        初始化浏览器，优先从共享浏览器池中租用预热好的实例
         
         参数:
             use_headless: 是否使用无头模式
@@ -78,92 +207,28 @@ class BaseCrawler(ABC):
         返回:
             WebDriver对象
         """
-        chrome_options = Options()
-        chrome_options.add_argument(f'--user-data-dir={self.temp_dir}')
-        
-        # 添加通用浏览器选项
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-        chrome_options.add_argument('--disable-extensions')
-        chrome_options.add_argument('--disable-popup-blocking')
-        chrome_options.add_argument('--ignore-certificate-errors')
-        chrome_options.add_argument('--disable-gpu')
-        chrome_options.add_argument('--window-size=1920,1080')
-        chrome_options.add_argument('--start-maximized')
-        
-        # 添加无头模式
         if use_headless:
             print("已启用无头模式，浏览器将在后台运行...")
-            chrome_options.add_argument('--headless=new')
         else:
             print("已禁用无头模式，浏览器将显示界面...")
         
-        # 检测操作系统并设置Chrome路径
-        os_name = platform.system()
-        chrome_path = None
-        
-        if os_name == "Darwin":  # macOS
-            print("检测到macOS系统")
-            possible_mac_paths = [
-                '/Applications/Google Chrome.app/Contents/MacOS/Google Chrome',
-                '/Applications/Google Chrome.app'
-            ]
-            for path in possible_mac_paths:
-                if os.path.exists(path):
-                    chrome_path = path
-                    print(f"在Mac上找到Chrome: {chrome_path}")
-                    break
-        elif os_name == "Windows":
-            print("检测到Windows系统")
-            possible_win_paths = [
-                'C:/Program Files/Google/Chrome/Application/chrome.exe',
-                'C:/Program Files (x86)/Google/Chrome/Application/chrome.exe',
-                os.path.join(os.environ.get('LOCALAPPDATA', ''), 'Google/Chrome/Application/chrome.exe')
-            ]
-            for path in possible_win_paths:
-                if os.path.exists(path):
-                    chrome_path = path
-                    print(f"在Windows上找到Chrome: {chrome_path}")
-                    break
-        else:
-            print(f"检测到未支持的操作系统: {os_name}，将尝试使用默认设置")
-        
-        # 如果找到Chrome路径，添加到选项中
-        if chrome_path:
-            chrome_options.binary_location = chrome_path
-            print(f"已设置Chrome路径: {chrome_path}")
-        else:
-            print("未找到Chrome安装路径，将尝试使用默认路径")
-        
-        # 尝试多种方式初始化浏览器
-        driver = None
+        launch_start = time.time()
         try:
-            # 方法1: 使用ChromeDriverManager并指定浏览器路径
-            print("尝试初始化浏览器方式1...")
-            service = Service(ChromeDriverManager().install())
-            driver = webdriver.Chrome(service=service, options=chrome_options)
-            print("浏览器初始化成功 (方式1)")
+            if self.temp_dir is None:
+                print("正在从共享浏览器池获取Chrome实例...")
+                driver = lease_driver("chrome", use_headless, capture=self.capture_mode)
+            else:
+                print(f"使用指定的用户数据目录启动Chrome: {self.temp_dir}")
+                driver = create_driver("chrome", use_headless, user_data_dir=self.temp_dir,
+                                       capture=self.capture_mode)
+            print("浏览器初始化成功")
         except Exception as e:
-            print(f"初始化方式1失败: {e}")
-            try:
-                # 方法2: 直接使用webdriver.Chrome()
-                print("尝试初始化浏览器方式2...")
-                driver = webdriver.Chrome(options=chrome_options)
-                print("浏览器初始化成功 (方式2)")
-            except Exception as e:
-                print(f"初始化方式2失败: {e}")
-                try:
-                    # 方法3: 使用service但不使用ChromeDriverManager
-                    print("尝试初始化浏览器方式3...")
-                    service = Service()
-                    driver = webdriver.Chrome(service=service, options=chrome_options)
-                    print("浏览器初始化成功 (方式3)")
-                except Exception as e:
-                    print(f"所有浏览器初始化方法都失败: {e}")
-                    print("请确保已正确安装Chrome浏览器和匹配的ChromeDriver")
-                    self.reset_progress()
-                    sys.exit(1)
+            print(f"浏览器初始化失败: {e}")
+            print("请确保已正确安装Chrome浏览器和匹配的ChromeDriver")
+            self.reset_progress()
+            sys.exit(1)
         
+        self.record_timing("browser_launch", time.time() - launch_start)
         return driver
     
     def _load_progress(self):
@@ -173,7 +238,7 @@ class BaseCrawler(ABC):
         返回:
             进度数据字典
         """
-        progress_file = os.path.join("logs", "progress.txt")
+        progress_file = self.progress_file
         if os.path.exists(progress_file):
             try:
                 with open(progress_file, "r", encoding='utf-8-sig') as f:
@@ -199,7 +264,7 @@ class BaseCrawler(ABC):
 
         while retries < max_retries:
             try:
-                with open(os.path.join("logs", "progress.txt"), "w", encoding='utf-8') as f:
+                with open(self.progress_file, "w", encoding='utf-8') as f:
                     json.dump(progress, f)
                 break  # 如果成功保存，跳出循环
             except PermissionError as e:
@@ -231,6 +296,100 @@ class BaseCrawler(ABC):
         with open(os.path.join("logs", "error_log.txt"), "a", encoding='utf-8') as file:
             file.write(f"{time.strftime('%Y-%m-%d %H:%M:%S')} - {message}\n")
     
+    def set_progress_callback(self, callback_func):
+        """
+        设置进度回调函数
+        
+        参数:
+            callback_func: 回调函数，接收三个参数：phase(阶段)、progress(进度0-1，未知时为None)、message(消息)
+        """
+        self.progress_callback = callback_func
+    
+    def report_progress(self, phase, progress, message):
+        """
+        输出进度消息并调用进度回调函数
+        
+        参数:
+            phase: 当前阶段，如scroll（滚动加载）、fetch（请求评论接口）
+            progress: 进度，0到1之间的浮点数，未知时为None
+            message: 进度消息
+        """
+        print(message)
+        if self.progress_callback:
+            self.progress_callback(phase, progress, message)
+    
+    def record_timing(self, name, seconds, target=""):
+        """
+        记录耗时指标，输出到控制台并追加到logs/timings.csv
+        
+        参数:
+            name: 指标名称，如browser_launch、navigation
+            seconds: 耗时（秒）
+            target: 相关的URL或ID（可选）
+        """
+        print(f"[耗时] {TIMING_LABELS.get(name, name)}: {seconds:.2f} 秒")
+        self.timings[name] = seconds
+        try:
+            os.makedirs("logs", exist_ok=True)
+            timings_file = os.path.join("logs", "timings.csv")
+            file_exists = os.path.isfile(timings_file)
+            with open(timings_file, "a", newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                if not file_exists:
+                    writer.writerow(["time", "crawler", "name", "seconds", "target"])
+                writer.writerow([time.strftime('%Y-%m-%d %H:%M:%S'), self.__class__.__name__,
+                                 name, f"{seconds:.3f}", target])
+        except Exception as e:
+            print(f"记录耗时指标时出错: {e}")
+    
+    def navigate(self, url):
+        """
+        访问URL并单独记录页面导航耗时和传输量
+        
+        参数:
+            url: 目标URL
+        """
+        nav_start = time.time()
+        try:
+            self.driver.get(url)
+            note_page(self.driver)
+        finally:
+            self.record_timing("navigation", time.time() - nav_start, url)
+        self.page_stats = measure_page(self.driver, self.platform_name, self.lean_mode)
+        print(f"[资源] {format_page_stats(self.page_stats, self.lean_mode)}")
+    
+    def start_network_capture(self, url_patterns):
+        """
+        开始收集评论接口的网络响应，需要在访问页面之前调用
+        
+        参数:
+            url_patterns: 评论接口URL的正则表达式列表
+        
+        返回:
+            NetworkCapture对象，未启用或浏览器不支持时返回None
+        """
+        self.network_capture = None
+        if not self.capture_mode:
+            return None
+        capture = NetworkCapture(self.driver, url_patterns)
+        if capture.start():
+            self.network_capture = capture
+        return self.network_capture
+    
+    def stop_network_capture(self):
+        """
+        结束网络抓取
+        
+        返回:
+            收集到的全部响应列表，元素为 {"url": ..., "data": ...}
+        """
+        capture, self.network_capture = self.network_capture, None
+        if capture is None:
+            return []
+        responses = capture.stop()
+        print(f"网络抓取共收集到 {len(responses)} 个评论接口响应")
+        return responses
+    
     def save_cookies(self, cookies_file):
         """
         保存cookies到文件
@@ -301,14 +460,45 @@ class BaseCrawler(ABC):
             time.sleep(5)
             return False
     
-    def scroll_to_bottom(self, max_scroll_count=500, scroll_pause_time=3, max_scroll_time=1800):
+    def probe_comment_selectors(self, selectors=None, scroll=False):
+        """
+        通过一次页面脚本调用统计所有评论选择器的匹配数量和页面高度
+        
+        参数:
+            selectors: CSS选择器列表，默认使用get_comment_selectors()
+            scroll: 统计完成后是否顺便滚动到页面底部
+        
+        返回:
+            字典 {"counts": {选择器: 匹配数量}, "height": 页面高度}，无效选择器的数量为-1
+        """
+        if selectors is None:
+            selectors = self.get_comment_selectors()
+        result = self.driver.execute_script(COMMENT_PROBE_SCRIPT, list(selectors), bool(scroll))
+        counts = {}
+        for selector, count in zip(selectors, result.get('counts', [])):
+            counts[selector] = count
+        return {"counts": counts, "height": result.get('height', 0)}
+    
+    def _first_matched_selector(self, probe):
+        """返回探测结果中第一个匹配到元素的选择器及数量，没有则返回(None, 0)"""
+        for selector, count in probe["counts"].items():
+            if count > 0:
+                return selector, count
+        return None, 0
+    
+    def scroll_to_bottom(self, max_scroll_count=500, scroll_pause_time=3, max_scroll_time=1800, target_count=None,
+                         no_growth_cycles=None):
         """
         滚动到页面底部以加载更多内容
         
+        每次滚动只发起一次页面脚本调用，同时完成评论检测、高度读取和下一次滚动
+        
         参数:
             max_scroll_count: 最大滚动次数
             scroll_pause_time: 每次滚动后等待时间
             max_scroll_time: 最大滚动时间（秒）
+            target_count: 目标评论数量，达到后立即停止滚动，None表示加载到列表结束
+            no_growth_cycles: 连续多少轮没有加载出新内容时停止，None使用默认值
         
         返回:
             是否检测到评论
@@ -321,91 +511,88 @@ class BaseCrawler(ABC):
         # 添加总体超时机制
         start_time = time.time()
         scroll_count = 0
+        comment_selectors = self.get_comment_selectors()
 
+        # 先尝试预滚动到评论区，加快加载过程
         try:
-            last_height = self.driver.execute_script("return document.body.scrollHeight")
+            print("尝试直接滚动到评论区位置...")
+            indicator = self.driver.execute_script(COMMENT_SECTION_SCROLL_SCRIPT, COMMENT_SECTION_INDICATORS)
+            if indicator:
+                print(f"已找到并滚动到评论区 (使用 {indicator})")
+                time.sleep(2)  # 等待评论区加载
         except NoSuchWindowException:
             print("浏览器意外关闭...")
             raise
-
-        # 先尝试预滚动到评论区，加快加载过程
-        try:
-            print("尝试直接滚动到评论区位置...")
-            # 尝试查找评论区标记并滚动到那里
-            comment_indicators = [
-                "//div[contains(@class, 'comment')]", 
-                "//h3[contains(text(), '评论')]",
-                "//div[@id='comment']", 
-                "//div[@id='comments')]",
-                "//div[contains(@class, 'review')]",
-                "//div[contains(@class, 'review-list')]",
-                "//div[contains(@class, 'list')]"
-            ]
-            
-            for indicator in comment_indicators:
-                try:
-                    comment_section = self.driver.find_elements(By.XPATH, indicator)
-                    if comment_section and len(comment_section) > 0:
-                        self.driver.execute_script("arguments[0].scrollIntoView(true);", comment_section[0])
-                        print(f"已找到并滚动到评论区 (使用 {indicator})")
-                        time.sleep(2)  # 等待评论区加载
-                        break
-                except Exception:
-                    continue
         except Exception as e:
             print(f"预滚动到评论区时出错: {e}")
 
+        # 读取初始高度并开始第一次滚动
+        try:
+            last_height = self.probe_comment_selectors(comment_selectors, scroll=True)["height"]
+            if self.mini_flag:
+                # 处理可能的迷你播放器
+                self.handle_mini_player()
+                self.mini_flag = False
+        except NoSuchWindowException:
+            print("浏览器意外关闭...")
+            raise
+
+        # 由页面内的自动滚动脚本完成整个滚动循环，减少Python与浏览器之间的往返
+        if self.auto_scroll:
+            try:
+                remaining_time = max_scroll_time - (time.time() - start_time)
+                return self._auto_scroll_to_bottom(comment_selectors, max_scroll_count, scroll_pause_time, remaining_time,
+                                                   target_count, no_growth_cycles)
+            except NoSuchWindowException:
+                print("页面向下滚动时，浏览器意外关闭...")
+                raise
+            except Exception as e:
+                print(f"页面内自动滚动出错，改用逐步滚动: {e}")
+
         while scroll_count < max_scroll_count:
             # 检查是否超时
             if time.time() - start_time > max_scroll_time:
                 print(f"已达到最大滚动时间限制({max_scroll_time}秒)，结束滚动")
                 break
-                
+            
+            time.sleep(scroll_pause_time)
+            
+            # 每次滚动都检测评论，并在同一次调用中继续向下滚动
+            self.report_progress("scroll", scroll_count / max_scroll_count,
+                                 f"滚动 {scroll_count + 1}/{max_scroll_count}，正在检测评论...")
             try:
-                self.driver.execute_script('javascript:void(0);')
+                probe = self.probe_comment_selectors(comment_selectors, scroll=True)
+            except NoSuchWindowException:
+                print("页面向下滚动时，浏览器意外关闭...")
+                raise
             except Exception as e:
                 print(f"检测页面状态时出错，尝试重新加载: {e}")
                 self.driver.refresh()
                 time.sleep(5)
                 print("页面已刷新，继续滚动...")
-                time.sleep(scroll_pause_time)
                 continue
-
-            try:
-                self.driver.execute_script("window.scrollTo(0, document.documentElement.scrollHeight);")
-                if self.mini_flag:
-                    # 处理可能的迷你播放器
-                    self.handle_mini_player()
-                    self.mini_flag = False
-            except NoSuchWindowException:
-                print("浏览器意外关闭...")
-                raise
-
-            # 每次滚动都尝试检测评论，增加成功率
-            print(f"滚动 {scroll_count + 1}/{max_scroll_count}，正在检测评论...")
             
-            # 尝试检测评论元素
-            comment_selectors = self.get_comment_selectors()
+            # 及时取回接口响应体，避免页面继续加载后被浏览器丢弃
+            if self.network_capture is not None:
+                self.network_capture.poll()
             
-            for selector in comment_selectors:
-                comment_elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                if comment_elements and len(comment_elements) > 0:
-                    print(f"已检测到评论加载! 使用选择器 '{selector}' 找到 {len(comment_elements)} 条评论")
-                    comments_detected = True
+            selector, count = self._first_matched_selector(probe)
+            if selector:
+                print(f"已检测到评论加载! 使用选择器 '{selector}' 找到 {count} 条评论")
+                comments_detected = True
+                if target_count is not None and count >= target_count:
+                    print(f"已达到目标评论数: {target_count}，停止滚动")
                     break
             
+            if comments_detected and self.end_marker_visible():
+                print("检测到列表结束标记，评论已全部加载")
+                break
+            
             if comments_detected:
                 print("成功检测到评论，继续滚动以确保加载更多评论...")
                 scroll_count += 1  # 继续滚动几次以确保加载更多评论
             
-            time.sleep(scroll_pause_time)
-            
-            try:
-                new_height = self.driver.execute_script("return document.documentElement.scrollHeight")
-            except NoSuchWindowException:
-                print("页面向下滚动时，浏览器意外关闭...")
-                raise
-
+            new_height = probe["height"]
             if new_height == last_height:
                 print("页面高度不再增加，可能已滚动到底部")
                 
@@ -416,12 +603,11 @@ class BaseCrawler(ABC):
                     time.sleep(scroll_pause_time * 2)  # 额外等待时间
                     
                     # 再次检查评论
-                    for selector in comment_selectors:
-                        comment_elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                        if comment_elements and len(comment_elements) > 0:
-                            print(f"在额外等待后检测到评论! 使用选择器 '{selector}'")
-                            comments_detected = True
-                            break
+                    probe = self.probe_comment_selectors(comment_selectors)
+                    selector, count = self._first_matched_selector(probe)
+                    if selector:
+                        print(f"在额外等待后检测到评论! 使用选择器 '{selector}'")
+                        comments_detected = True
                     
                     if not comments_detected:
                         print(f"额外等待后仍未检测到评论 (尝试 {comments_detection_attempts}/{MAX_COMMENTS_DETECTION_ATTEMPTS})")
@@ -462,6 +648,72 @@ class BaseCrawler(ABC):
         # 不管是否检测到评论，都继续处理
         return comments_detected
     
+    def get_end_markers(self):
+        """
+        获取评论列表结束标记，滚动时出现这些标记即停止
+        
+        返回:
+            列表，元素为 (CSS选择器, 文本)，默认为空
+        """
+        return []
+    
+    def end_marker_visible(self):
+        """检查页面中是否出现了评论列表结束标记"""
+        markers = self.get_end_markers()
+        if not markers:
+            return False
+        try:
+            return bool(self.driver.execute_script(END_MARKER_SCRIPT, [list(marker) for marker in markers]))
+        except Exception:
+            return False
+    
+    def get_load_more_selectors(self):
+        """
+        获取"加载更多"按钮的CSS选择器，自动滚动时会点击这些按钮
+        
+        返回:
+            CSS选择器列表，默认为空
+        """
+        return []
+    
+    def _auto_scroll_to_bottom(self, comment_selectors, max_scroll_count, scroll_pause_time, max_scroll_time,
+                               target_count=None, no_growth_cycles=None):
+        """
+        使用页面内的自动滚动脚本加载评论，每段结束时输出进度并收集网络抓取的响应
+        
+        参数:
+            comment_selectors: 评论元素的CSS选择器列表
+            max_scroll_count: 最大滚动次数
+            scroll_pause_time: 每次滚动后等待时间
+            max_scroll_time: 最大滚动时间（秒）
+            target_count: 目标评论数量，None表示不限制
+            no_growth_cycles: 连续多少轮没有加载出新内容时停止，None使用默认值
+        
+        返回:
+            是否检测到评论
+        """
+        def on_progress(state):
+            # 及时取回接口响应体，避免页面继续加载后被浏览器丢弃
+            if self.network_capture is not None:
+                self.network_capture.poll()
+            self.report_progress("scroll", min(1, state.get('cycles', 0) / max(1, max_scroll_count)),
+                                 f"下滑滚动第{state.get('cycles', 0)}次 / 最大滚动{max_scroll_count}次，"
+                                 f"检测到 {state.get('count', 0)} 条评论 (选择器: {state.get('selector')})")
+        
+        scroller = AutoScroller(
+            self.driver, comment_selectors, target=target_count,
+            no_growth_cycles=no_growth_cycles or DEFAULT_NO_GROWTH_CYCLES, pause=scroll_pause_time,
+            timeout=max_scroll_time, max_cycles=max_scroll_count, load_more_selectors=self.get_load_more_selectors(),
+            end_markers=self.get_end_markers()
+        )
+        state = scroller.run(on_progress)
+        comments_detected = state.get("count", 0) > 0
+        if comments_detected:
+            print(f"已成功检测到评论加载！使用选择器 '{state.get('selector')}' 找到 {state['count']} 条评论")
+        else:
+            print("警告：滚动完成但未检测到评论")
+        return comments_detected
+    
     def handle_mini_player(self):
         """处理迷你播放器，针对不同网站可重写此方法"""
         pass
@@ -487,44 +739,34 @@ class BaseCrawler(ABC):
         pass
     
     def cleanup(self):
-        """清理资源，关闭浏览器和清理临时文件"""
+        """清理资源，把浏览器归还到共享池（配置目录的清理在后台进行）"""
         try:
-            print("正在关闭浏览器...")
-            self.driver.quit()
-            print("浏览器已关闭")
+            if self.external_driver or self._driver is None:
+                # 外部提供的浏览器由调用方关闭，未启动浏览器时无需清理
+                return
+            if self.temp_dir is None:
+                print("正在归还浏览器到共享池...")
+                release_driver(self.driver)
+                print("浏览器已归还")
+            else:
+                print("正在关闭浏览器...")
+                self.driver.quit()
+                print("浏览器已关闭")
+                if os.path.exists(self.temp_dir):
+                    print(f"后台清理临时文件夹 {self.temp_dir}...")
+                    self.profile_pool.discard(self.temp_dir)
         except Exception as e:
             print(f"关闭浏览器时出错: {e}")
+    
+    @classmethod
+    def prepare_urls(cls, urls):
+        """
+        在开始爬取前批量预处理URL列表（如解析短链接），返回与输入一一对应的URL列表
         
-        # 等待更长时间确保浏览器进程完全退出
-        print("等待完成，准备清理临时文件...")
-        time.sleep(10)
-        
-        # 清理临时文件夹
-        try:
-            print(f"尝试清理临时文件夹 {self.temp_dir}...")
-            if os.path.exists(self.temp_dir):
-                # 尝试多次删除临时文件夹
-                for attempt in range(3):
-                    try:
-                        shutil.rmtree(self.temp_dir, ignore_errors=True)
-                        if not os.path.exists(self.temp_dir):
-                            print("临时文件夹清理完成")
-                            break
-                        else:
-                            print(f"清理临时文件夹尝试 {attempt+1}/3 失败，等待后重试...")
-                            time.sleep(3)
-                    except Exception as e:
-                        print(f"清理临时文件夹尝试 {attempt+1}/3 出错: {e}")
-                        time.sleep(3)
-                
-                # 如果仍然存在，提示用户手动删除
-                if os.path.exists(self.temp_dir):
-                    print(f"无法自动清理临时文件夹，您可以手动删除: {self.temp_dir}")
-            else:
-                print("临时文件夹不存在，无需清理")
-        except Exception as e:
-            print(f"清理临时文件夹时出错: {e}")
-            print(f"您可以手动删除临时文件夹: {self.temp_dir}")
+        参数:
+            urls: URL列表
+        """
+        return urls
     
     def run(self, url_list_file='game_list.txt'):
         """
@@ -539,12 +781,13 @@ class BaseCrawler(ABC):
                 print(f"错误：未找到URL列表文件 '{url_list_file}'")
                 print(f"请创建一个名为'{url_list_file}'的文件，每行包含一个URL")
                 self.reset_progress()
-                self.driver.quit()
+                self.cleanup()
                 sys.exit(1)
             
             print(f"正在读取{url_list_file}文件...")
             with open(url_list_file, 'r', encoding='utf-8') as f:
                 urls = f.read().splitlines()
+            urls = self.prepare_urls(urls)
             
             print(f"成功读取 {len(urls)} 个URL")
             for i, url in enumerate(urls):
@@ -579,10 +822,257 @@ class BaseCrawler(ABC):
             # 确保资源被清理
             self.cleanup()
 
+    @classmethod
+    def run_parallel(cls, url_list_file='game_list.txt', workers=3, use_headless=True,
+                     per_host_limit=DEFAULT_PER_HOST_LIMIT, lean_mode=False, crawler_kwargs=None):
+        """
+        并行运行爬虫：启动多个工作进程，每个进程持有一个浏览器，从URL列表中领取任务
+        
+        参数:
+            url_list_file: URL列表文件路径
+            workers: 工作进程数量
+            use_headless: 是否使用无头模式
+            per_host_limit: 同一站点同时进行的最大任务数
+            lean_mode: 是否启用精简加载模式
+            crawler_kwargs: 传给爬虫构造函数的其他参数（如max_comments）
+        
+        返回:
+            统计字典 {"done": 成功数, "failed": 失败数}
+        """
+        if not os.path.exists(url_list_file):
+            print(f"错误：未找到URL列表文件 '{url_list_file}'")
+            print(f"请创建一个名为'{url_list_file}'的文件，每行包含一个URL")
+            sys.exit(1)
+        
+        with open(url_list_file, 'r', encoding='utf-8') as f:
+            urls = [line.strip() for line in f.read().splitlines() if line.strip()]
+        urls = cls.prepare_urls(urls)
+        
+        workers = max(1, min(workers, len(urls)))
+        print(f"成功读取 {len(urls)} 个URL，启动 {workers} 个并行工作进程 (每个站点最多 {per_host_limit} 个并发)")
+        
+        # 使用spawn方式创建进程，避免复制父进程中的浏览器连接
+        ctx = multiprocessing.get_context('spawn')
+        task_queue = ctx.Queue()
+        status_queue = ctx.Queue()
+        writer_lock = ctx.Lock()
+        host_semaphores = {}
+        for url in urls:
+            host = _url_host(url)
+            if host not in host_semaphores:
+                host_semaphores[host] = ctx.BoundedSemaphore(per_host_limit)
+        
+        for index, url in enumerate(urls):
+            task_queue.put((index, url))
+        for _ in range(workers):
+            task_queue.put(None)
+        
+        processes = []
+        for worker_id in range(1, workers + 1):
+            process = ctx.Process(
+                target=_parallel_worker,
+                args=(cls, worker_id, use_headless, task_queue, status_queue, host_semaphores, writer_lock,
+                      lean_mode, crawler_kwargs),
+                name=f"crawler-worker-{worker_id}"
+            )
+            process.start()
+            processes.append(process)
+        
+        # 汇总各工作进程上报的进度
+        stats = {"done": 0, "failed": 0}
+        worker_done = {worker_id: 0 for worker_id in range(1, workers + 1)}
+        exited = 0
+        start_time = time.time()
+        while exited < workers:
+            try:
+                worker_id, event, index, detail = status_queue.get(timeout=5)
+            except queue.Empty:
+                if not any(process.is_alive() for process in processes):
+                    break
+                continue
+            
+            if event == "start":
+                print(f"[工作进程 {worker_id}] 开始处理第 {index + 1}/{len(urls)} 个URL: {detail}")
+            elif event == "done":
+                stats["done"] += 1
+                worker_done[worker_id] += 1
+                finished = stats["done"] + stats["failed"]
+                print(f"[工作进程 {worker_id}] 完成第 {index + 1} 个URL，用时 {detail:.1f} 秒 "
+                      f"(总进度 {finished}/{len(urls)}，该进程已完成 {worker_done[worker_id]} 个)")
+            elif event == "error":
+                stats["failed"] += 1
+                print(f"[工作进程 {worker_id}] 处理第 {index + 1} 个URL失败: {detail}")
+            elif event == "fatal":
+                print(f"[工作进程 {worker_id}] 异常退出: {detail}")
+            elif event == "exit":
+                exited += 1
+        
+        for process in processes:
+            process.join()
+        
+        elapsed = time.time() - start_time
+        print(f"所有URL处理完成！成功 {stats['done']} 个，失败 {stats['failed']} 个，总用时 {elapsed:.1f} 秒")
+        return stats
+
+    @classmethod
+    def run_in_contexts(cls, url_list_file='game_list.txt', contexts=3, use_headless=True, lean_mode=False,
+                        crawler_kwargs=None):
+        """
+        在同一个浏览器进程中并行运行爬虫：每个任务线程使用一个隔离的浏览器上下文
+        （cookies和缓存互不影响），相比每个任务一个浏览器进程可以大幅减少内存占用
+        
+        参数:
+            url_list_file: URL列表文件路径
+            contexts: 隔离上下文（并行任务）数量
+            use_headless: 是否使用无头模式
+            lean_mode: 是否启用精简加载模式
+            crawler_kwargs: 传给爬虫构造函数的其他参数（如max_comments）
+        
+        返回:
+            统计字典 {"done": 成功数, "failed": 失败数}
+        """
+        if not os.path.exists(url_list_file):
+            print(f"错误：未找到URL列表文件 '{url_list_file}'")
+            print(f"请创建一个名为'{url_list_file}'的文件，每行包含一个URL")
+            sys.exit(1)
+        
+        with open(url_list_file, 'r', encoding='utf-8') as f:
+            urls = [line.strip() for line in f.read().splitlines() if line.strip()]
+        urls = cls.prepare_urls(urls)
+        
+        contexts = max(1, min(contexts, len(urls)))
+        print(f"成功读取 {len(urls)} 个URL，在同一个浏览器中创建 {contexts} 个隔离上下文并行处理")
+        
+        task_queue = queue.Queue()
+        for index, url in enumerate(urls):
+            task_queue.put((index, url))
+        
+        stats = {"done": 0, "failed": 0}
+        stats_lock = threading.Lock()
+        writer_lock = threading.Lock()
+        start_time = time.time()
+        
+        driver = lease_driver("chrome", use_headless)
+        scheduler = ContextScheduler(driver)
+        try:
+            browser_contexts = [scheduler.create_context(f"上下文{i}") for i in range(1, contexts + 1)]
+            
+            def job(context):
+                # 性能日志由整个会话共享，无法区分来自哪个上下文，因此不使用网络抓取
+                crawler = cls(use_headless=use_headless, lean_mode=lean_mode, capture_mode=False, driver=driver,
+                              **(crawler_kwargs or {}))
+                crawler.progress_file = os.path.join("logs", f"progress_{context.name}.txt")
+                crawler.reset_progress()
+                if getattr(crawler, "data_writer", None) is not None:
+                    crawler.data_writer.lock = writer_lock
+                
+                while True:
+                    try:
+                        index, url = task_queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    print(f"[{context.name}] 开始处理第 {index + 1}/{len(urls)} 个URL: {url}")
+                    task_start = time.time()
+                    try:
+                        crawler.progress["game_count"] = index
+                        crawler.progress["first_comment_index"] = 0
+                        crawler.extract_comments(url)
+                        with stats_lock:
+                            stats["done"] += 1
+                        print(f"[{context.name}] 完成第 {index + 1} 个URL，用时 {time.time() - task_start:.1f} 秒")
+                    except Exception as e:
+                        crawler.write_error_log(f"处理URL时发生错误: {str(e)}")
+                        with stats_lock:
+                            stats["failed"] += 1
+                        print(f"[{context.name}] 处理第 {index + 1} 个URL失败: {e}")
+            
+            scheduler.run_jobs([(context, job) for context in browser_contexts])
+            
+            print("内存占用（每个上下文 / 整个浏览器进程）:")
+            print(format_memory_report(scheduler.memory_report()))
+        finally:
+            scheduler.detach()
+            release_driver(driver)
+        
+        elapsed = time.time() - start_time
+        print(f"所有URL处理完成！成功 {stats['done']} 个，失败 {stats['failed']} 个，总用时 {elapsed:.1f} 秒")
+        return stats
+
+def _url_host(url):
+    """获取URL的站点名，用于按站点限制并发"""
+    url = url.strip()
+    if "://" not in url:
+        url = "https://" + url.lstrip('/')
+    return urllib.parse.urlparse(url).netloc.lower() or "default"
+
+def _parallel_worker(crawler_cls, worker_id, use_headless, task_queue, status_queue, host_semaphores, writer_lock,
+                     lean_mode=False, crawler_kwargs=None):
+    """
+    并行模式的工作进程：持有一个浏览器，循环领取URL并爬取
+    
+    参数:
+        crawler_cls: 爬虫类
+        worker_id: 工作进程编号
+        use_headless: 是否使用无头模式
+        task_queue: 任务队列，元素为(序号, URL)，None表示结束
+        status_queue: 进度上报队列
+        host_semaphores: 站点名到信号量的映射，用于限制同站点并发
+        writer_lock: 跨进程的写入锁，保证数据行不会交错写入
+        lean_mode: 是否启用精简加载模式
+        crawler_kwargs: 传给爬虫构造函数的其他参数
+    """
+    # 每个工作进程使用独立的进度文件，避免相互覆盖
+    crawler_cls.progress_file = os.path.join("logs", f"progress_worker_{worker_id}.txt")
+    crawler = None
+    try:
+        crawler = crawler_cls(use_headless=use_headless, lean_mode=lean_mode, **(crawler_kwargs or {}))
+        crawler.reset_progress()
+        if getattr(crawler, "data_writer", None) is not None:
+            crawler.data_writer.lock = writer_lock
+        
+        while True:
+            task = task_queue.get()
+            if task is None:
+                break
+            index, url = task
+            semaphore = host_semaphores.get(_url_host(url))
+            status_queue.put((worker_id, "start", index, url))
+            if semaphore is not None:
+                semaphore.acquire()
+            task_start = time.time()
+            try:
+                # 使用URL在列表中的位置作为编号，保持日志与单进程模式一致
+                crawler.progress["game_count"] = index
+                crawler.progress["first_comment_index"] = 0
+                crawler.extract_comments(url)
+                status_queue.put((worker_id, "done", index, time.time() - task_start))
+            except Exception as e:
+                error_message = f"处理URL时发生错误: {str(e)}"
+                crawler.write_error_log(error_message)
+                status_queue.put((worker_id, "error", index, str(e)))
+            finally:
+                if semaphore is not None:
+                    semaphore.release()
+    except (Exception, SystemExit) as e:
+        status_queue.put((worker_id, "fatal", None, str(e)))
+    finally:
+        if crawler is not None:
+            crawler.cleanup()
+            get_driver_pool().shutdown()
+            crawler.profile_pool.wait_for_cleanup()
+        status_queue.put((worker_id, "exit", None, None))
+
 # 数据写入器接口
 class DataWriter(ABC):
     """数据写入器抽象基类"""
     
+    # 可选的写入锁（如多进程锁），设置后每次写入都在锁内完成，避免数据行交错
+    lock = None
+    
+    def _locked(self):
+        """返回写入时使用的锁上下文"""
+        return self.lock if self.lock is not None else contextlib.nullcontext()
+    
     @abstractmethod
     def write(self, data, filename):
         """
@@ -597,6 +1087,36 @@ class DataWriter(ABC):
 class CsvWriter(DataWriter):
     """CSV数据写入器"""
     
+    def _prepare_header(self, filename, fieldnames):
+        """
+        检查已有CSV文件的标题行，新数据带有新的列（或文件为空）时重写文件的标题行（已有数据行的新列留空）
+        
+        参数:
+            filename: 已存在的CSV文件名
+            fieldnames: 新数据的列名
+        
+        返回:
+            写入新数据时使用的列名（与文件中的列顺序一致）
+        """
+        with open(filename, 'r', newline='', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            header = list(reader.fieldnames or [])
+            new_columns = [name for name in fieldnames if name not in header]
+            if header and not new_columns:
+                return header
+            rows = list(reader)
+        
+        merged = header + new_columns
+        if header:
+            print(f"CSV文件 {filename} 的标题行缺少列 {new_columns}，重写标题行")
+        temp_filename = filename + ".tmp"
+        with open(temp_filename, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=merged, restval='')
+            writer.writeheader()
+            writer.writerows(rows)
+        os.replace(temp_filename, filename)
+        return merged
+    
     def write(self, data, filename):
         """
         写入数据到CSV文件
@@ -605,90 +1125,95 @@ class CsvWriter(DataWriter):
             data: 要写入的数据行（字典列表）
             filename: CSV文件名
         """
-        file_exists = os.path.isfile(filename)
-        max_retries = 50
-        retries = 0
+        with self._locked():
+            file_exists = os.path.isfile(filename)
+            max_retries = 50
+            retries = 0
 
-        while retries < max_retries:
-            try:
-                mode = 'a' if file_exists else 'w'
-                with open(filename, mode, newline='', encoding='utf-8') as f:
-                    if data:
-                        fieldnames = data[0].keys()
-                        writer = csv.DictWriter(f, fieldnames=fieldnames)
-                        if not file_exists:
-                            writer.writeheader()
-                        for row in data:
-                            writer.writerow(row)
-                break
-            except PermissionError as e:
-                retries += 1
-                print(f"将爬取到的数据写入CSV时，遇到权限错误Permission denied，文件可能被占用或无写入权限: {e}")
-                print(f"等待10s后重试，将会重试50次... (尝试 {retries}/{max_retries})")
-                time.sleep(10)  # 等待10秒后重试
-        else:
-            print("将爬取到的数据写入CSV时遇到权限错误，且已达到最大重试次数50次，退出程序")
-            sys.exit(1)
+            while retries < max_retries:
+                try:
+                    mode = 'a' if file_exists else 'w'
+                    fieldnames = list(data[0].keys()) if data else []
+                    if file_exists and data:
+                        # 追加时按文件已有的列顺序写入，列不一致时先更新标题行，避免列错位
+                        fieldnames = self._prepare_header(filename, fieldnames)
+                    with open(filename, mode, newline='', encoding='utf-8') as f:
+                        if data:
+                            writer = csv.DictWriter(f, fieldnames=fieldnames, restval='')
+                            if not file_exists:
+                                writer.writeheader()
+                            for row in data:
+                                writer.writerow(row)
+                    break
+                except PermissionError as e:
+                    retries += 1
+                    print(f"将爬取到的数据写入CSV时，遇到权限错误Permission denied，文件可能被占用或无写入权限: {e}")
+                    print(f"等待10s后重试，将会重试50次... (尝试 {retries}/{max_retries})")
+                    time.sleep(10)  # 等待10秒后重试
+            else:
+                print("将爬取到的数据写入CSV时遇到权限错误，且已达到最大重试次数50次，退出程序")
+                sys.exit(1)
 
 class ExcelWriter(DataWriter):
     """使用CSV写入数据（原Excel格式改为CSV）"""
     
     def write(self, data, filename):
         """将数据写入文件，如果文件存在则追加，否则创建新文件"""
-        # 将Excel文件名改为CSV
-        filename = filename.replace('.xlsx', '.csv')
-        file_exists = os.path.isfile(filename)
-        max_retries = 50
-        retries = 0
+        with self._locked():
+            # 将Excel文件名改为CSV
+            filename = filename.replace('.xlsx', '.csv')
+            file_exists = os.path.isfile(filename)
+            max_retries = 50
+            retries = 0
 
-        while retries < max_retries:
-            try:
-                if file_exists:
-                    # 如果文件存在，读取现有数据并追加
-                    try:
-                        # 读取现有的CSV文件
-                        existing_data = []
-                        with open(filename, 'r', encoding='utf-8', newline='') as f:
-                            reader = csv.DictReader(f)
-                            for row in reader:
-                                existing_data.append(row)
+            while retries < max_retries:
+                try:
+                    if file_exists:
+                        # 如果文件存在，读取现有数据并追加
+                        try:
+                            # 读取现有的CSV文件
+                            existing_data = []
+                            with open(filename, 'r', encoding='utf-8', newline='') as f:
+                                reader = csv.DictReader(f)
+                                for row in reader:
+                                    existing_data.append(row)
                         
-                        # 合并现有数据和新数据
-                        combined_data = existing_data + data
+                            # 合并现有数据和新数据
+                            combined_data = existing_data + data
                         
-                        # 保存合并后的数据
-                        if combined_data:
-                            fieldnames = combined_data[0].keys()
-                            with open(filename, 'w', encoding='utf-8', newline='') as f:
-                                writer = csv.DictWriter(f, fieldnames=fieldnames)
-                                writer.writeheader()
-                                writer.writerows(combined_data)
-                    except Exception as e:
-                        print(f"读取或更新CSV文件时出错: {e}")
-                        # 如果读取失败，创建新文件
+                            # 保存合并后的数据
+                            if combined_data:
+                                fieldnames = combined_data[0].keys()
+                                with open(filename, 'w', encoding='utf-8', newline='') as f:
+                                    writer = csv.DictWriter(f, fieldnames=fieldnames)
+                                    writer.writeheader()
+                                    writer.writerows(combined_data)
+                        except Exception as e:
+                            print(f"读取或更新CSV文件时出错: {e}")
+                            # 如果读取失败，创建新文件
+                            if data:
+                                fieldnames = data[0].keys()
+                                with open(filename, 'w', encoding='utf-8', newline='') as f:
+                                    writer = csv.DictWriter(f, fieldnames=fieldnames)
+                                    writer.writeheader()
+                                    writer.writerows(data)
+                    else:
+                        # 如果文件不存在，创建新文件
                         if data:
                             fieldnames = data[0].keys()
                             with open(filename, 'w', encoding='utf-8', newline='') as f:
                                 writer = csv.DictWriter(f, fieldnames=fieldnames)
                                 writer.writeheader()
                                 writer.writerows(data)
-                else:
-                    # 如果文件不存在，创建新文件
-                    if data:
-                        fieldnames = data[0].keys()
-                        with open(filename, 'w', encoding='utf-8', newline='') as f:
-                            writer = csv.DictWriter(f, fieldnames=fieldnames)
-                            writer.writeheader()
-                            writer.writerows(data)
-                break  # 如果成功写入，跳出循环
-            except PermissionError as e:
-                retries += 1
-                print(f"将爬取到的数据写入CSV时，遇到权限错误Permission denied，文件可能被占用或无写入权限: {e}")
-                print(f"等待10s后重试，将会重试50次... (尝试 {retries}/{max_retries})")
-                time.sleep(10)  # 等待10秒后重试
-        else:
-            print("将爬取到的数据写入CSV时遇到权限错误，且已达到最大重试次数50次，退出程序")
-            sys.exit(1)
+                    break  # 如果成功写入，跳出循环
+                except PermissionError as e:
+                    retries += 1
+                    print(f"将爬取到的数据写入CSV时，遇到权限错误Permission denied，文件可能被占用或无写入权限: {e}")
+                    print(f"等待10s后重试，将会重试50次... (尝试 {retries}/{max_retries})")
+                    time.sleep(10)  # 等待10秒后重试
+            else:
+                print("将爬取到的数据写入CSV时遇到权限错误，且已达到最大重试次数50次，退出程序")
+                sys.exit(1)
 
 # 辅助函数
 def ask_yes_no_question(question):
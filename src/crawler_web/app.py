@@ -18,7 +18,7 @@ import threading
 import importlib.util
 import subprocess
 from pathlib import Path
-from flask import Flask, render_template, request, jsonify, redirect, url_for, send_file
+from flask import Flask, render_template, request, jsonify, redirect, url_for, send_file, Response, stream_with_context
 from werkzeug.serving import make_server
 
 # 添加项目根目录到系统路径，确保能够导入自定义模块
@@ -47,12 +47,18 @@ try:
 except ImportError:
     print("警告：无法导入steam_simple_crawler模块，部分功能可能不可用")
 
+from driver_pool import get_driver_pool, release_driver
+from crawler_web.event_stream import EventBroker, RecordPublisher, format_sse
+from crawler_web.jobs import JobScheduler
+from output_index import get_output_index
+
 from flask.logging import default_handler
 
 class RequestFilter(logging.Filter):
     def filter(self, record):
         """过滤掉对/api/status的请求日志"""
-        return 'GET /api/status' not in record.getMessage()
+        message = record.getMessage()
+        return 'GET /api/status' not in message and 'GET /api/stream' not in message
 
 # 应用过滤器到默认处理器
 default_handler.addFilter(RequestFilter())
@@ -85,14 +91,35 @@ def read_csv_file(file_path, encoding='utf-8-sig'):
 # 创建Flask应用
 app = Flask(__name__)
 
-# 爬虫任务状态
-crawler_status = {
-    "running": False,
-    "progress": 0,
-    "log": [],
-    "type": None,
-    "browser": BROWSER_TYPE  # 添加浏览器类型到状态中
-}
+# 爬取进度的事件流，所有打开的页面通过/api/stream订阅
+event_broker = EventBroker()
+
+
+def publish_log(job, seq, line):
+    """任务日志每追加一行，推送给订阅该任务的页面（序号作为事件ID，断线重连时从这里继续）"""
+    event_broker.publish("log", {"job_id": job.id, "seq": seq, "line": line}, event_id=seq, job_id=job.id)
+
+
+def publish_status(status):
+    """任务进度或状态变化时推送给订阅该任务的页面"""
+    event_broker.publish("status", dict(status.snapshot(), browser=BROWSER_TYPE), job_id=status["job_id"])
+
+
+# 爬虫任务队列，同时运行的任务数由CRAWLER_MAX_JOBS环境变量设置（默认与浏览器池保留的实例数相同）
+job_scheduler = JobScheduler(lambda job: run_crawler(job), status_listener=publish_status, log_listener=publish_log)
+
+
+def find_job(job_id=None):
+    """按ID查找任务，未指定ID时返回最近提交的任务"""
+    return job_scheduler.get(job_id) if job_id else job_scheduler.latest()
+
+
+def job_state(job, since=None):
+    """任务状态和日志，没有任务时返回空闲状态"""
+    if job is None:
+        return {"job_id": None, "state": None, "running": False, "progress": 0, "type": None,
+                "browser": BROWSER_TYPE, "log": [], "next": 0, "skipped": 0}
+    return dict(job.to_dict(since), browser=BROWSER_TYPE)
 
 # 年龄验证任务状态
 age_verification_status = {
@@ -121,8 +148,98 @@ def no_access_log(func):
 @app.route('/api/status')
 @no_access_log
 def get_status():
-    """获取爬虫状态"""
-    return jsonify(crawler_status)
+    """获取爬虫任务状态（job参数指定任务，默认最近提交的任务）
+    
+    带上since参数（上次返回的next）时只返回之后新增的日志行，否则返回缓冲区中的全部日志
+    """
+    job = find_job(request.args.get('job'))
+    since = request.args.get('since', type=int)
+    return jsonify(job_state(job, since if since is not None else 0))
+
+@app.route('/api/jobs')
+def list_jobs():
+    """全部任务的状态（不含日志），最新提交的在前"""
+    jobs = [job_state(job) for job in job_scheduler.jobs()]
+    return jsonify({"jobs": jobs, "running": job_scheduler.running_count(), "queued": job_scheduler.queued_count(),
+                    "max_jobs": job_scheduler.max_workers})
+
+@app.route('/api/jobs/<job_id>')
+def get_job(job_id):
+    """单个任务的状态，带上since参数时附带之后新增的日志"""
+    job = job_scheduler.get(job_id)
+    if job is None:
+        return jsonify({"success": False, "message": f"任务 {job_id} 不存在"}), 404
+    return jsonify(job_state(job, request.args.get('since', type=int)))
+
+@app.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """取消任务：排队中的任务不再执行，运行中的任务在当前步骤完成后停止"""
+    if job_scheduler.get(job_id) is None:
+        return jsonify({"success": False, "message": f"任务 {job_id} 不存在"}), 404
+    if not job_scheduler.cancel(job_id):
+        return jsonify({"success": False, "message": "任务已经结束"})
+    return jsonify({"success": True, "job": job_state(job_scheduler.get(job_id))})
+
+@app.route('/api/stream')
+def stream_status():
+    """以Server-Sent Events推送一个任务的进度和日志（job参数指定任务，默认最近提交的任务）
+    
+    连接时先发送当前状态和since（或Last-Event-ID）之后的日志，之后实时推送：
+      - status: 进度或运行状态变化
+      - log: 新的日志行（事件ID为日志序号）
+      - records: 新爬取的记录（需要records=1参数）
+    客户端太慢导致事件被丢弃时，根据日志缓冲区补发丢失的日志。
+    """
+    job = find_job(request.args.get('job'))
+    if job is None:
+        return jsonify({"success": False, "message": "没有爬虫任务"}), 404
+    since = request.args.get('since', type=int)
+    last_event_id = request.headers.get('Last-Event-ID', '')
+    if last_event_id.isdigit():
+        since = int(last_event_id) + 1
+    events = ["log", "status"]
+    if request.args.get('records') == '1':
+        events.append("records")
+    # 先订阅再读取快照，两者之间产生的日志可能重复，按序号去重
+    subscriber = event_broker.subscribe(events, job_id=job.id)
+    
+    def catch_up(next_seq):
+        # 状态放在日志之后，客户端收到"已结束"的状态时已经收到了全部日志
+        log = job.log.since(next_seq)
+        first = log["next"] - len(log["lines"])
+        messages = [format_sse("log", {"job_id": job.id, "seq": first + i, "line": line}, event_id=first + i)
+                    for i, line in enumerate(log["lines"])]
+        messages.append(format_sse("status", dict(job_state(job), skipped=log["skipped"])))
+        return messages, log["next"]
+    
+    def generate():
+        try:
+            messages, next_seq = catch_up(since)
+            yield "retry: 3000\n\n" + "".join(messages)
+            while True:
+                item = subscriber.get()
+                if subscriber.dropped:
+                    # 队列曾经满过，丢弃积压的事件，从日志缓冲区补发
+                    subscriber.dropped = 0
+                    while subscriber.get(timeout=0) is not None:
+                        pass
+                    messages, next_seq = catch_up(next_seq)
+                    yield "".join(messages)
+                    continue
+                if item is None:
+                    yield ": keepalive\n\n"
+                    continue
+                event, event_id, message = item
+                if event == "log":
+                    if event_id < next_seq:
+                        continue
+                    next_seq = event_id + 1
+                yield message
+        finally:
+            event_broker.unsubscribe(subscriber)
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 @app.route('/api/age_verification_status')
 def get_age_verification_status():
@@ -179,8 +296,10 @@ def run_age_verification(game_id, use_headless=True):
         
         age_verification_status["log"].append(f"开始处理游戏ID: {game_id}的年龄验证...")
         
-        # 使用年龄验证模块处理
-        result = age_verification.handle_age_verification_for_game(game_id, use_headless=use_headless, browser_type=BROWSER_TYPE)
+        # 使用年龄验证模块处理，浏览器从共享池租用，完成后归还
+        result, driver = age_verification.handle_age_verification_for_game(game_id, use_headless=use_headless, browser_type=BROWSER_TYPE)
+        if driver:
+            release_driver(driver)
         
         if result:
             age_verification_status["log"].append("年龄验证处理成功")
@@ -197,17 +316,13 @@ def run_age_verification(game_id, use_headless=True):
 
 @app.route('/api/start', methods=['POST'])
 def start_crawler():
-    """启动爬虫"""
-    global crawler_status
-    
-    if crawler_status["running"]:
-        return jsonify({"success": False, "message": "爬虫已在运行中"})
-    
+    """提交爬虫任务，返回任务ID（任务进入队列，有空闲的工作线程时开始运行）"""
     data = request.get_json()
     crawler_type = data.get('type')
     url = data.get('url', '')
     use_headless = data.get('headless', True)  # 获取无头模式设置，默认为True
     max_reviews = data.get('max_reviews', None)  # 获取最大评论数，默认为None（全部爬取）
+    lean_mode = data.get('lean', False)  # 精简加载模式，不加载图片、字体、音视频和统计脚本
     
     # 调试信息 - 输出接收到的参数
     print(f"DEBUG - API接收到的参数: type={crawler_type}, url={url}, headless={use_headless}, max_reviews={max_reviews}")
@@ -220,133 +335,69 @@ def start_crawler():
     if not url:
         return jsonify({"success": False, "message": "请输入有效的URL或ID"})
     
-    # 重置爬虫状态
-    crawler_status = {
-        "running": True,
-        "progress": 0,
-        "log": [f"正在准备{crawler_type}爬虫... (使用 {BROWSER_TYPE.upper()} 浏览器)"],
-        "type": crawler_type,
-        "browser": BROWSER_TYPE  # 添加浏览器类型
-    }
+    job = job_scheduler.submit(crawler_type, {
+        "url": url,
+        "headless": use_headless,
+        "max_reviews": max_reviews,
+        "lean": lean_mode
+    })
     
-    # 启动爬虫线程
-    thread = threading.Thread(target=run_crawler, args=(crawler_type, url, use_headless, max_reviews))
-    thread.daemon = True
-    thread.start()
-    
-    return jsonify({"success": True})
+    return jsonify({"success": True, "job_id": job.id, "since": 0, "state": job.state})
 
 # 添加查看评论数据的路由
 @app.route('/comments')
 def list_comments():
     """查看已爬取的评论列表"""
-    # 获取output目录下的所有CSV和JSON文件
-    csv_files = glob.glob(os.path.join('output', '*.csv'))
+    # 从输出目录索引读取文件信息，只有修改过的文件才会被重新统计
+    output_index = get_output_index()
+    output_index.refresh()
     
-    # 查找JSON评论文件（Steam评论通常保存为JSON格式）
-    json_files = []
-    for root, dirs, files in os.walk('output'):
-        for file in files:
-            if file.endswith('.json'):
-                json_files.append(os.path.join(root, file))
-    
-    # 组合所有文件并排序
-    all_files = csv_files + json_files
-    all_files.sort(key=os.path.getmtime, reverse=True)  # 按修改时间排序
-    
-    files_data = []
+    files_data = []  # (修改时间, 文件信息)
     
     # 处理CSV文件
-    for file_path in csv_files:
-        filename = os.path.basename(file_path)
-        file_size = os.path.getsize(file_path) / 1024  # KB
-        modified_time = time.ctime(os.path.getmtime(file_path))
-        
-        # 检查是否是Steam评论CSV文件
-        is_steam_comment = False
-        app_id = None
-        comment_count = 0
+    for entry in output_index.csv_files():
+        file_size = entry['size'] / 1024  # KB
+        modified_time = time.ctime(entry['mtime'])
+        filename = os.path.basename(entry['path'])
         
-        if "评论_" in filename:
-            try:
-                # 尝试读取CSV文件，获取评论数量
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    # 跳过标题行
-                    next(f)
-                    # 计算行数
-                    comment_count = sum(1 for _ in f)
-                
-                # 从文件名中提取app_id
-                app_id_match = re.search(r'评论_(\d+)\.csv$', filename)
-                if app_id_match:
-                    app_id = app_id_match.group(1)
-                    is_steam_comment = True
-            except Exception as e:
-                print(f"读取CSV文件出错: {e}")
-        
-        if is_steam_comment and app_id:
+        if entry['kind'] == 'csv_steam':
             # 这是Steam评论CSV文件
-            game_title = filename.replace(f"_评论_{app_id}.csv", "")
-            
-            files_data.append({
-                'path': f"csv_{app_id}",
-                'filename': f"{game_title}",
+            files_data.append((entry['mtime'], {
+                'path': f"csv_{entry['app_id']}",
+                'filename': entry['title'],
                 'type': 'csv_steam',
-                'count': comment_count,
+                'count': entry['rows'] or 0,
                 'size': "{:.2f} KB".format(file_size),
                 'modified': modified_time,
                 'file': filename
-            })
+            }))
         else:
             # 普通CSV文件
-            files_data.append({
-                'path': file_path,
+            files_data.append((entry['mtime'], {
+                'path': os.path.join('output', filename),
                 'filename': filename,
                 'type': 'csv',
                 'size': "{:.2f} KB".format(file_size),
                 'modified': modified_time
-            })
+            }))
     
     # 处理JSON游戏组
-    json_game_groups = {}
-    for file_path in json_files:
-        # 获取父目录名（通常是app_ID格式）
-        parent_dir = os.path.basename(os.path.dirname(file_path))
-        
-        if parent_dir.startswith('app_'):
-            app_id = parent_dir.replace('app_', '')
-            if app_id not in json_game_groups:
-                json_game_groups[app_id] = []
-            json_game_groups[app_id].append(file_path)
-    
-    for app_id, game_files in json_game_groups.items():
-        # 计算这个游戏的所有评论文件大小总和
-        total_size = sum(os.path.getsize(f) for f in game_files) / 1024  # KB
-        # 获取最新的修改时间
-        latest_time = max(os.path.getmtime(f) for f in game_files)
-        modified_time = time.ctime(latest_time)
-        
-        # 尝试从第一个文件中获取游戏标题
-        game_title = f"App {app_id}"
-        try:
-            if game_files:
-                with open(game_files[0], 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    if 'game_title' in data:
-                        game_title = data['game_title']
-        except:
-            pass
-            
-        files_data.append({
+    for group in output_index.json_groups():
+        app_id = group['app_id']
+        game_title = group['title'] or f"App {app_id}"
+        files_data.append((group['mtime'], {
             'path': f"app_{app_id}",
             'filename': f"{game_title} (AppID: {app_id})",
             'type': 'json_group',
-            'count': len(game_files),
-            'size': "{:.2f} KB".format(total_size),
-            'modified': modified_time
-        })
+            'count': group['count'],
+            'size': "{:.2f} KB".format(group['size'] / 1024),
+            'modified': time.ctime(group['mtime'])
+        }))
+    
+    # 按修改时间排序
+    files_data.sort(key=lambda item: item[0], reverse=True)
     
-    return render_template('comments.html', files=files_data)
+    return render_template('comments.html', files=[item for _, item in files_data])
 
 @app.route('/comments/steam/<app_id>')
 def view_steam_game_comments(app_id):
@@ -477,17 +528,50 @@ def open_output_folder():
     except Exception as e:
         return jsonify({"success": False, "message": f"打开文件夹失败: {str(e)}"})
 
-def run_crawler(crawler_type, url='', use_headless=True, max_reviews=None):
-    """运行爬虫的线程函数"""
-    global crawler_status
+def use_job_progress_file(crawler, job):
+    """每个任务使用单独的进度文件，同时运行的任务不会互相覆盖进度"""
+    crawler.progress_file = os.path.join("logs", f"progress_job_{job.id}.txt")
+    crawler.reset_progress()
+    crawler.progress = crawler._load_progress()
+
+def page_crawler_status(crawler):
+    """TapTap和B站爬虫初始化后的状态日志（HTTP模式下需要浏览器时才启动）"""
+    if crawler.http_mode:
+        return "服务器状态：使用HTTP接口获取评论，需要时再启动浏览器"
+    return "服务器状态：已创建Chrome浏览器实例"
+
+def page_progress_callback(job, status):
+    """TapTap和B站爬虫的进度回调：每次报告进度时检查任务是否已被取消，并更新进度（30-90%）"""
+    def callback(phase, progress, message):
+        # 取消任务的检查点
+        job.check_cancelled()
+        if progress is not None:
+            status["progress"] = max(status["progress"], 30 + int(progress * 60))
+    return callback
+
+def run_crawler(job):
+    """运行爬虫任务（在任务调度器的工作线程中执行）"""
+    crawler_type = job.type
+    url = job.params.get("url", "")
+    use_headless = job.params.get("headless", True)
+    max_reviews = job.params.get("max_reviews")
+    lean_mode = job.params.get("lean", False)
+    status = job.status
     
     # 调试信息 - 输出线程接收到的参数
-    print(f"DEBUG - run_crawler线程接收到的参数: type={crawler_type}, url={url}, headless={use_headless}, max_reviews={max_reviews}, browser={BROWSER_TYPE}")
+    print(f"DEBUG - run_crawler线程接收到的参数: type={crawler_type}, url={url}, headless={use_headless}, max_reviews={max_reviews}, lean={lean_mode}, browser={BROWSER_TYPE}")
+    
+    # 年龄验证和爬取共用的浏览器实例，任务结束时归还到共享池
+    shared_driver = None
+    # TapTap和B站爬虫实例，任务结束时归还浏览器并删除任务的进度文件
+    page_crawler = None
+    # 简化版Steam爬虫实例（创建时从共享池租用浏览器），任务结束或取消时归还
+    steam_crawler = None
     
     # 更新初始状态
-    crawler_status["log"].append(f"正在准备{crawler_type}爬虫... (最大评论数: {max_reviews if max_reviews is not None else '无限制'})")
-    crawler_status["log"].append("服务器状态：初始化爬虫环境")
-    crawler_status["progress"] = 5
+    status["log"].append(f"正在准备{crawler_type}爬虫... (最大评论数: {max_reviews if max_reviews is not None else '无限制'})")
+    status["log"].append("服务器状态：初始化爬虫环境")
+    status["progress"] = 5
     
     try:
         if crawler_type == "steam":
@@ -496,109 +580,112 @@ def run_crawler(crawler_type, url='', use_headless=True, max_reviews=None):
             
             if skip_login:
                 # 使用简化版爬虫（不需要登录）
-                crawler_status["log"].append(f"使用简化版Steam爬虫（无需登录，使用 {BROWSER_TYPE.upper()} 浏览器）...")
-                crawler_status["log"].append("服务器状态：加载简化版Steam爬虫依赖")
-                crawler_status["progress"] = 10
+                status["log"].append(f"使用简化版Steam爬虫（无需登录，使用 {BROWSER_TYPE.upper()} 浏览器）...")
+                status["log"].append("服务器状态：加载简化版Steam爬虫依赖")
+                status["progress"] = 10
                 try:
-                    # 根据浏览器类型选择爬虫
+                    # 根据浏览器类型选择爬虫，只有Edge版本支持精简加载模式
+                    crawler_kwargs = {}
                     if BROWSER_TYPE == "edge":
                         try:
                             # 使用Edge版本的爬虫
                             from steam_simple_crawler_edge import SteamSimpleCrawlerEdge, CsvDataWriter
                             crawler_class = SteamSimpleCrawlerEdge
-                            crawler_status["log"].append("已加载Edge版本的爬虫模块")
+                            crawler_kwargs = {"lean_mode": lean_mode}
+                            status["log"].append("已加载Edge版本的爬虫模块")
                         except ImportError:
                             # 回退到Chrome版本
                             from steam_simple_crawler import SteamSimpleCrawler, CsvDataWriter
                             crawler_class = SteamSimpleCrawler
-                            crawler_status["log"].append("Edge版本爬虫模块不可用，回退到Chrome版本")
+                            status["log"].append("Edge版本爬虫模块不可用，回退到Chrome版本")
                     else:
                         # 默认使用Chrome版本
                         from steam_simple_crawler import SteamSimpleCrawler, CsvDataWriter
                         crawler_class = SteamSimpleCrawler
                     
-                    # 初始化数据写入器
-                    data_writer = CsvDataWriter()
+                    # 初始化数据写入器，写入的评论同时推送给订阅了records事件的页面
+                    data_writer = RecordPublisher(CsvDataWriter(), event_broker, job.id)
                     
                     # 初始化爬虫
-                    crawler_status["log"].append("正在初始化简化版爬虫...")
-                    crawler_status["log"].append(f"服务器状态：创建{BROWSER_TYPE.upper()}浏览器实例")
-                    crawler_status["progress"] = 15
-                    crawler = crawler_class(use_headless=use_headless, data_writer=data_writer)
+                    status["log"].append("正在初始化简化版爬虫...")
+                    status["log"].append(f"服务器状态：创建{BROWSER_TYPE.upper()}浏览器实例")
+                    status["progress"] = 15
+                    crawler = steam_crawler = crawler_class(use_headless=use_headless, data_writer=data_writer,
+                                                            **crawler_kwargs)
                     
                     # 更新日志
-                    crawler_status["log"].append(f"简化版Steam爬虫已启动 (使用 {BROWSER_TYPE.upper()} 浏览器)")
-                    crawler_status["log"].append("服务器状态：爬虫初始化完成")
-                    crawler_status["progress"] = 20
+                    status["log"].append(f"简化版Steam爬虫已启动 (使用 {BROWSER_TYPE.upper()} 浏览器)")
+                    status["log"].append("服务器状态：爬虫初始化完成")
+                    status["progress"] = 20
                     
                     if url:
-                        crawler_status["log"].append("正在爬取Steam评论: {}".format(url))
-                        crawler_status["log"].append("服务器状态：正在访问目标网页")
-                        crawler_status["progress"] = 25
+                        status["log"].append("正在爬取Steam评论: {}".format(url))
+                        status["log"].append("服务器状态：正在访问目标网页")
+                        status["progress"] = 25
                         try:
-                            crawler_status["log"].append("第一阶段：开始滚动加载所有评论...")
-                            crawler_status["log"].append("服务器状态：正在加载所有评论，请耐心等待")
-                            crawler_status["progress"] = 30
+                            status["log"].append("第一阶段：开始滚动加载所有评论...")
+                            status["log"].append("服务器状态：正在加载所有评论，请耐心等待")
+                            status["progress"] = 30
                             
                             # 设置进度更新的回调函数
                             def progress_callback(phase, progress, message):
+                                # 取消任务的检查点
+                                job.check_cancelled()
                                 if phase == "scroll":
                                     # 滚动阶段的进度为30-60%
-                                    crawler_status["progress"] = 30 + int(progress * 30)
-                                    crawler_status["log"].append(f"滚动加载评论: {message}")
+                                    status["progress"] = 30 + int(progress * 30)
+                                    status["log"].append(f"滚动加载评论: {message}")
                                     
                                     # 检查是否找到了评论总数信息
                                     total_match = re.search(r'已加载 (\d+) 条评论', message)
                                     if total_match:
                                         total_count = int(total_match.group(1))
                                         if max_reviews is None or total_count < max_reviews:
-                                            crawler_status["log"].append(f"检测到评论总数：{total_count}")
+                                            status["log"].append(f"检测到评论总数：{total_count}")
                                 
                                 elif phase == "extract":
                                     # 提取阶段的进度为60-100%
-                                    crawler_status["progress"] = 60 + int(progress * 40)
-                                    crawler_status["log"].append(f"提取评论数据: {message}")
+                                    status["progress"] = 60 + int(progress * 40)
+                                    status["log"].append(f"提取评论数据: {message}")
                             
                             # 将回调函数传递给爬虫
                             crawler.set_progress_callback(progress_callback)
                             
+                            job.check_cancelled()
                             result = crawler.run(url, max_reviews)
-                            crawler_status["log"].append("数据提取完成")
-                            crawler_status["log"].append("服务器状态：评论数据已保存到output目录")
-                            crawler_status["progress"] = 100
+                            status["log"].append("数据提取完成")
+                            status["log"].append("服务器状态：评论数据已保存到output目录")
+                            status["progress"] = 100
                         except Exception as e:
-                            crawler_status["log"].append("提取数据时出错: {}".format(str(e)))
-                            crawler_status["log"].append("服务器状态：爬虫遇到错误，请检查URL是否有效")
+                            status["log"].append("提取数据时出错: {}".format(str(e)))
+                            status["log"].append("服务器状态：爬虫遇到错误，请检查URL是否有效")
                     else:
-                        crawler_status["log"].append("未提供有效的Steam URL")
-                        crawler_status["log"].append("服务器状态：需要有效的游戏URL才能继续")
+                        status["log"].append("未提供有效的Steam URL")
+                        status["log"].append("服务器状态：需要有效的游戏URL才能继续")
                 except Exception as e:
-                    crawler_status["log"].append("导入或运行简化版爬虫出错: {}".format(str(e)))
-                    crawler_status["log"].append("服务器状态：爬虫启动失败，尝试使用标准爬虫")
+                    status["log"].append("导入或运行简化版爬虫出错: {}".format(str(e)))
+                    status["log"].append("服务器状态：爬虫启动失败，尝试使用标准爬虫")
                     # 如果简化版爬虫失败，回退到标准爬虫
                     skip_login = False
             
             # 如果没有使用简化版爬虫或简化版爬虫失败，使用标准爬虫
             if not skip_login:
                 # 导入并运行标准Steam爬虫
-                crawler_status["log"].append("正在导入Steam爬虫模块...")
-                crawler_status["log"].append("服务器状态：加载Steam爬虫依赖")
-                crawler_status["progress"] = 10
+                status["log"].append("正在导入Steam爬虫模块...")
+                status["log"].append("服务器状态：加载Steam爬虫依赖")
+                status["progress"] = 10
                 from steam_crawler import SteamCrawler
                 
-                # 创建一个被多个组件共享的浏览器实例
-                shared_driver = None
-                
                 # 对于Steam爬虫，先统一处理登录和年龄验证
                 if url and ("steamcommunity.com/app/" in url or "/app/" in url):
                     # 提取游戏ID
                     try:
                         app_id = url.split('/app/')[1].split('/')[0]
-                        crawler_status["log"].append(f"提取的游戏ID: {app_id}")
+                        status["log"].append(f"提取的游戏ID: {app_id}")
                         
                         # 统一处理登录和年龄验证
-                        crawler_status["log"].append("1. 检查登录状态和处理年龄验证...")
-                        crawler_status["log"].append("服务器状态：准备验证流程")
+                        status["log"].append("1. 检查登录状态和处理年龄验证...")
+                        status["log"].append("服务器状态：准备验证流程")
                         
                         # 导入年龄验证模块
                         spec = importlib.util.spec_from_file_location(
@@ -611,21 +698,21 @@ def run_crawler(crawler_type, url='', use_headless=True, max_reviews=None):
                             spec.loader.exec_module(age_verification)
                             
                             # 使用同一个浏览器实例处理所有操作，避免重复启动浏览器
-                            crawler_status["log"].append("2. 设置浏览器实例...")
+                            status["log"].append("2. 设置浏览器实例...")
                             # 创建共享的浏览器实例
-                            shared_driver = age_verification.setup_driver(use_headless=use_headless)
+                            shared_driver = age_verification.setup_driver(use_headless=use_headless, browser_type=BROWSER_TYPE)
                             
                             # 检查登录状态，确保自动加载cookies
-                            crawler_status["log"].append("3. 加载已保存的cookies...")
+                            status["log"].append("3. 加载已保存的cookies...")
                             age_verification.load_cookies(shared_driver)
                             
                             # 确认cookies已正确加载，刷新页面
-                            crawler_status["log"].append("3.1 验证cookies是否正确加载...")
+                            status["log"].append("3.1 验证cookies是否正确加载...")
                             shared_driver.get("https://store.steampowered.com/")
                             time.sleep(3)  # 等待页面加载
                             
                             # 处理目标游戏的年龄验证
-                            crawler_status["log"].append(f"4. 处理游戏 {app_id} 的年龄验证...")
+                            status["log"].append(f"4. 处理游戏 {app_id} 的年龄验证...")
                             verification_result = age_verification.handle_age_verification_for_game(
                                 app_id, 
                                 use_headless=use_headless,
@@ -633,170 +720,197 @@ def run_crawler(crawler_type, url='', use_headless=True, max_reviews=None):
                             )
                             
                             if verification_result:
-                                crawler_status["log"].append("✅ 年龄验证处理成功")
+                                status["log"].append("✅ 年龄验证处理成功")
                             else:
-                                crawler_status["log"].append("❌ 年龄验证处理失败，继续尝试爬取")
+                                status["log"].append("❌ 年龄验证处理失败，继续尝试爬取")
                             
                             # 保存最新的cookies
-                            crawler_status["log"].append("5. 保存最新cookies...")
+                            status["log"].append("5. 保存最新cookies...")
                             age_verification.save_cookies(shared_driver)
                             
                             # 不关闭浏览器，而是继续使用它
-                            crawler_status["log"].append("6. 继续使用当前浏览器实例进行爬取...")
+                            status["log"].append("6. 继续使用当前浏览器实例进行爬取...")
                         else:
-                            crawler_status["log"].append("未找到age_verification模块，跳过预处理步骤")
+                            status["log"].append("未找到age_verification模块，跳过预处理步骤")
                     except Exception as e:
-                        crawler_status["log"].append(f"预处理过程中出错: {str(e)}")
-                        crawler_status["log"].append("继续爬取评论，可能会受到年龄限制影响")
+                        status["log"].append(f"预处理过程中出错: {str(e)}")
+                        status["log"].append("继续爬取评论，可能会受到年龄限制影响")
                 
                 # 初始化爬虫 - 使用已存在的浏览器实例（如果有）
-                crawler_status["log"].append("正在初始化爬虫...")
-                crawler_status["log"].append("服务器状态：准备爬虫实例")
-                crawler_status["progress"] = 15
+                status["log"].append("正在初始化爬虫...")
+                status["log"].append("服务器状态：准备爬虫实例")
+                status["progress"] = 15
                 
                 if shared_driver:
-                    crawler_status["log"].append("使用已创建的浏览器实例...")
+                    status["log"].append("使用已创建的浏览器实例...")
                     crawler = SteamCrawler(use_headless=use_headless, existing_driver=shared_driver)
                 else:
-                    crawler_status["log"].append("创建新的浏览器实例...")
+                    status["log"].append("创建新的浏览器实例...")
                     crawler = SteamCrawler(use_headless=use_headless)
                 
                 # 更新日志
-                crawler_status["log"].append("Steam爬虫已启动")
-                crawler_status["log"].append("服务器状态：爬虫初始化完成")
-                crawler_status["progress"] = 20
+                status["log"].append("Steam爬虫已启动")
+                status["log"].append("服务器状态：爬虫初始化完成")
+                status["progress"] = 20
                 
                 if url:
-                    crawler_status["log"].append("正在爬取Steam评论: {}".format(url))
-                    crawler_status["log"].append("服务器状态：正在访问目标网页")
-                    crawler_status["progress"] = 25
+                    status["log"].append("正在爬取Steam评论: {}".format(url))
+                    status["log"].append("服务器状态：正在访问目标网页")
+                    status["progress"] = 25
                     try:
-                        crawler_status["log"].append("第一阶段：开始滚动加载所有评论...")
-                        crawler_status["log"].append("服务器状态：正在加载所有评论，请耐心等待")
-                        crawler_status["progress"] = 30
+                        status["log"].append("第一阶段：开始滚动加载所有评论...")
+                        status["log"].append("服务器状态：正在加载所有评论，请耐心等待")
+                        status["progress"] = 30
                         
                         # 设置进度更新的回调函数
                         def progress_callback(phase, progress, message):
+                            # 取消任务的检查点
+                            job.check_cancelled()
                             if phase == "scroll":
                                 # 滚动阶段的进度为30-60%
-                                crawler_status["progress"] = 30 + int(progress * 30)
-                                crawler_status["log"].append(f"滚动加载评论: {message}")
+                                status["progress"] = 30 + int(progress * 30)
+                                status["log"].append(f"滚动加载评论: {message}")
                                 
                                 # 检查是否找到了评论总数信息
                                 total_match = re.search(r'已加载 (\d+) 条评论', message)
                                 if total_match:
                                     total_count = int(total_match.group(1))
                                     if max_reviews is None or total_count < max_reviews:
-                                        crawler_status["log"].append(f"检测到评论总数：{total_count}")
+                                        status["log"].append(f"检测到评论总数：{total_count}")
                             
                             elif phase == "extract":
                                 # 提取阶段的进度为60-100%
-                                crawler_status["progress"] = 60 + int(progress * 40)
-                                crawler_status["log"].append(f"提取评论数据: {message}")
+                                status["progress"] = 60 + int(progress * 40)
+                                status["log"].append(f"提取评论数据: {message}")
                         
                         # 将回调函数传递给爬虫
                         crawler.set_progress_callback(progress_callback)
                         
+                        job.check_cancelled()
                         result = crawler.run(url, max_reviews)
-                        crawler_status["log"].append("数据提取完成")
-                        crawler_status["log"].append("服务器状态：评论数据已保存到output目录")
-                        crawler_status["progress"] = 100
+                        status["log"].append("数据提取完成")
+                        status["log"].append("服务器状态：评论数据已保存到output目录")
+                        status["progress"] = 100
                     except Exception as e:
-                        crawler_status["log"].append("提取数据时出错: {}".format(str(e)))
-                        crawler_status["log"].append("服务器状态：爬虫遇到错误，请检查URL是否有效")
+                        status["log"].append("提取数据时出错: {}".format(str(e)))
+                        status["log"].append("服务器状态：爬虫遇到错误，请检查URL是否有效")
                 else:
-                    crawler_status["log"].append("未提供有效的Steam URL")
-                    crawler_status["log"].append("服务器状态：需要有效的游戏URL才能继续")
+                    status["log"].append("未提供有效的Steam URL")
+                    status["log"].append("服务器状态：需要有效的游戏URL才能继续")
         
         elif crawler_type == "taptap":
             # 导入并运行TapTap爬虫
-            crawler_status["log"].append("正在导入TapTap爬虫模块...")
-            crawler_status["log"].append("服务器状态：加载TapTap爬虫依赖")
-            crawler_status["progress"] = 10
+            status["log"].append("正在导入TapTap爬虫模块...")
+            status["log"].append("服务器状态：加载TapTap爬虫依赖")
+            status["progress"] = 10
             from tap_crawler import TapCrawler
             
             # 初始化爬虫
-            crawler_status["log"].append("正在初始化爬虫...")
-            crawler_status["log"].append("服务器状态：创建Chrome浏览器实例")
-            crawler_status["progress"] = 15
-            crawler = TapCrawler(use_headless=use_headless)
+            status["log"].append("正在初始化爬虫...")
+            status["progress"] = 15
+            crawler = page_crawler = TapCrawler(use_headless=use_headless, lean_mode=lean_mode)
+            status["log"].append(page_crawler_status(crawler))
+            crawler.data_writer = RecordPublisher(crawler.data_writer, event_broker, job.id)
+            crawler.set_progress_callback(page_progress_callback(job, status))
+            use_job_progress_file(crawler, job)
             
             # 更新日志
-            crawler_status["log"].append("TapTap爬虫已启动")
-            crawler_status["log"].append("服务器状态：爬虫初始化完成")
-            crawler_status["progress"] = 20
+            status["log"].append("TapTap爬虫已启动")
+            status["log"].append("服务器状态：爬虫初始化完成")
+            status["progress"] = 20
             
             if url:
-                crawler_status["log"].append("正在爬取TapTap评论: {}".format(url))
-                crawler_status["log"].append("服务器状态：正在访问TapTap游戏页面")
-                crawler_status["progress"] = 25
+                status["log"].append("正在爬取TapTap评论: {}".format(url))
+                status["log"].append("服务器状态：正在访问TapTap游戏页面")
+                status["progress"] = 25
                 try:
-                    crawler_status["log"].append("开始提取评论数据...")
-                    crawler_status["log"].append("服务器状态：页面滚动中，收集评论数据")
-                    crawler_status["progress"] = 30
+                    status["log"].append("开始提取评论数据...")
+                    status["log"].append("服务器状态：页面滚动中，收集评论数据")
+                    status["progress"] = 30
+                    job.check_cancelled()
                     crawler.extract_comments(url)
-                    crawler_status["log"].append("数据提取完成")
-                    crawler_status["log"].append("服务器状态：TapTap评论数据已保存到output目录")
-                    crawler_status["progress"] = 100
+                    status["log"].append("数据提取完成")
+                    status["log"].append("服务器状态：TapTap评论数据已保存到output目录")
+                    status["progress"] = 100
                 except Exception as e:
-                    crawler_status["log"].append("提取数据时出错: {}".format(str(e)))
-                    crawler_status["log"].append("服务器状态：爬虫遇到错误，请检查URL是否有效")
+                    status["log"].append("提取数据时出错: {}".format(str(e)))
+                    status["log"].append("服务器状态：爬虫遇到错误，请检查URL是否有效")
             else:
-                crawler_status["log"].append("未提供有效的TapTap URL")
-                crawler_status["log"].append("服务器状态：需要有效的游戏URL才能继续")
+                status["log"].append("未提供有效的TapTap URL")
+                status["log"].append("服务器状态：需要有效的游戏URL才能继续")
         
         elif crawler_type == "bilibili":
             # 导入并运行Bilibili爬虫
-            crawler_status["log"].append("正在导入Bilibili爬虫模块...")
-            crawler_status["log"].append("服务器状态：加载Bilibili爬虫依赖")
-            crawler_status["progress"] = 10
+            status["log"].append("正在导入Bilibili爬虫模块...")
+            status["log"].append("服务器状态：加载Bilibili爬虫依赖")
+            status["progress"] = 10
             from bili_crawler import BiliCrawler
             
             # 初始化爬虫
-            crawler_status["log"].append("正在初始化爬虫...")
-            crawler_status["log"].append("服务器状态：创建Chrome浏览器实例")
-            crawler_status["progress"] = 15
-            crawler = BiliCrawler(use_headless=use_headless)
+            status["log"].append("正在初始化爬虫...")
+            status["progress"] = 15
+            crawler = BiliCrawler(use_headless=use_headless, lean_mode=lean_mode,
+                                  max_comments=int(max_reviews) if max_reviews else None)
+            page_crawler = crawler
+            status["log"].append(page_crawler_status(crawler))
+            crawler.data_writer = RecordPublisher(crawler.data_writer, event_broker, job.id)
+            crawler.set_progress_callback(page_progress_callback(job, status))
+            use_job_progress_file(crawler, job)
             
             # 更新日志
-            crawler_status["log"].append("Bilibili爬虫已启动")
-            crawler_status["log"].append("服务器状态：爬虫初始化完成")
-            crawler_status["progress"] = 20
+            status["log"].append("Bilibili爬虫已启动")
+            status["log"].append("服务器状态：爬虫初始化完成")
+            status["progress"] = 20
             
             if url:
-                crawler_status["log"].append("正在爬取Bilibili评论: {}".format(url))
-                crawler_status["log"].append("服务器状态：正在访问Bilibili视频页面")
-                crawler_status["progress"] = 25
+                status["log"].append("正在爬取Bilibili评论: {}".format(url))
+                status["log"].append("服务器状态：正在访问Bilibili视频页面")
+                status["progress"] = 25
                 try:
-                    crawler_status["log"].append("开始提取评论数据...")
-                    crawler_status["log"].append("服务器状态：页面解析中，提取视频评论数据")
-                    crawler_status["progress"] = 30
+                    status["log"].append("开始提取评论数据...")
+                    status["log"].append("服务器状态：页面解析中，提取视频评论数据")
+                    status["progress"] = 30
+                    job.check_cancelled()
                     crawler.extract_comments(url)
-                    crawler_status["log"].append("数据提取完成")
-                    crawler_status["log"].append("服务器状态：Bilibili评论数据已保存到output目录")
-                    crawler_status["progress"] = 100
+                    status["log"].append("数据提取完成")
+                    status["log"].append("服务器状态：Bilibili评论数据已保存到output目录")
+                    status["progress"] = 100
                 except Exception as e:
-                    crawler_status["log"].append("提取数据时出错: {}".format(str(e)))
-                    crawler_status["log"].append("服务器状态：爬虫遇到错误，请检查URL是否有效")
+                    status["log"].append("提取数据时出错: {}".format(str(e)))
+                    status["log"].append("服务器状态：爬虫遇到错误，请检查URL是否有效")
             else:
-                crawler_status["log"].append("未提供有效的Bilibili URL")
-                crawler_status["log"].append("服务器状态：需要有效的视频URL才能继续")
+                status["log"].append("未提供有效的Bilibili URL")
+                status["log"].append("服务器状态：需要有效的视频URL才能继续")
         
         else:
-            crawler_status["log"].append("未知的爬虫类型: {}".format(crawler_type))
-            crawler_status["log"].append("服务器状态：不支持的爬虫类型")
+            status["log"].append("未知的爬虫类型: {}".format(crawler_type))
+            status["log"].append("服务器状态：不支持的爬虫类型")
             
     except Exception as e:
-        crawler_status["log"].append("爬虫运行出错: {}".format(str(e)))
-        crawler_status["log"].append("服务器状态：爬虫启动失败，请检查系统环境")
+        status["log"].append("爬虫运行出错: {}".format(str(e)))
+        status["log"].append("服务器状态：爬虫启动失败，请检查系统环境")
     finally:
-        crawler_status["running"] = False
-        crawler_status["log"].append("爬虫任务结束")
+        if shared_driver:
+            release_driver(shared_driver)
+        if steam_crawler is not None:
+            steam_crawler.close()
+        if page_crawler is not None:
+            page_crawler.cleanup()
+            if os.path.exists(page_crawler.progress_file):
+                os.remove(page_crawler.progress_file)
+        # 任务的最终状态由任务调度器在这之后更新，页面看到任务结束时已经收到了全部日志
+        status["log"].append("爬虫任务结束")
 
 def main():
     """启动Flask服务器"""
     print(f"使用 {BROWSER_TYPE.upper()} 浏览器启动爬虫服务...")
     
+    # 在后台预热一个无头浏览器实例，第一个任务无需等待浏览器启动
+    try:
+        get_driver_pool().warm(BROWSER_TYPE, use_headless=True)
+    except Exception as e:
+        print(f"预热浏览器失败: {e}")
+    
     # 设置服务器
     host = '0.0.0.0'  # 监听所有网络接口
     port = 5000
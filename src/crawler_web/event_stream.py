@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+爬取进度的事件流（Server-Sent Events）
+
+爬虫线程通过 EventBroker.publish() 发布日志、进度和新爬取的记录，
+每个浏览器页面通过 /api/stream 订阅，服务器主动推送，无需轮询。
+
+每个订阅者有一个有界队列，publish() 只做非阻塞的放入：
+队列已满（客户端太慢）时丢弃该事件并标记订阅者，由事件流在下次发送时
+根据日志缓冲区补发丢失的日志，爬虫线程永远不会因为客户端而阻塞。
+"""
+
+import json
+import queue
+import threading
+
+# 每个订阅者最多缓存的事件数
+DEFAULT_QUEUE_SIZE = 500
+# 没有事件时发送心跳的间隔（秒），避免代理服务器断开空闲连接
+HEARTBEAT_INTERVAL = 15
+# 每个records事件最多携带的记录数
+MAX_RECORDS_PER_EVENT = 50
+
+
+def format_sse(event, data, event_id=None):
+    """格式化为一条SSE消息"""
+    message = f"event: {event}\n"
+    if event_id is not None:
+        message += f"id: {event_id}\n"
+    return message + f"data: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+class Subscriber:
+    """一个事件流连接的有界事件队列"""
+
+    def __init__(self, events, queue_size=DEFAULT_QUEUE_SIZE, job_id=None):
+        """
+        Args:
+            events: 订阅的事件类型集合
+            queue_size: 最多缓存的事件数
+            job_id: 只接收该任务的事件，None表示接收所有任务的事件
+        """
+        self.events = set(events)
+        self.job_id = job_id
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.dropped = 0
+
+    def offer(self, item):
+        """非阻塞放入事件，队列已满时丢弃"""
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            self.dropped += 1
+
+    def get(self, timeout=HEARTBEAT_INTERVAL):
+        """等待下一个事件
+
+        Returns:
+            tuple: (事件类型, 事件ID, SSE消息)，超时返回None
+        """
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class EventBroker:
+    """把事件分发给所有订阅者"""
+
+    def __init__(self, queue_size=DEFAULT_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def wants_event(self, subscriber, event, job_id):
+        return event in subscriber.events and (subscriber.job_id is None or subscriber.job_id == job_id)
+
+    def subscribe(self, events=("log", "status"), job_id=None):
+        subscriber = Subscriber(events, self.queue_size, job_id)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def wants(self, event, job_id=None):
+        """是否有订阅者订阅了该类型的事件（没有时发布方可以跳过构造数据）"""
+        with self._lock:
+            return any(self.wants_event(subscriber, event, job_id) for subscriber in self._subscribers)
+
+    def publish(self, event, data, event_id=None, job_id=None):
+        """发布事件，不会阻塞调用方"""
+        with self._lock:
+            subscribers = [subscriber for subscriber in self._subscribers
+                           if self.wants_event(subscriber, event, job_id)]
+        if not subscribers:
+            return
+        item = (event, event_id, format_sse(event, data, event_id))
+        for subscriber in subscribers:
+            subscriber.offer(item)
+
+
+class RecordPublisher:
+    """包装数据写入器，写入的同时把新记录作为records事件发布"""
+
+    def __init__(self, writer, broker, job_id=None):
+        self.writer = writer
+        self.broker = broker
+        self.job_id = job_id
+        self.count = 0
+
+    def _publish(self, records):
+        self.count += len(records)
+        if self.broker.wants("records", self.job_id):
+            self.broker.publish("records", {"job_id": self.job_id, "total": self.count,
+                                            "records": records[-MAX_RECORDS_PER_EVENT:]}, job_id=self.job_id)
+
+    def write(self, data, filename):
+        """评论爬虫的写入接口（一批记录）"""
+        result = self.writer.write(data, filename)
+        self._publish(list(data or []))
+        return result
+
+    def write_review(self, review_data):
+        """Steam爬虫的写入接口（单条评论）"""
+        result = self.writer.write_review(review_data)
+        self._publish([review_data])
+        return result
+
+    def __getattr__(self, name):
+        return getattr(self.writer, name)
@@ -0,0 +1,231 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+爬虫任务调度 - 任务排队执行，同时运行的任务数有上限
+
+每个任务有自己的ID、状态、进度和日志（LogBuffer），提交后进入队列，
+由固定数量的工作线程依次取出执行。排队中的任务取消后直接跳过；
+运行中的任务取消后在下一个检查点（阶段之间、进度回调中）停止。
+"""
+
+import os
+import time
+import uuid
+import queue
+import threading
+from collections import OrderedDict
+
+from driver_pool import MAX_IDLE_DRIVERS
+from crawler_web.log_buffer import LogBuffer
+
+# 同时运行的任务数，默认等于浏览器池保留的空闲实例数，任务归还的浏览器可以直接给下一个任务复用
+DEFAULT_MAX_JOBS = int(os.environ.get("CRAWLER_MAX_JOBS", MAX_IDLE_DRIVERS))
+# 最多保留的已结束任务数
+MAX_FINISHED_JOBS = 50
+
+# 任务状态
+QUEUED = "queued"
+RUNNING = "running"
+FINISHED = "finished"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class JobCancelled(BaseException):
+    """任务已被取消，在检查点抛出以结束任务
+
+    继承BaseException，不会被爬虫代码中的 except Exception 拦截
+    """
+
+
+class JobStatus(dict):
+    """任务状态（兼容原来的crawler_status字典），进度或运行状态变化时调用listener"""
+
+    def __init__(self, initial, listener=None):
+        super().__init__(initial)
+        self.listener = listener
+
+    def __setitem__(self, key, value):
+        changed = self.get(key) != value
+        super().__setitem__(key, value)
+        if changed and self.listener and key in ("progress", "running", "state"):
+            self.listener(self)
+
+    def snapshot(self):
+        """不含日志的状态"""
+        return {key: value for key, value in self.items() if key != "log"}
+
+
+class Job:
+    """一个爬虫任务"""
+
+    def __init__(self, job_type, params, status_listener=None, log_listener=None):
+        """
+        Args:
+            job_type: 爬虫类型（steam、taptap、bilibili）
+            params: 任务参数（url、headless、max_reviews、lean等）
+            status_listener: 状态变化时调用，参数为JobStatus
+            log_listener: 每追加一行日志时调用，参数为 (任务, 序号, 日志行)
+        """
+        self.id = uuid.uuid4().hex[:12]
+        self.type = job_type
+        self.params = dict(params)
+        self.created = time.time()
+        self._cancel_event = threading.Event()
+        log = LogBuffer(listener=(lambda seq, line: log_listener(self, seq, line)) if log_listener else None)
+        self.status = JobStatus({
+            "job_id": self.id,
+            "type": job_type,
+            "url": self.params.get("url", ""),
+            "state": QUEUED,
+            "running": False,
+            "progress": 0,
+            "created": self.created,
+            "started": None,
+            "finished": None,
+            "log": log
+        }, status_listener)
+
+    @property
+    def log(self):
+        return self.status["log"]
+
+    @property
+    def state(self):
+        return self.status["state"]
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def check_cancelled(self):
+        """检查点：任务已被取消时抛出JobCancelled"""
+        if self._cancel_event.is_set():
+            raise JobCancelled()
+
+    def to_dict(self, since=None):
+        """任务状态，since不为None时附带该序号之后的日志"""
+        data = self.status.snapshot()
+        if since is not None:
+            log = self.log.since(since)
+            data.update({"log": log["lines"], "next": log["next"], "skipped": log["skipped"]})
+        return data
+
+
+class JobScheduler:
+    """任务队列和有上限的工作线程"""
+
+    def __init__(self, runner, max_workers=DEFAULT_MAX_JOBS, status_listener=None, log_listener=None):
+        """
+        Args:
+            runner: 执行任务的函数，参数为Job
+            max_workers: 同时运行的任务数
+            status_listener: 传给每个任务的状态监听函数
+            log_listener: 传给每个任务的日志监听函数
+        """
+        self.runner = runner
+        self.max_workers = max(1, max_workers)
+        self.status_listener = status_listener
+        self.log_listener = log_listener
+        self._queue = queue.Queue()
+        self._jobs = OrderedDict()  # job_id -> Job，按提交顺序
+        self._lock = threading.Lock()
+        self._workers = []
+
+    def _ensure_workers(self):
+        with self._lock:
+            self._workers = [worker for worker in self._workers if worker.is_alive()]
+            while len(self._workers) < self.max_workers:
+                worker = threading.Thread(target=self._work, name=f"crawler-job-{len(self._workers) + 1}",
+                                          daemon=True)
+                worker.start()
+                self._workers.append(worker)
+
+    def submit(self, job_type, params):
+        """提交任务
+
+        Returns:
+            Job: 新任务（状态为queued）
+        """
+        job = Job(job_type, params, self.status_listener, self.log_listener)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        job.log.append(f"任务 {job.id} 已加入队列（前面还有 {self.queued_count() - 1} 个任务等待）")
+        self._queue.put(job)
+        self._ensure_workers()
+        return job
+
+    def _prune(self):
+        """只保留最近的已结束任务"""
+        finished = [job_id for job_id, job in self._jobs.items() if job.state in (FINISHED, FAILED, CANCELLED)]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self):
+        """全部任务，最新提交的在前"""
+        with self._lock:
+            return list(reversed(self._jobs.values()))
+
+    def latest(self):
+        """最近提交的任务，没有任务时返回None"""
+        with self._lock:
+            return next(reversed(self._jobs.values()), None)
+
+    def queued_count(self):
+        return sum(1 for job in self.jobs() if job.state == QUEUED)
+
+    def running_count(self):
+        return sum(1 for job in self.jobs() if job.state == RUNNING)
+
+    def cancel(self, job_id):
+        """取消任务：排队中的任务不再执行，运行中的任务在下一个检查点停止
+
+        Returns:
+            bool: 任务存在且尚未结束
+        """
+        job = self.get(job_id)
+        if job is None or job.state in (FINISHED, FAILED, CANCELLED):
+            return False
+        job._cancel_event.set()
+        if job.state == QUEUED:
+            job.log.append("任务已取消")
+            job.status["finished"] = time.time()
+            job.status["state"] = CANCELLED
+        else:
+            job.log.append("正在取消任务，将在当前步骤完成后停止...")
+        return True
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            if job.cancelled:
+                continue
+            job.status["started"] = time.time()
+            job.status["running"] = True
+            job.status["state"] = RUNNING
+            state = FINISHED
+            try:
+                self.runner(job)
+                if job.cancelled:
+                    state = CANCELLED
+            except JobCancelled:
+                job.log.append("任务已取消")
+                state = CANCELLED
+            except Exception as e:
+                job.log.append(f"任务运行出错: {e}")
+                state = FAILED
+            except SystemExit as e:
+                # 爬虫代码在无法继续时调用sys.exit()，只结束当前任务，工作线程继续处理队列
+                job.log.append(f"任务已退出（退出码 {e.code}）")
+                state = FAILED
+            finally:
+                # 最后更新running，页面收到running为False的状态时任务状态已经确定
+                job.status["finished"] = time.time()
+                job.status["state"] = state
+                job.status["running"] = False
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+有界的任务日志 - 只保留最近的若干行，每行带有递增的序号
+
+前端轮询时带上已收到的最后序号（/api/status?since=序号），只返回之后新增的日志行，
+长时间爬取时每次轮询的数据量不再随日志总量增长。
+"""
+
+import threading
+from itertools import islice
+from collections import deque
+
+# 每个任务最多保留的日志行数
+DEFAULT_MAX_LINES = 2000
+
+
+class LogBuffer:
+    """环形日志缓冲区，序号从start_seq开始单调递增"""
+
+    def __init__(self, max_lines=DEFAULT_MAX_LINES, start_seq=0, listener=None):
+        """
+        Args:
+            max_lines: 最多保留的日志行数，超出时丢弃最早的行
+            start_seq: 第一行日志的序号（新任务接着上一个任务的序号，已打开的页面无需重置）
+            listener: 每追加一行后调用，参数为 (序号, 日志行)，如推送到事件流；
+                      在持有锁时调用，不能阻塞，也不能再向同一个缓冲区追加日志
+        """
+        self._lines = deque(maxlen=max_lines)
+        self._next_seq = start_seq
+        self._lock = threading.Lock()
+        self.listener = listener
+
+    def append(self, line):
+        """追加一行日志
+
+        Returns:
+            int: 该行的序号
+        """
+        with self._lock:
+            seq = self._next_seq
+            self._lines.append(str(line))
+            self._next_seq += 1
+            # 在锁内通知，保证监听方按序号顺序收到日志（事件流会丢弃序号倒退的事件）
+            if self.listener:
+                self.listener(seq, str(line))
+        return seq
+
+    @property
+    def next_seq(self):
+        """下一行日志的序号（即当前已写入的日志总数）"""
+        return self._next_seq
+
+    @property
+    def first_seq(self):
+        """缓冲区中最早一行日志的序号"""
+        with self._lock:
+            return self._next_seq - len(self._lines)
+
+    def since(self, seq=None):
+        """读取序号不小于seq的日志行
+
+        Args:
+            seq: 客户端已收到的下一个序号，None表示读取缓冲区中的全部日志
+
+        Returns:
+            dict: {"lines": 日志行列表, "next": 下次请求使用的序号, "skipped": 因缓冲区已满而丢失的行数}
+        """
+        with self._lock:
+            first = self._next_seq - len(self._lines)
+            if seq is None or seq > self._next_seq:
+                # 未指定序号，或序号来自已经结束的服务器进程：返回全部
+                seq = first
+            skipped = max(0, first - seq)
+            start = max(seq, first) - first
+            lines = list(islice(self._lines, start, None))
+            return {"lines": lines, "next": self._next_seq, "skipped": skipped}
+
+    def __len__(self):
+        return len(self._lines)
+
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self._lines))
@@ -0,0 +1,235 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+WebDriver驱动缓存模块 - 缓存浏览器版本与驱动路径的对应关系
+
+启动浏览器时优先使用本地缓存的驱动路径（只做一次本地版本校验），
+其次查找系统PATH中的驱动，最后才通过webdriver_manager联网下载。
+"""
+
+import os
+import re
+import sys
+import json
+import shutil
+import logging
+import subprocess
+
+logger = logging.getLogger("driver_cache")
+
+# 缓存文件位置
+CACHE_DIR = "cache"
+CACHE_FILE = os.path.join(CACHE_DIR, "driver_cache.json")
+
+# 本地版本检查的超时时间（秒）
+VERSION_CHECK_TIMEOUT = 5
+
+# 各浏览器对应的驱动程序名称
+DRIVER_NAMES = {
+    "chrome": "chromedriver",
+    "edge": "msedgedriver"
+}
+
+# 各浏览器可能的可执行文件位置（非Windows系统）
+BROWSER_BINARIES = {
+    "chrome": [
+        "google-chrome",
+        "google-chrome-stable",
+        "chromium",
+        "chromium-browser",
+        "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"
+    ],
+    "edge": [
+        "microsoft-edge",
+        "microsoft-edge-stable",
+        "/Applications/Microsoft Edge.app/Contents/MacOS/Microsoft Edge"
+    ]
+}
+
+# Windows注册表中记录浏览器版本的位置
+WINDOWS_VERSION_KEYS = {
+    "chrome": r"Software\Google\Chrome\BLBeacon",
+    "edge": r"Software\Microsoft\Edge\BLBeacon"
+}
+
+VERSION_PATTERN = re.compile(r'(\d+)\.(\d+)\.(\d+)(?:\.(\d+))?')
+
+
+def _parse_version(text):
+    """从命令输出中提取版本号字符串"""
+    if not text:
+        return None
+    match = VERSION_PATTERN.search(text)
+    return match.group(0) if match else None
+
+
+def _major(version):
+    """获取版本号的主版本部分"""
+    return version.split('.')[0] if version else None
+
+
+def _run_version_command(executable):
+    """执行 `<程序> --version` 并返回解析出的版本号"""
+    try:
+        output = subprocess.run(
+            [executable, '--version'],
+            capture_output=True, text=True, timeout=VERSION_CHECK_TIMEOUT
+        )
+        return _parse_version(output.stdout or output.stderr)
+    except Exception:
+        return None
+
+
+def get_browser_version(browser="chrome", binary_path=None):
+    """读取本地浏览器版本，不访问网络
+
+    Args:
+        browser: 浏览器类型，'chrome' 或 'edge'
+        binary_path: 浏览器可执行文件路径（可选）
+
+    Returns:
+        str: 浏览器版本号，无法获取时返回None
+    """
+    if sys.platform.startswith('win'):
+        try:
+            import winreg
+            with winreg.OpenKey(winreg.HKEY_CURRENT_USER, WINDOWS_VERSION_KEYS[browser]) as key:
+                version, _ = winreg.QueryValueEx(key, "version")
+                return _parse_version(version)
+        except Exception:
+            return None
+
+    candidates = [binary_path] if binary_path else []
+    candidates.extend(BROWSER_BINARIES.get(browser, []))
+    for candidate in candidates:
+        if not candidate:
+            continue
+        # macOS的.app目录需要定位到实际的可执行文件
+        if candidate.endswith('.app'):
+            app_name = os.path.basename(candidate)[:-4]
+            candidate = os.path.join(candidate, 'Contents', 'MacOS', app_name)
+        executable = candidate if os.path.isabs(candidate) else shutil.which(candidate)
+        if executable and os.path.exists(executable):
+            version = _run_version_command(executable)
+            if version:
+                return version
+    return None
+
+
+def get_driver_version(driver_path):
+    """读取驱动程序版本，用于校验缓存的驱动是否仍然可用"""
+    if not driver_path or not os.path.exists(driver_path):
+        return None
+    return _run_version_command(driver_path)
+
+
+def _load_cache():
+    """读取缓存文件"""
+    try:
+        with open(CACHE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+def _save_cache(cache):
+    """写入缓存文件（先写临时文件再替换，避免并发写坏文件）"""
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_file = f"{CACHE_FILE}.{os.getpid()}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_file, CACHE_FILE)
+    except Exception as e:
+        logger.warning(f"保存驱动缓存失败: {e}")
+
+
+def _cache_key(browser, browser_version):
+    return f"{browser}:{_major(browser_version) or 'unknown'}"
+
+
+def _driver_matches(driver_path, browser_version):
+    """校验驱动存在且主版本号与浏览器一致"""
+    driver_version = get_driver_version(driver_path)
+    if not driver_version:
+        return False
+    if not browser_version:
+        # 无法获取浏览器版本时，只要驱动可以运行就认为有效
+        return True
+    return _major(driver_version) == _major(browser_version)
+
+
+def _download_driver(browser):
+    """通过webdriver_manager联网获取驱动"""
+    try:
+        if browser == "edge":
+            from webdriver_manager.microsoft import EdgeChromiumDriverManager
+            return EdgeChromiumDriverManager().install()
+        from webdriver_manager.chrome import ChromeDriverManager
+        return ChromeDriverManager().install()
+    except Exception as e:
+        logger.warning(f"通过webdriver_manager获取{browser}驱动失败: {e}")
+        return None
+
+
+def resolve_driver_path(browser="chrome", binary_path=None, allow_download=True):
+    """解析可用的驱动路径，优先离线
+
+    查找顺序：本地缓存 -> 系统PATH中的驱动 -> webdriver_manager下载
+
+    Args:
+        browser: 浏览器类型，'chrome' 或 'edge'
+        binary_path: 浏览器可执行文件路径（可选）
+        allow_download: 本地找不到时是否允许联网下载
+
+    Returns:
+        str: 驱动路径，全部失败时返回None（调用方可交给Selenium自带的驱动管理）
+    """
+    browser_version = get_browser_version(browser, binary_path)
+    key = _cache_key(browser, browser_version)
+    cache = _load_cache()
+
+    # 1. 本地缓存
+    entry = cache.get(key)
+    if entry and _driver_matches(entry.get("driver_path"), browser_version):
+        logger.info(f"使用缓存的{browser}驱动: {entry['driver_path']}")
+        return entry["driver_path"]
+
+    # 2. 系统PATH中的驱动
+    system_driver = shutil.which(DRIVER_NAMES.get(browser, "chromedriver"))
+    if system_driver and _driver_matches(system_driver, browser_version):
+        logger.info(f"使用系统PATH中的{browser}驱动: {system_driver}")
+        store_driver_path(browser, browser_version, system_driver, cache)
+        return system_driver
+
+    # 3. 联网下载
+    if allow_download:
+        logger.info(f"本地未找到匹配的{browser}驱动，尝试联网获取...")
+        driver_path = _download_driver(browser)
+        if driver_path:
+            store_driver_path(browser, browser_version, driver_path, cache)
+            return driver_path
+
+    return None
+
+
+def store_driver_path(browser, browser_version, driver_path, cache=None):
+    """记录浏览器版本与驱动路径的对应关系"""
+    if cache is None:
+        cache = _load_cache()
+    cache[_cache_key(browser, browser_version)] = {
+        "browser_version": browser_version,
+        "driver_path": driver_path,
+        "driver_version": get_driver_version(driver_path)
+    }
+    _save_cache(cache)
+
+
+def invalidate_driver_path(browser="chrome", binary_path=None):
+    """驱动启动失败时删除对应的缓存记录"""
+    cache = _load_cache()
+    key = _cache_key(browser, get_browser_version(browser, binary_path))
+    if cache.pop(key, None) is not None:
+        _save_cache(cache)
+        logger.info(f"已清除失效的{browser}驱动缓存: {key}")
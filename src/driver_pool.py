@@ -0,0 +1,431 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+WebDriver工厂和预热池 - 所有模块共享的浏览器实例管理
+
+所有需要浏览器的入口（爬虫基类、Steam爬虫、年龄验证、Cookies工具等）都通过
+lease_driver()租用浏览器、通过release_driver()归还，而不是各自冷启动新浏览器：
+  - 租用时做健康检查，失效的实例直接销毁并换一个
+  - 归还后放回空闲队列，供同一进程中的下一个任务复用
+  - 加载页面数或内存占用(RSS)超过上限的实例会被回收
+  - 可以在后台预先启动(预热)若干实例，任务开始时无需等待浏览器启动
+  - 只有以 capture=True 租用的实例开启性能日志（供network_capture读取接口响应），
+    与普通实例分开存放，其他任务的浏览器不会积累网络事件日志
+  - 需要额外启动参数的模块（如Steam的Cookie兼容设置）通过extra_args传入，参数不同的实例分开存放
+  - 归还时恢复默认的超时设置，上一个任务修改的隐式等待和页面加载超时不会影响下一个任务
+"""
+
+import os
+import time
+import atexit
+import logging
+import platform
+import threading
+import traceback
+
+from selenium import webdriver
+
+from driver_cache import resolve_driver_path, invalidate_driver_path
+from profile_pool import get_profile_pool
+from lean_mode import prepare_page_stats, disable_lean_mode
+
+try:
+    import psutil
+    PSUTIL_INSTALLED = True
+except ImportError:
+    PSUTIL_INSTALLED = False
+
+logger = logging.getLogger("driver_pool")
+
+# 回收阈值
+DRIVER_MAX_PAGES = 50  # 单个浏览器实例最多加载的页面数
+DRIVER_MAX_RSS_MB = 1500  # 浏览器进程树的内存上限（MB），需要安装psutil
+MAX_IDLE_DRIVERS = 2  # 每种配置最多保留的空闲实例数
+
+# 超时设置
+PAGE_LOAD_TIMEOUT = 60  # 秒
+SCRIPT_TIMEOUT = 60  # 秒
+
+# 浏览器可执行文件的常见位置
+BROWSER_PATHS = {
+    "chrome": {
+        "Darwin": ["/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"],
+        "Windows": [
+            "C:/Program Files/Google/Chrome/Application/chrome.exe",
+            "C:/Program Files (x86)/Google/Chrome/Application/chrome.exe",
+            os.path.join(os.environ.get('LOCALAPPDATA', ''), 'Google/Chrome/Application/chrome.exe')
+        ]
+    },
+    "edge": {
+        "Darwin": ["/Applications/Microsoft Edge.app/Contents/MacOS/Microsoft Edge"],
+        "Windows": [
+            "C:/Program Files (x86)/Microsoft/Edge/Application/msedge.exe",
+            "C:/Program Files/Microsoft/Edge/Application/msedge.exe"
+        ]
+    }
+}
+
+# 隐藏webdriver标记的脚本，每个新文档加载前执行
+ANTI_DETECTION_SCRIPT = '''
+    Object.defineProperty(navigator, 'webdriver', {
+        get: () => undefined
+    });
+'''
+
+
+def find_browser_binary(browser="chrome"):
+    """查找浏览器可执行文件路径，找不到时返回None（使用系统默认）"""
+    for path in BROWSER_PATHS.get(browser, {}).get(platform.system(), []):
+        if path and os.path.exists(path):
+            return path
+    return None
+
+
+def _build_options(browser, use_headless, user_data_dir=None, capture=False, extra_args=()):
+    """构建统一的浏览器启动参数，capture为True时开启性能日志，extra_args为附加的启动参数"""
+    if browser == "edge":
+        from selenium.webdriver.edge.options import Options
+    else:
+        from selenium.webdriver.chrome.options import Options
+    options = Options()
+
+    if use_headless:
+        options.add_argument('--headless=new')
+    if user_data_dir:
+        options.add_argument(f'--user-data-dir={user_data_dir}')
+
+    # 基本设置
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument('--disable-gpu')
+    options.add_argument('--disable-extensions')
+    options.add_argument('--disable-popup-blocking')
+    options.add_argument('--ignore-certificate-errors')
+    options.add_argument('--window-size=1920,1080')
+    options.add_argument('--lang=zh-CN')
+
+    # 避免后台标签页被节流，保证多任务时的加载速度
+    options.add_argument('--disable-background-timer-throttling')
+    options.add_argument('--disable-backgrounding-occluded-windows')
+    options.add_argument('--disable-renderer-backgrounding')
+
+    # 绕过部分反爬虫机制
+    options.add_argument('--disable-blink-features=AutomationControlled')
+    options.add_experimental_option('excludeSwitches', ['enable-automation', 'enable-logging'])
+    options.add_experimental_option('useAutomationExtension', False)
+
+    if capture:
+        # 开启性能日志（只记录网络事件），供network_capture直接读取评论接口的响应
+        log_prefs_key = "ms:loggingPrefs" if browser == "edge" else "goog:loggingPrefs"
+        options.set_capability(log_prefs_key, {'performance': 'ALL'})
+        options.add_experimental_option('perfLoggingPrefs', {'enableNetwork': True, 'enablePage': False})
+
+    for argument in extra_args:
+        options.add_argument(argument)
+
+    binary = find_browser_binary(browser)
+    if binary:
+        options.binary_location = binary
+    return options
+
+
+def create_driver(browser="chrome", use_headless=True, user_data_dir=None, capture=False, extra_args=()):
+    """创建一个新的浏览器实例（不经过池）
+
+    Args:
+        browser: 浏览器类型，'chrome' 或 'edge'
+        use_headless: 是否使用无头模式
+        user_data_dir: 浏览器用户数据目录
+        capture: 是否开启性能日志（网络抓取需要）
+        extra_args: 附加的浏览器启动参数
+
+    Returns:
+        WebDriver: 浏览器实例
+    """
+    options = _build_options(browser, use_headless, user_data_dir, capture, extra_args)
+    binary = options.binary_location or None
+    if browser == "edge":
+        from selenium.webdriver.edge.service import Service
+        driver_class = webdriver.Edge
+    else:
+        from selenium.webdriver.chrome.service import Service
+        driver_class = webdriver.Chrome
+
+    launch_start = time.time()
+    try:
+        driver_path = resolve_driver_path(browser, binary)
+        service = Service(executable_path=driver_path) if driver_path else Service()
+        driver = driver_class(service=service, options=options)
+    except Exception as e:
+        logger.warning(f"使用解析到的{browser}驱动启动失败: {e}，改用Selenium默认驱动管理")
+        invalidate_driver_path(browser, binary)
+        driver = driver_class(options=options)
+    logger.info(f"[耗时] 浏览器启动: {time.time() - launch_start:.2f} 秒 ({browser}, 无头模式: {use_headless})")
+
+    driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+    driver.set_script_timeout(SCRIPT_TIMEOUT)
+    try:
+        driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {'source': ANTI_DETECTION_SCRIPT})
+    except Exception as e:
+        logger.warning(f"注入反检测脚本失败: {e}")
+    prepare_page_stats(driver)
+    return driver
+
+
+def browser_rss_mb(driver):
+    """计算浏览器进程树（驱动进程及其所有子进程）的内存占用（MB），未安装psutil时返回None"""
+    if not PSUTIL_INSTALLED:
+        return None
+    try:
+        service_process = driver.service.process
+        root = psutil.Process(service_process.pid)
+        processes = [root] + root.children(recursive=True)
+        return sum(p.memory_info().rss for p in processes if p.is_running()) / (1024 * 1024)
+    except Exception:
+        return None
+
+
+class _PooledDriver:
+    """池中浏览器实例的附加信息"""
+
+    def __init__(self, driver, key, profile_dir):
+        self.driver = driver
+        self.key = key
+        self.profile_dir = profile_dir
+        self.pages = 0
+        self.created = time.time()
+        self.leased = False
+
+
+class DriverPool:
+    """浏览器实例预热池"""
+
+    def __init__(self, max_idle=MAX_IDLE_DRIVERS, max_pages=DRIVER_MAX_PAGES, max_rss_mb=DRIVER_MAX_RSS_MB):
+        """初始化浏览器池
+
+        Args:
+            max_idle: 每种配置最多保留的空闲实例数
+            max_pages: 单个实例最多加载的页面数，超过后回收
+            max_rss_mb: 单个实例进程树的内存上限（MB），超过后回收
+        """
+        self.max_idle = max_idle
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self.profile_pool = get_profile_pool()
+        self._lock = threading.Lock()
+        self._idle = {}  # (browser, headless, capture, extra_args) -> [_PooledDriver]
+        self._entries = {}  # id(driver) -> _PooledDriver
+        self._closed = False
+
+    def _launch(self, key):
+        """启动一个新实例并登记到池中"""
+        browser, use_headless, capture, extra_args = key
+        profile_dir = self.profile_pool.lease()
+        try:
+            driver = create_driver(browser, use_headless, user_data_dir=profile_dir, capture=capture,
+                                   extra_args=extra_args)
+        except Exception:
+            self.profile_pool.release(profile_dir)
+            raise
+        entry = _PooledDriver(driver, key, profile_dir)
+        with self._lock:
+            self._entries[id(driver)] = entry
+        return entry
+
+    def _is_healthy(self, entry):
+        """健康检查：浏览器进程存活且能执行脚本"""
+        try:
+            entry.driver.execute_script("return 1")
+            return bool(entry.driver.window_handles)
+        except Exception:
+            return False
+
+    def lease(self, browser="chrome", use_headless=True, capture=False, extra_args=()):
+        """租用一个浏览器实例
+
+        Args:
+            browser: 浏览器类型，'chrome' 或 'edge'
+            use_headless: 是否使用无头模式
+            capture: 是否需要性能日志（网络抓取），开启和未开启的实例分别存放
+            extra_args: 附加的浏览器启动参数，参数不同的实例分别存放
+
+        Returns:
+            WebDriver: 可以直接使用的浏览器实例
+        """
+        key = (browser, bool(use_headless), bool(capture), tuple(extra_args))
+        while True:
+            with self._lock:
+                idle = self._idle.get(key, [])
+                entry = idle.pop() if idle else None
+            if entry is None:
+                break
+            if self._is_healthy(entry):
+                entry.leased = True
+                logger.info(f"复用预热的浏览器实例 ({browser}, 已加载 {entry.pages} 个页面)")
+                return entry.driver
+            logger.warning("空闲浏览器实例健康检查失败，销毁后重新获取")
+            self._destroy(entry)
+
+        entry = self._launch(key)
+        entry.leased = True
+        return entry.driver
+
+    def note_page(self, driver, count=1):
+        """记录实例加载的页面数，用于判断是否需要回收"""
+        entry = self._entries.get(id(driver))
+        if entry:
+            entry.pages += count
+
+    def _rss_mb(self, entry):
+        """计算浏览器进程树的内存占用（MB），未安装psutil时返回None"""
+        return browser_rss_mb(entry.driver)
+
+    def release(self, driver):
+        """归还浏览器实例，超过回收阈值或空闲实例过多时直接关闭
+
+        Args:
+            driver: lease()返回的浏览器实例，不属于池的实例会被直接关闭
+        """
+        if driver is None:
+            return
+        entry = self._entries.get(id(driver))
+        if entry is None:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+            return
+        if not entry.leased:
+            return  # 重复归还
+        entry.leased = False
+
+        rss_mb = self._rss_mb(entry)
+        if entry.pages >= self.max_pages:
+            logger.info(f"浏览器实例已加载 {entry.pages} 个页面，达到上限 {self.max_pages}，回收")
+            self._destroy(entry, background=True)
+            return
+        if rss_mb is not None and rss_mb > self.max_rss_mb:
+            logger.info(f"浏览器实例内存占用 {rss_mb:.0f}MB 超过上限 {self.max_rss_mb}MB，回收")
+            self._destroy(entry, background=True)
+            return
+        if self._closed or not self._reset(entry):
+            self._destroy(entry, background=True)
+            return
+
+        with self._lock:
+            idle = self._idle.setdefault(entry.key, [])
+            if len(idle) < self.max_idle:
+                idle.append(entry)
+                return
+        self._destroy(entry, background=True)
+
+    def _reset(self, entry):
+        """清理实例状态：关闭多余的标签页、取消精简模式的拦截规则并回到空白页"""
+        try:
+            handles = entry.driver.window_handles
+            for handle in handles[1:]:
+                entry.driver.switch_to.window(handle)
+                entry.driver.close()
+            entry.driver.switch_to.window(handles[0])
+            disable_lean_mode(entry.driver)
+            # 恢复默认超时，上一个任务设置的隐式等待和页面加载超时不能带到下一个任务
+            entry.driver.implicitly_wait(0)
+            entry.driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+            entry.driver.set_script_timeout(SCRIPT_TIMEOUT)
+            entry.driver.get("about:blank")
+            # 丢弃未读取的性能日志，避免日志在复用的实例中持续积累
+            try:
+                entry.driver.get_log('performance')
+            except Exception:
+                pass
+            return True
+        except Exception as e:
+            logger.warning(f"重置浏览器实例失败: {e}")
+            return False
+
+    def _destroy(self, entry, background=False):
+        """关闭实例并归还其配置目录"""
+        with self._lock:
+            self._entries.pop(id(entry.driver), None)
+
+        def finish():
+            try:
+                entry.driver.quit()
+            except Exception:
+                pass
+            self.profile_pool.release(entry.profile_dir)
+
+        if background:
+            threading.Thread(target=finish, name="driver-recycle").start()
+        else:
+            finish()
+
+    def warm(self, browser="chrome", use_headless=True, count=1, capture=False, extra_args=()):
+        """在后台预先启动浏览器实例放入空闲队列
+
+        Args:
+            browser: 浏览器类型
+            use_headless: 是否使用无头模式
+            count: 预热的实例数量（不超过max_idle）
+            capture: 是否开启性能日志
+            extra_args: 附加的浏览器启动参数
+        """
+        key = (browser, bool(use_headless), bool(capture), tuple(extra_args))
+
+        def warm_up():
+            for _ in range(count):
+                with self._lock:
+                    if len(self._idle.get(key, [])) >= self.max_idle:
+                        return
+                try:
+                    entry = self._launch(key)
+                except Exception as e:
+                    logger.warning(f"预热浏览器实例失败: {e}")
+                    logger.debug(traceback.format_exc())
+                    return
+                with self._lock:
+                    self._idle.setdefault(key, []).append(entry)
+                logger.info(f"已预热浏览器实例 ({browser}, 无头模式: {use_headless})")
+
+        thread = threading.Thread(target=warm_up, name="driver-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def shutdown(self):
+        """关闭所有空闲实例"""
+        self._closed = True
+        with self._lock:
+            entries = [entry for idle in self._idle.values() for entry in idle]
+            self._idle = {}
+        for entry in entries:
+            self._destroy(entry)
+
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+
+def get_driver_pool():
+    """获取进程内共享的浏览器池"""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = DriverPool()
+            atexit.register(_default_pool.shutdown)
+        return _default_pool
+
+
+def lease_driver(browser="chrome", use_headless=True, capture=False, extra_args=()):
+    """从共享池租用浏览器实例，capture为True时租用开启了性能日志的实例，extra_args为附加的启动参数"""
+    return get_driver_pool().lease(browser, use_headless, capture, extra_args)
+
+
+def release_driver(driver):
+    """将浏览器实例归还到共享池"""
+    get_driver_pool().release(driver)
+
+
+def note_page(driver, count=1):
+    """记录浏览器实例加载的页面数"""
+    get_driver_pool().note_page(driver, count)
@@ -0,0 +1,297 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+本地接口模拟服务器 - 离线测试不依赖浏览器的评论接口引擎
+
+按真实接口的路径和JSON结构返回生成的测试数据：
+  - TapTap评价列表: /webapiv2/review/v2/list-by-app?app_id=&from=&limit=
+  - TapTap游戏详情: /webapiv2/app/v4/detail?id=
+  - B站视频信息: /x/web-interface/view?bvid=
+  - B站一级评论（游标分页）: /x/v2/reply/main?oid=&next=&ps=
+  - B站二级评论: /x/v2/reply/reply?oid=&root=&pn=&ps=
+  - B站分段弹幕（protobuf）: /x/v2/dm/web/seg.so?oid=&segment_index=
+
+用法:
+    python fixture_server.py [--port 8765] [--reviews 95] [--replies 45] [--danmaku 3000] [--delay 0.1]
+    然后设置环境变量 TAPTAP_API_BASE_URL / BILI_API_BASE_URL=http://127.0.0.1:8765 再运行爬虫
+"""
+
+import json
+import time
+import logging
+import argparse
+import threading
+import urllib.parse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+logger = logging.getLogger("fixture_server")
+
+# 每个游戏生成的评价数量
+DEFAULT_REVIEW_COUNT = 95
+# 每个视频生成的一级评论数量
+DEFAULT_REPLY_COUNT = 45
+# 一级评论附带的预览回复数量（与真实接口一致）
+PREVIEW_REPLY_COUNT = 3
+# 每个分段（6分钟）生成的弹幕数量
+DEFAULT_DANMAKU_COUNT = 3000
+# 视频时长（秒），对应4个弹幕分段
+VIDEO_DURATION = 1300
+# 基准时间戳，保证每次生成的数据相同
+BASE_TIMESTAMP = 1700000000
+
+
+def tap_review_item(app_id, index):
+    """生成一条与真实接口结构相同的评价（动态包装）"""
+    review_id = int(app_id) * 100000 + index
+    return {
+        "type": "moment",
+        "moment": {
+            "id": review_id,
+            "publish_time": BASE_TIMESTAMP - index * 3600,
+            "author": {"user": {"id": 10000 + index, "name": f"测试用户{index}"}},
+            "stat": {"ups": index % 17},
+            "review": {
+                "id": review_id,
+                "contents": {"text": f"<p>第{index}条测试评价，游戏{app_id}。</p>"}
+            }
+        }
+    }
+
+
+def tap_review_page(app_id, offset, limit, total, base_url):
+    """生成一页评价列表响应"""
+    items = [tap_review_item(app_id, index) for index in range(offset + 1, min(offset + limit, total) + 1)]
+    next_page = ""
+    if offset + limit < total:
+        query = urllib.parse.urlencode({"app_id": app_id, "from": offset + limit, "limit": limit})
+        next_page = f"{base_url}/webapiv2/review/v2/list-by-app?{query}"
+    return {"success": True, "data": {"list": items, "next_page": next_page, "total": total}}
+
+
+def bili_sub_count(index):
+    """第index条一级评论的回复数量，覆盖没有回复、只有预览回复和需要分页的情况"""
+    return (index * 7) % 48
+
+
+def bili_reply_item(oid, index, root_index=0, sub_index=0):
+    """生成一条与真实接口结构相同的评论，root_index为0时是一级评论"""
+    if root_index:
+        rpid = int(oid) * 1000000 + root_index * 1000 + sub_index
+        root = int(oid) * 1000000 + root_index * 1000
+        message = f"第{root_index}条评论的第{sub_index}条回复"
+        rcount = 0
+    else:
+        rpid = int(oid) * 1000000 + index * 1000
+        root = 0
+        message = f"第{index}条测试评论"
+        rcount = bili_sub_count(index)
+    user_index = index * 100 + sub_index
+    item = {
+        "rpid": rpid, "oid": int(oid), "root": root, "parent": root,
+        "mid": 20000 + user_index,
+        "member": {"mid": str(20000 + user_index), "uname": f"B站用户{user_index}"},
+        "content": {"message": message},
+        "ctime": BASE_TIMESTAMP - index * 600 - sub_index * 60,
+        "like": (index * 13 + sub_index) % 101,
+        "rcount": rcount,
+        "replies": []
+    }
+    if not root_index:
+        item["replies"] = [bili_reply_item(oid, index, index, j)
+                           for j in range(1, min(rcount, PREVIEW_REPLY_COUNT) + 1)]
+    return item
+
+
+def _varint(value):
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _pb_field(field, value):
+    """编码一个protobuf字段（int为varint，str/bytes为长度前缀）"""
+    if isinstance(value, int):
+        return _varint(field << 3) + _varint(value)
+    if isinstance(value, str):
+        value = value.encode("utf-8")
+    return _varint(field << 3 | 2) + _varint(len(value)) + value
+
+
+def danmaku_segment(cid, segment_index, count):
+    """生成一个分段的弹幕（DmSegMobileReply的protobuf编码）"""
+    start_ms = (segment_index - 1) * 360000
+    end_ms = min(segment_index * 360000, VIDEO_DURATION * 1000)
+    if start_ms >= end_ms:
+        return b""
+    elems = []
+    for i in range(count):
+        dm_id = int(cid) * 10000000 + segment_index * 100000 + i
+        elem = b"".join([
+            _pb_field(1, dm_id),
+            _pb_field(2, start_ms + i * (end_ms - start_ms) // count),
+            _pb_field(3, 1),
+            _pb_field(4, 25),
+            _pb_field(5, 0xFFFFFF),
+            _pb_field(6, f"{dm_id % 0xFFFFFFFF:08x}"),
+            _pb_field(7, f"第{segment_index}段第{i + 1}条测试弹幕"),
+            _pb_field(8, BASE_TIMESTAMP - i * 30),
+            _pb_field(12, str(dm_id))
+        ])
+        elems.append(_pb_field(1, elem))
+    return b"".join(elems)
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """按路径分发到各个模拟接口"""
+
+    routes = {}
+
+    def do_GET(self):
+        parsed = urllib.parse.urlparse(self.path)
+        handler = self.routes.get(parsed.path)
+        if handler is None:
+            self._send_json({"success": False, "error": "not found"}, 404)
+            return
+        if self.server.delay:
+            time.sleep(self.server.delay)
+        query = {key: values[0] for key, values in urllib.parse.parse_qs(parsed.query).items()}
+        try:
+            result = handler(self.server, query)
+        except (KeyError, ValueError) as e:
+            self._send_json({"success": False, "error": f"bad request: {e}"}, 400)
+            return
+        if isinstance(result, bytes):
+            self._send_body(result, "application/octet-stream")
+        else:
+            self._send_json(result)
+
+    def _send_json(self, data, status=200):
+        self._send_body(json.dumps(data, ensure_ascii=False).encode("utf-8"), "application/json; charset=utf-8",
+                        status)
+
+    def _send_body(self, body, content_type, status=200):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+def _tap_review_list(server, query):
+    app_id = query["app_id"]
+    offset = int(query.get("from", 0))
+    limit = int(query.get("limit", 10))
+    return tap_review_page(app_id, offset, limit, server.review_count, server.base_url)
+
+
+def _tap_app_detail(server, query):
+    app_id = query["id"]
+    return {"success": True, "data": {"id": int(app_id), "title": f"测试游戏{app_id}"}}
+
+
+def _bili_view(server, query):
+    video_id = query.get("bvid") or query["aid"]
+    aid = int(query["aid"]) if query.get("aid") else sum(ord(c) for c in video_id)
+    return {"code": 0, "data": {"aid": aid, "bvid": video_id, "title": f"测试视频{video_id}", "cid": aid * 10,
+                                "duration": VIDEO_DURATION,
+                                "pages": [{"cid": aid * 10, "page": 1, "duration": VIDEO_DURATION}]}}
+
+
+def _bili_main_replies(server, query):
+    oid = query["oid"]
+    page = max(int(query.get("next", 0)), 1)
+    size = int(query.get("ps", 20))
+    total = server.reply_count
+    start = (page - 1) * size
+    replies = [bili_reply_item(oid, index) for index in range(start + 1, min(start + size, total) + 1)]
+    is_end = start + size >= total
+    return {"code": 0, "data": {
+        "cursor": {"is_begin": page == 1, "prev": page - 1, "next": page + 1, "is_end": is_end, "all_count": total},
+        "replies": replies,
+        "top_replies": []
+    }}
+
+
+def _bili_sub_replies(server, query):
+    oid = query["oid"]
+    root_index = (int(query["root"]) % 1000000) // 1000
+    page = int(query.get("pn", 1))
+    size = int(query.get("ps", 20))
+    count = bili_sub_count(root_index)
+    start = (page - 1) * size
+    replies = [bili_reply_item(oid, root_index, root_index, j) for j in range(start + 1, min(start + size, count) + 1)]
+    return {"code": 0, "data": {"page": {"num": page, "size": size, "count": count}, "replies": replies}}
+
+
+def _bili_danmaku_segment(server, query):
+    return danmaku_segment(query["oid"], int(query["segment_index"]), server.danmaku_count)
+
+
+FixtureHandler.routes.update({
+    "/webapiv2/review/v2/list-by-app": _tap_review_list,
+    "/webapiv2/app/v4/detail": _tap_app_detail,
+    "/x/web-interface/view": _bili_view,
+    "/x/v2/reply/main": _bili_main_replies,
+    "/x/v2/reply/reply": _bili_sub_replies,
+    "/x/v2/dm/web/seg.so": _bili_danmaku_segment
+})
+
+
+def start_fixture_server(port=0, review_count=DEFAULT_REVIEW_COUNT, delay=0.0, reply_count=DEFAULT_REPLY_COUNT,
+                         danmaku_count=DEFAULT_DANMAKU_COUNT):
+    """在后台线程中启动模拟服务器
+
+    Args:
+        port: 监听端口，0表示自动选择
+        review_count: 每个游戏的评价数量
+        delay: 每个请求的模拟延迟（秒）
+        reply_count: 每个视频的一级评论数量
+        danmaku_count: 每个弹幕分段的弹幕数量
+
+    Returns:
+        tuple: (服务器对象, 接口地址)，使用完后调用 server.shutdown()
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), FixtureHandler)
+    server.daemon_threads = True
+    server.review_count = review_count
+    server.reply_count = reply_count
+    server.danmaku_count = danmaku_count
+    server.delay = delay
+    server.base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, name="fixture-server", daemon=True).start()
+    logger.info(f"模拟接口服务器已启动: {server.base_url}")
+    return server, server.base_url
+
+
+def main():
+    parser = argparse.ArgumentParser(description="本地接口模拟服务器")
+    parser.add_argument("--port", type=int, default=8765, help="监听端口")
+    parser.add_argument("--reviews", type=int, default=DEFAULT_REVIEW_COUNT, help="每个游戏的评价数量")
+    parser.add_argument("--replies", type=int, default=DEFAULT_REPLY_COUNT, help="每个视频的一级评论数量")
+    parser.add_argument("--danmaku", type=int, default=DEFAULT_DANMAKU_COUNT, help="每个弹幕分段的弹幕数量")
+    parser.add_argument("--delay", type=float, default=0.0, help="每个请求的模拟延迟（秒）")
+    args = parser.parse_args()
+
+    server, base_url = start_fixture_server(args.port, args.reviews, args.delay, args.replies, args.danmaku)
+    print(f"模拟接口服务器已启动: {base_url}")
+    print(f"设置环境变量 TAPTAP_API_BASE_URL={base_url} 或 BILI_API_BASE_URL={base_url} "
+          f"后运行爬虫即可离线测试，按Ctrl+C停止")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
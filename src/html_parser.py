@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+HTML解析后端 - 在已安装的解析器中自动选择最快的一个
+
+按速度优先使用 selectolax（lexbor引擎）、lxml（需要cssselect），
+都没有安装时回退到 BeautifulSoup 的 html.parser。
+selectolax 和 lxml 的节点包装为与 BeautifulSoup 相同的常用接口
+（select、select_one、find_all、get_text、text、get），提取代码不需要关心使用哪个后端。
+"""
+
+import logging
+
+logger = logging.getLogger("html_parser")
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+    SELECTOLAX_INSTALLED = True
+except ImportError:
+    SELECTOLAX_INSTALLED = False
+
+try:
+    import lxml.html
+    # lxml的CSS选择器模块依赖cssselect，未安装cssselect时导入失败
+    import lxml.cssselect
+    LXML_INSTALLED = True
+except ImportError:
+    LXML_INSTALLED = False
+
+# 按优先级排列的后端名称
+BACKEND_PRIORITY = ["selectolax", "lxml", "html.parser"]
+
+
+def available_backends():
+    """返回当前环境中可用的解析后端，按优先级排列"""
+    installed = {"selectolax": SELECTOLAX_INSTALLED, "lxml": LXML_INSTALLED, "html.parser": True}
+    return [name for name in BACKEND_PRIORITY if installed[name]]
+
+
+def default_backend():
+    """返回可用的最快后端"""
+    return available_backends()[0]
+
+
+class SelectolaxNode:
+    """selectolax节点的BeautifulSoup风格包装"""
+
+    def __init__(self, node):
+        self._node = node
+
+    def select(self, selector):
+        return [SelectolaxNode(node) for node in self._node.css(selector)]
+
+    def select_one(self, selector):
+        node = self._node.css_first(selector)
+        return SelectolaxNode(node) if node is not None else None
+
+    def find_all(self, tag):
+        return self.select(tag)
+
+    def get_text(self, separator="", strip=False):
+        return self._node.text(deep=True, separator=separator, strip=strip) or ""
+
+    @property
+    def text(self):
+        return self.get_text()
+
+    def get(self, attr, default=None):
+        value = self._node.attributes.get(attr)
+        return default if value is None else value
+
+
+class LxmlNode:
+    """lxml元素的BeautifulSoup风格包装"""
+
+    def __init__(self, element):
+        self._element = element
+
+    def select(self, selector):
+        return [LxmlNode(element) for element in self._element.cssselect(selector)]
+
+    def select_one(self, selector):
+        elements = self._element.cssselect(selector)
+        return LxmlNode(elements[0]) if elements else None
+
+    def find_all(self, tag):
+        return [LxmlNode(element) for element in self._element.iter(tag)]
+
+    def get_text(self, separator="", strip=False):
+        texts = self._element.itertext()
+        if strip:
+            texts = [text.strip() for text in texts]
+            texts = [text for text in texts if text]
+        return separator.join(texts)
+
+    @property
+    def text(self):
+        return self.get_text()
+
+    def get(self, attr, default=None):
+        return self._element.get(attr, default)
+
+
+def parse_html(html, backend=None):
+    """解析HTML文档
+
+    Args:
+        html: HTML文本
+        backend: 后端名称（selectolax、lxml、html.parser），None表示自动选择
+
+    Returns:
+        支持select/select_one/find_all/get_text的根节点
+    """
+    backend = backend or default_backend()
+    if backend == "selectolax":
+        return SelectolaxNode(LexborHTMLParser(html).root)
+    if backend == "lxml":
+        return LxmlNode(lxml.html.document_fromstring(html or "<html></html>"))
+    if backend == "html.parser":
+        from bs4 import BeautifulSoup
+        return BeautifulSoup(html, "html.parser")
+    raise ValueError(f"未知的HTML解析后端: {backend}")
+
+
+def parse_fragments(fragments, backend=None, wrapper_class="parsed-fragment"):
+    """把多个HTML片段合并为一个文档一次解析，返回每个片段对应的节点
+
+    每个片段放在一个带wrapper_class的div中，返回这些div节点，顺序与fragments一致。
+    """
+    html = "".join(f'<div class="{wrapper_class}">{fragment}</div>' for fragment in fragments)
+    root = parse_html(f"<html><body>{html}</body></html>", backend)
+    return root.select(f"div.{wrapper_class}")
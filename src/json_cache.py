@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+持久化键值缓存 - 保存在JSON文件中，条目带有过期时间
+
+多个进程（并行工作进程、多次运行）共享同一个缓存文件：
+读取时如果文件被其他进程更新过则重新加载，写入时先合并文件中的最新内容，
+再通过临时文件替换的方式原子写入，避免写坏文件。
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+
+logger = logging.getLogger("json_cache")
+
+CACHE_DIR = "cache"
+
+
+class JsonCache:
+    """带过期时间的JSON文件缓存"""
+
+    def __init__(self, path, ttl=None):
+        """
+        Args:
+            path: 缓存文件路径
+            ttl: 条目有效期（秒），None表示永不过期
+        """
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._mtime = None
+
+    def _reload(self):
+        """缓存文件被修改过时重新读取"""
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return
+        if mtime == self._mtime:
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+            if isinstance(entries, dict):
+                self._entries = entries
+            self._mtime = mtime
+        except Exception as e:
+            logger.warning(f"读取缓存文件 {self.path} 失败: {e}")
+
+    def _expired(self, entry):
+        return self.ttl is not None and time.time() - entry.get("time", 0) > self.ttl
+
+    def get(self, key, default=None):
+        """读取缓存值，不存在或已过期时返回default"""
+        with self._lock:
+            self._reload()
+            entry = self._entries.get(str(key))
+        if not isinstance(entry, dict) or self._expired(entry):
+            return default
+        return entry.get("value", default)
+
+    def set(self, key, value):
+        """写入缓存值并立即保存到文件"""
+        with self._lock:
+            self._reload()
+            self._entries[str(key)] = {"value": value, "time": time.time()}
+            self._save()
+
+    def delete(self, key):
+        """删除缓存值"""
+        with self._lock:
+            self._reload()
+            if self._entries.pop(str(key), None) is not None:
+                self._save()
+
+    def _save(self):
+        """原子写入：先写临时文件再替换，同时清除已过期的条目"""
+        self._entries = {key: entry for key, entry in self._entries.items()
+                         if isinstance(entry, dict) and not self._expired(entry)}
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_file = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_file, self.path)
+            self._mtime = os.path.getmtime(self.path)
+        except Exception as e:
+            logger.warning(f"保存缓存文件 {self.path} 失败: {e}")
@@ -0,0 +1,241 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+精简加载模式 - 通过CDP拦截图片、字体、音视频和统计脚本请求
+
+爬取评论只需要页面结构和评论接口，头像、截图、视频流和各类统计脚本都是浪费。
+精简模式使用 Network.setBlockedURLs 在浏览器网络层直接丢弃这些请求，
+同时用各平台的放行列表保证评论接口(XHR)不会被误拦。
+
+每个页面加载后都会通过Resource Timing统计传输字节数和加载耗时：
+非精简模式下的统计结果作为基线保存，精简模式下与基线对比得出节省量。
+"""
+
+import os
+import json
+import fnmatch
+import logging
+
+logger = logging.getLogger("lean_mode")
+
+# 基线统计文件
+BASELINE_FILE = os.path.join("cache", "lean_baseline.json")
+
+# 默认拦截的资源，按类型分组
+BLOCKED_RESOURCE_PATTERNS = {
+    "image": [
+        "*.jpg", "*.jpg?*", "*.jpg@*",
+        "*.jpeg", "*.jpeg?*", "*.jpeg@*",
+        "*.png", "*.png?*", "*.png@*",
+        "*.gif", "*.gif?*",
+        "*.webp", "*.webp?*",
+        "*.avif", "*.avif?*",
+        "*.ico", "*.bmp", "*.svg"
+    ],
+    "font": [
+        "*.woff", "*.woff?*", "*.woff2", "*.woff2?*",
+        "*.ttf", "*.ttf?*", "*.otf", "*.eot"
+    ],
+    "media": [
+        "*.mp4", "*.mp4?*", "*.m4s", "*.m4s?*", "*.flv", "*.flv?*",
+        "*.webm", "*.webm?*", "*.m3u8", "*.m3u8?*", "*.mp3", "*.m4a"
+    ],
+    "analytics": [
+        "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+        "*hm.baidu.com*", "*cnzz.com*", "*sentry.io*"
+    ]
+}
+
+# 各平台额外拦截的资源（图片CDN、视频流、埋点上报）
+PLATFORM_BLOCKED_PATTERNS = {
+    "bilibili": [
+        "*hdslb.com/bfs/*", "*bilivideo.com*", "*bilivideo.cn*",
+        "*data.bilibili.com*", "*cm.bilibili.com*", "*api.bilibili.com/x/click-interface*"
+    ],
+    "taptap": [
+        "*img.tapimg.com*", "*img2.tapimg.com*", "*tapimg.net*"
+    ],
+    "steam": [
+        "*avatars.steamstatic.com*", "*avatars.akamai.steamstatic.com*",
+        "*steamuserimages*", "*steamcdn-a.akamaihd.net/steamcommunity/public/images/*"
+    ]
+}
+
+# 各平台必须放行的请求样例，拦截规则命中其中任一URL时该规则会被丢弃
+PLATFORM_ALLOWLISTS = {
+    "bilibili": [
+        "https://api.bilibili.com/x/v2/reply/main?type=1&oid=1&mode=3",
+        "https://api.bilibili.com/x/v2/reply/wbi/main?type=1&oid=1&mode=3",
+        "https://api.bilibili.com/x/v2/reply/reply?type=1&oid=1&root=1&pn=1",
+        "https://api.bilibili.com/x/v2/reply?type=1&oid=1&pn=1",
+        "https://api.bilibili.com/x/web-interface/view?bvid=BV1",
+        "https://api.bilibili.com/x/v2/dm/web/seg.so?type=1&oid=1&segment_index=1"
+    ],
+    "taptap": [
+        "https://www.taptap.cn/webapiv2/review/v2/list-by-app?app_id=1&limit=10&from=0",
+        "https://www.taptap.cn/webapiv2/app/v2/detail-by-id/1"
+    ],
+    "steam": [
+        "https://steamcommunity.com/app/1/homecontent/?p=2&browsefilter=toprated",
+        "https://store.steampowered.com/appreviews/1?json=1&cursor=*"
+    ]
+}
+
+# 设置更大的Resource Timing缓冲区，避免评论页面的大量请求超出默认的250条
+RESOURCE_BUFFER_SCRIPT = "performance.setResourceTimingBufferSize(20000);"
+
+# 统计当前页面的传输字节数、请求数和加载耗时
+PAGE_STATS_SCRIPT = """
+var nav = performance.getEntriesByType('navigation')[0];
+var resources = performance.getEntriesByType('resource');
+var bytes = nav ? (nav.transferSize || 0) : 0;
+var byType = {};
+for (var i = 0; i < resources.length; i++) {
+    bytes += resources[i].transferSize || 0;
+    var type = resources[i].initiatorType || 'other';
+    byType[type] = (byType[type] || 0) + 1;
+}
+var loadMs = 0;
+if (nav) {
+    loadMs = nav.loadEventEnd > 0 ? nav.loadEventEnd : nav.domContentLoadedEventEnd;
+}
+return {bytes: bytes, requests: resources.length, load_ms: loadMs, by_type: byType};
+"""
+
+
+def build_block_list(platform=None, categories=None):
+    """生成拦截规则列表，并去掉会命中平台放行列表的规则
+
+    Args:
+        platform: 平台名称，'bilibili'、'taptap' 或 'steam'
+        categories: 拦截的资源类型，默认全部类型
+
+    Returns:
+        list: URL通配规则列表
+    """
+    categories = categories or list(BLOCKED_RESOURCE_PATTERNS.keys())
+    patterns = []
+    for category in categories:
+        patterns.extend(BLOCKED_RESOURCE_PATTERNS.get(category, []))
+    patterns.extend(PLATFORM_BLOCKED_PATTERNS.get(platform, []))
+
+    allowlist = PLATFORM_ALLOWLISTS.get(platform, [])
+    safe_patterns = []
+    for pattern in patterns:
+        conflicts = [url for url in allowlist if fnmatch.fnmatchcase(url, pattern)]
+        if conflicts:
+            logger.warning(f"拦截规则 {pattern} 会命中评论接口 {conflicts[0]}，已放行")
+            continue
+        safe_patterns.append(pattern)
+    return safe_patterns
+
+
+def enable_lean_mode(driver, platform=None, categories=None):
+    """为当前浏览器实例开启精简加载模式
+
+    Args:
+        driver: WebDriver实例
+        platform: 平台名称，用于选择额外拦截规则和放行列表
+        categories: 拦截的资源类型，默认全部类型
+
+    Returns:
+        bool: 是否成功开启
+    """
+    patterns = build_block_list(platform, categories)
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
+        logger.info(f"已开启精简加载模式 (平台: {platform or '通用'}，拦截规则 {len(patterns)} 条)")
+        return True
+    except Exception as e:
+        logger.warning(f"开启精简加载模式失败: {e}")
+        return False
+
+
+def disable_lean_mode(driver):
+    """关闭精简加载模式，恢复加载所有资源"""
+    try:
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': []})
+    except Exception:
+        pass
+
+
+def prepare_page_stats(driver):
+    """在每个新文档加载前扩大Resource Timing缓冲区"""
+    try:
+        driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {'source': RESOURCE_BUFFER_SCRIPT})
+    except Exception as e:
+        logger.debug(f"设置Resource Timing缓冲区失败: {e}")
+
+
+def _load_baseline():
+    try:
+        with open(BASELINE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+def _save_baseline(baseline):
+    try:
+        os.makedirs(os.path.dirname(BASELINE_FILE), exist_ok=True)
+        tmp_file = f"{BASELINE_FILE}.{os.getpid()}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(baseline, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_file, BASELINE_FILE)
+    except Exception as e:
+        logger.debug(f"保存精简模式基线失败: {e}")
+
+
+def measure_page(driver, platform=None, lean=False):
+    """统计当前页面的传输量和加载耗时，并与基线对比
+
+    非精简模式下的结果会更新该平台的基线（累计平均值）。
+
+    Args:
+        driver: WebDriver实例
+        platform: 平台名称
+        lean: 当前页面是否在精简模式下加载
+
+    Returns:
+        dict: 包含bytes、requests、load_ms，精简模式下有基线时还包含
+              saved_bytes、saved_ms和baseline_pages
+    """
+    try:
+        stats = driver.execute_script(PAGE_STATS_SCRIPT) or {}
+    except Exception as e:
+        logger.debug(f"统计页面资源失败: {e}")
+        return {}
+
+    key = platform or "generic"
+    baseline = _load_baseline()
+    entry = baseline.get(key)
+    if not lean:
+        pages = entry["pages"] if entry else 0
+        new_entry = {"pages": pages + 1}
+        for field in ("bytes", "load_ms"):
+            previous = entry[field] if entry else 0
+            new_entry[field] = (previous * pages + stats.get(field, 0)) / (pages + 1)
+        baseline[key] = new_entry
+        _save_baseline(baseline)
+    elif entry:
+        stats["saved_bytes"] = entry["bytes"] - stats.get("bytes", 0)
+        stats["saved_ms"] = entry["load_ms"] - stats.get("load_ms", 0)
+        stats["baseline_pages"] = entry["pages"]
+    return stats
+
+
+def format_page_stats(stats, lean=False):
+    """把页面统计结果格式化为一行日志"""
+    if not stats:
+        return "未能统计页面资源"
+    text = (f"传输 {stats.get('bytes', 0) / 1024:.0f} KB，{stats.get('requests', 0)} 个请求，"
+            f"加载 {stats.get('load_ms', 0) / 1000:.2f} 秒")
+    if lean:
+        if "saved_bytes" in stats:
+            text += (f"；精简模式节省约 {stats['saved_bytes'] / 1024:.0f} KB、"
+                     f"{stats['saved_ms'] / 1000:.2f} 秒 (基线 {stats['baseline_pages']} 个页面)")
+        else:
+            text += "；暂无基线数据，关闭精简模式运行一次后可统计节省量"
+    return text
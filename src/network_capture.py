@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+网络抓取模块 - 从浏览器已下载的接口响应中直接读取评论JSON
+
+B站和TapTap的评论都是前端通过XHR请求JSON接口后渲染出来的。与其用大量猜测的
+CSS选择器反推DOM，不如直接读取这些接口的响应：通过性能日志(performance log)
+订阅CDP网络事件，请求完成后用 Network.getResponseBody 取回响应体。
+
+使用前提：浏览器启动时开启了性能日志（driver_pool中以capture=True租用或创建的实例）。
+"""
+
+import re
+import json
+import base64
+import logging
+
+logger = logging.getLogger("network_capture")
+
+# 单个响应体的大小上限，超过的响应直接跳过
+MAX_BODY_BYTES = 20 * 1024 * 1024
+
+
+class NetworkCapture:
+    """收集URL匹配指定规则的接口响应"""
+
+    def __init__(self, driver, url_patterns):
+        """初始化网络抓取
+
+        Args:
+            driver: WebDriver实例
+            url_patterns: 需要收集的接口URL正则表达式列表
+        """
+        self.driver = driver
+        self.patterns = [re.compile(pattern) for pattern in url_patterns]
+        self.responses = []  # 已收集的响应，元素为 {"url": ..., "data": 解析后的JSON}
+        self._pending = {}  # requestId -> URL，已收到响应头、等待加载完成的请求
+        self._seen = set()
+        self.available = False
+
+    def _matches(self, url):
+        return any(pattern.search(url) for pattern in self.patterns)
+
+    def start(self):
+        """开始收集：开启网络事件并丢弃之前积累的日志
+
+        Returns:
+            bool: 当前浏览器是否支持网络抓取
+        """
+        try:
+            self.driver.execute_cdp_cmd('Network.enable', {})
+            self.driver.get_log('performance')
+            self.available = True
+        except Exception as e:
+            logger.info(f"当前浏览器未开启性能日志，无法使用网络抓取: {e}")
+            self.available = False
+        return self.available
+
+    def poll(self):
+        """处理新产生的网络事件，取回已完成的匹配请求的响应体
+
+        Returns:
+            list: 本次新收集到的响应
+        """
+        if not self.available:
+            return []
+        try:
+            entries = self.driver.get_log('performance')
+        except Exception as e:
+            logger.debug(f"读取性能日志失败: {e}")
+            return []
+
+        collected = []
+        for entry in entries:
+            try:
+                message = json.loads(entry['message'])['message']
+            except (KeyError, ValueError, TypeError):
+                continue
+            method = message.get('method')
+            params = message.get('params', {})
+            request_id = params.get('requestId')
+
+            if method == 'Network.responseReceived':
+                url = params.get('response', {}).get('url', '')
+                if request_id not in self._seen and self._matches(url):
+                    self._pending[request_id] = url
+            elif method == 'Network.loadingFinished' and request_id in self._pending:
+                url = self._pending.pop(request_id)
+                self._seen.add(request_id)
+                if params.get('encodedDataLength', 0) > MAX_BODY_BYTES:
+                    logger.warning(f"响应体过大，跳过: {url}")
+                    continue
+                data = self._fetch_body(request_id, url)
+                if data is not None:
+                    response = {"url": url, "data": data}
+                    self.responses.append(response)
+                    collected.append(response)
+            elif method == 'Network.loadingFailed':
+                self._pending.pop(request_id, None)
+        return collected
+
+    def _fetch_body(self, request_id, url):
+        """取回并解析响应体，非JSON响应返回None"""
+        try:
+            result = self.driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': request_id})
+        except Exception as e:
+            logger.debug(f"获取响应体失败 ({url}): {e}")
+            return None
+        body = result.get('body', '')
+        if result.get('base64Encoded'):
+            body = base64.b64decode(body).decode('utf-8', errors='replace')
+        return parse_json_body(body)
+
+    def stop(self):
+        """结束收集，处理剩余事件并返回全部响应"""
+        self.poll()
+        self._pending.clear()
+        return self.responses
+
+
+def parse_json_body(body):
+    """解析JSON响应体，兼容JSONP形式的包装，解析失败返回None"""
+    body = body.strip()
+    if not body:
+        return None
+    if body[0] not in '{[':
+        match = re.match(r'^[\w$.]+\((.*)\)\s*;?$', body, re.S)
+        if not match:
+            return None
+        body = match.group(1)
+    try:
+        return json.loads(body)
+    except ValueError:
+        return None
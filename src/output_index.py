@@ -0,0 +1,230 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+输出目录的元数据索引 - 评论列表页面不再每次读取全部文件
+
+索引保存在 cache/output_index.db（SQLite）中，每个文件一行：路径、修改时间、大小、评论行数、AppID、游戏标题。
+  - 写入器每次写入后调用 note_output_write()，增量更新行数、修改时间和大小
+  - 列表页面调用 OutputIndex.refresh()，只对output目录做一次stat扫描，
+    修改时间或大小与索引不一致的文件才重新统计，已删除的文件从索引中移除
+"""
+
+import os
+import re
+import csv
+import json
+import logging
+import sqlite3
+import threading
+
+from json_cache import CACHE_DIR
+
+logger = logging.getLogger("output_index")
+
+OUTPUT_DIR = "output"
+INDEX_FILE = os.path.join(CACHE_DIR, "output_index.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    rows INTEGER,
+    app_id TEXT,
+    title TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_files_app ON files(kind, app_id);
+"""
+
+# Steam评论CSV文件名：<游戏标题>_评论_<AppID>.csv
+STEAM_CSV_PATTERN = re.compile(r'评论_(\d+)\.csv$')
+
+
+def count_csv_rows(path):
+    """CSV文件中的数据行数（不含标题行，按CSV记录计算，内容中的换行不会多计）"""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        return max(0, sum(1 for _ in csv.reader(f)) - 1)
+
+
+def read_json_title(path):
+    """读取Steam评论JSON文件中的游戏标题"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f).get('game_title')
+    except Exception:
+        return None
+
+
+class OutputIndex:
+    """输出目录中评论文件的元数据索引"""
+
+    def __init__(self, output_dir=OUTPUT_DIR, path=INDEX_FILE):
+        """
+        Args:
+            output_dir: 输出目录
+            path: 索引数据库文件路径
+        """
+        self.output_dir = os.path.abspath(output_dir)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        # 索引可以随时通过扫描重建，写入时不需要等待落盘
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def _classify(self, path):
+        """返回 (类型, AppID)：csv为输出目录下的CSV，json为子目录中的评论JSON，其他文件返回(None, None)"""
+        relative = os.path.relpath(path, self.output_dir)
+        if relative.startswith(os.pardir):
+            return None, None
+        name = os.path.basename(path)
+        if name.endswith('.csv') and os.sep not in relative:
+            match = STEAM_CSV_PATTERN.search(name)
+            return ('csv_steam' if match else 'csv'), (match.group(1) if match else None)
+        if name.endswith('.json'):
+            parent = os.path.basename(os.path.dirname(path))
+            return 'json', (parent[len('app_'):] if parent.startswith('app_') else None)
+        return None, None
+
+    def _build_entry(self, path, stat):
+        kind, app_id = self._classify(path)
+        rows = None
+        title = None
+        if kind == 'json':
+            rows = 1
+        elif "评论_" in os.path.basename(path):
+            try:
+                rows = count_csv_rows(path)
+            except Exception as e:
+                logger.warning(f"统计CSV文件 {path} 的行数失败: {e}")
+        if kind == 'csv_steam':
+            title = os.path.basename(path).replace(f"_评论_{app_id}.csv", "")
+        return (path, kind, stat.st_mtime, stat.st_size, rows, app_id, title)
+
+    def _scan(self):
+        """stat扫描输出目录：顶层的CSV文件和各子目录中的JSON文件"""
+        found = {}
+        if not os.path.isdir(self.output_dir):
+            return found
+        for entry in os.scandir(self.output_dir):
+            if entry.is_file() and entry.name.endswith('.csv'):
+                found[entry.path] = entry.stat()
+        for root, dirs, files in os.walk(self.output_dir):
+            for name in files:
+                if name.endswith('.json'):
+                    path = os.path.join(root, name)
+                    try:
+                        found[path] = os.stat(path)
+                    except OSError:
+                        pass
+        return found
+
+    def refresh(self):
+        """按修改时间和大小重新校验索引，只重新统计有变化的文件
+
+        Returns:
+            int: 重新统计的文件数
+        """
+        found = self._scan()
+        with self._lock:
+            known = {row['path']: (row['mtime'], row['size'])
+                     for row in self.conn.execute("SELECT path, mtime, size FROM files")}
+            changed = [path for path, stat in found.items() if known.get(path) != (stat.st_mtime, stat.st_size)]
+            removed = [path for path in known if path not in found]
+            with self.conn:
+                self.conn.executemany("DELETE FROM files WHERE path = ?", [(path,) for path in removed])
+                for path in changed:
+                    self.conn.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                      self._build_entry(path, found[path]))
+        if changed or removed:
+            logger.info(f"输出目录索引已更新：{len(changed)} 个文件重新统计，{len(removed)} 个文件已删除")
+        return len(changed)
+
+    def note_write(self, path, added_rows=None, app_id=None, title=None):
+        """写入器写入文件后调用，增量更新该文件的索引
+
+        Args:
+            path: 刚写入的文件
+            added_rows: 本次追加的评论行数，None表示文件被整体重写（重新统计）
+            app_id: 可选的AppID
+            title: 可选的游戏标题（避免之后为了标题再读取文件）
+        """
+        path = os.path.abspath(path)
+        kind, path_app_id = self._classify(path)
+        if kind is None:
+            return
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return
+        with self._lock, self.conn:
+            row = self.conn.execute("SELECT rows FROM files WHERE path = ?", (path,)).fetchone()
+            if row is None or row['rows'] is None or added_rows is None:
+                entry = list(self._build_entry(path, stat))
+            else:
+                entry = [path, kind, stat.st_mtime, stat.st_size, row['rows'] + added_rows, path_app_id, None]
+            entry[5] = app_id or entry[5]
+            self.conn.execute(
+                "INSERT INTO files VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT(path) DO UPDATE SET "
+                "mtime = excluded.mtime, size = excluded.size, rows = excluded.rows, "
+                "app_id = COALESCE(excluded.app_id, files.app_id), title = COALESCE(?, files.title)",
+                entry + [title])
+
+    def csv_files(self):
+        """输出目录下的CSV文件，按修改时间从新到旧"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT * FROM files WHERE kind IN ('csv', 'csv_steam') ORDER BY mtime DESC").fetchall()
+        return [dict(row) for row in rows]
+
+    def json_groups(self):
+        """按AppID分组的Steam评论JSON文件，按最新修改时间从新到旧
+
+        Returns:
+            list: [{"app_id", "count", "size", "mtime", "title"}, ...]，标题未知时读取该组的一个文件并记入索引
+        """
+        with self._lock:
+            groups = [dict(row) for row in self.conn.execute(
+                "SELECT app_id, COUNT(*) AS count, SUM(size) AS size, MAX(mtime) AS mtime, MAX(title) AS title "
+                "FROM files WHERE kind = 'json' AND app_id IS NOT NULL GROUP BY app_id ORDER BY mtime DESC")]
+            for group in groups:
+                if group['title']:
+                    continue
+                first = self.conn.execute("SELECT path FROM files WHERE kind = 'json' AND app_id = ? LIMIT 1",
+                                          (group['app_id'],)).fetchone()
+                title = read_json_title(first['path']) if first else None
+                if title:
+                    group['title'] = title
+                    with self.conn:
+                        self.conn.execute("UPDATE files SET title = ? WHERE path = ?", (title, first['path']))
+        return groups
+
+    def close(self):
+        self.conn.close()
+
+
+_shared_index = None
+_shared_index_lock = threading.Lock()
+
+
+def get_output_index():
+    """获取进程内共享的索引实例"""
+    global _shared_index
+    with _shared_index_lock:
+        if _shared_index is None:
+            _shared_index = OutputIndex()
+        return _shared_index
+
+
+def note_output_write(path, added_rows=None, app_id=None, title=None):
+    """写入器写入文件后调用，更新输出目录索引（不在输出目录中的文件会被忽略，出错时只记录日志）"""
+    try:
+        get_output_index().note_write(path, added_rows, app_id, title)
+    except Exception as e:
+        logger.debug(f"更新输出目录索引失败: {path} {e}")
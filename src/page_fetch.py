@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+页面内请求引擎 - 在已登录的浏览器页面中并发请求评论接口
+
+部分接口依赖浏览器中的cookies和签名，直接用requests请求会失败。这里在正常加载
+一次页面之后，通过 execute_async_script 在页面上下文中并发执行 fetch()，
+请求自动带上页面的cookies，结果按批次返回给Python，吞吐量接近直接调用接口。
+
+多个任务共用一个WebDriver会话时（见 browser_contexts），等待整批请求完成的异步脚本
+会一直占用会话。此时改为先启动请求、立即返回，结果保存在页面中，
+再用很短的脚本轮询，轮询间隔不占用会话。
+"""
+
+import math
+import time
+import uuid
+import logging
+
+logger = logging.getLogger("page_fetch")
+
+# 默认同时进行的请求数
+DEFAULT_MAX_IN_FLIGHT = 4
+# 单个请求的超时时间（秒）
+REQUEST_TIMEOUT = 20
+# 脚本超时之外额外预留的时间（秒）
+SCRIPT_TIMEOUT_MARGIN = 10
+# 共用会话时轮询结果的间隔（秒）
+POLL_INTERVAL = 0.2
+
+# 在页面中并发请求一批URL，同时进行的请求数不超过limit。
+# 每个响应按需用extract函数（在页面中执行，参数为响应文本）转换，否则尝试解析为JSON。
+FETCH_BATCH_SCRIPT = """
+var urls = arguments[0], limit = arguments[1], timeoutMs = arguments[2];
+var extractSource = arguments[3], asJson = arguments[4], storeKey = arguments[5];
+var done = arguments[arguments.length - 1];
+if (storeKey) {
+    // 结果保存在页面中，由POLL_BATCH_SCRIPT读取，脚本立即返回
+    window.__pageFetchResults = window.__pageFetchResults || {};
+    done(null);
+    done = function(results) { window.__pageFetchResults[storeKey] = results; };
+}
+var extract = extractSource ? new Function('text', extractSource) : null;
+var results = new Array(urls.length), next = 0, finished = 0;
+
+function finish(index, result) {
+    results[index] = result;
+    finished++;
+    if (finished === urls.length) {
+        done(results);
+    } else {
+        launch();
+    }
+}
+
+function launch() {
+    if (next >= urls.length) {
+        return;
+    }
+    var index = next++;
+    var controller = new AbortController();
+    var timer = setTimeout(function() { controller.abort(); }, timeoutMs);
+    fetch(urls[index], {credentials: 'include', signal: controller.signal})
+        .then(function(response) {
+            return response.text().then(function(text) {
+                var result = {status: response.status, data: null, error: null};
+                try {
+                    if (extract) {
+                        result.data = extract(text);
+                    } else if (asJson) {
+                        result.data = JSON.parse(text);
+                    } else {
+                        result.data = text;
+                    }
+                } catch (e) {
+                    result.error = 'parse: ' + e;
+                }
+                return result;
+            });
+        })
+        .catch(function(e) {
+            return {status: 0, data: null, error: String(e)};
+        })
+        .then(function(result) {
+            clearTimeout(timer);
+            finish(index, result);
+        });
+}
+
+if (urls.length === 0) {
+    done([]);
+} else {
+    for (var i = 0; i < Math.min(limit, urls.length); i++) {
+        launch();
+    }
+}
+"""
+
+# 读取并删除保存在页面中的一批结果，尚未完成时返回null
+POLL_BATCH_SCRIPT = """
+var store = window.__pageFetchResults || {};
+var results = store[arguments[0]];
+if (results === undefined) {
+    return null;
+}
+delete store[arguments[0]];
+return results;
+"""
+
+
+class PageFetcher:
+    """在当前页面上下文中并发请求接口"""
+
+    def __init__(self, driver, max_in_flight=DEFAULT_MAX_IN_FLIGHT, request_timeout=REQUEST_TIMEOUT):
+        """初始化请求引擎
+
+        Args:
+            driver: 已经打开目标站点页面的WebDriver实例
+            max_in_flight: 同时进行的最大请求数
+            request_timeout: 单个请求的超时时间（秒）
+        """
+        self.driver = driver
+        self.max_in_flight = max(1, max_in_flight)
+        self.request_timeout = request_timeout
+        # 会话由多个浏览器上下文共用时改为启动后轮询，不长时间占用会话
+        self.poll_results = getattr(driver, "shared_session", False)
+
+    def fetch_batch(self, urls, extract_script=None, as_json=True):
+        """并发请求一批URL
+
+        Args:
+            urls: URL列表（需与当前页面同源，或接口允许跨域携带cookies）
+            extract_script: 在页面中处理响应文本的函数体（参数名为text），返回值作为data
+            as_json: 未提供extract_script时是否把响应解析为JSON
+
+        Returns:
+            list: 与urls一一对应的结果，元素为 {"url", "status", "data", "error"}
+        """
+        if not urls:
+            return []
+        rounds = math.ceil(len(urls) / self.max_in_flight)
+        script_timeout = self.request_timeout * rounds + SCRIPT_TIMEOUT_MARGIN
+        try:
+            previous_timeout = self.driver.timeouts.script
+        except Exception:
+            previous_timeout = None
+
+        self.driver.set_script_timeout(SCRIPT_TIMEOUT_MARGIN if self.poll_results else script_timeout)
+        try:
+            if self.poll_results:
+                raw_results = self._fetch_polled(urls, extract_script, as_json, script_timeout)
+            else:
+                raw_results = self.driver.execute_async_script(
+                    FETCH_BATCH_SCRIPT, list(urls), self.max_in_flight,
+                    int(self.request_timeout * 1000), extract_script, as_json, None
+                ) or []
+        finally:
+            if previous_timeout:
+                self.driver.set_script_timeout(previous_timeout)
+
+        results = []
+        for url, raw in zip(urls, raw_results):
+            raw = raw or {}
+            result = {"url": url, "status": raw.get("status", 0),
+                      "data": raw.get("data"), "error": raw.get("error")}
+            if result["error"] or result["status"] >= 400:
+                logger.warning(f"页面内请求失败 ({result['status']}): {url} {result['error'] or ''}")
+            results.append(result)
+        return results
+
+    def _fetch_polled(self, urls, extract_script, as_json, timeout):
+        """启动一批请求后轮询结果，超时（例如页面已跳转）时返回失败的结果"""
+        key = uuid.uuid4().hex
+        self.driver.execute_async_script(
+            FETCH_BATCH_SCRIPT, list(urls), self.max_in_flight,
+            int(self.request_timeout * 1000), extract_script, as_json, key
+        )
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            # 轮询间隔中不占用浏览器会话，其他上下文的命令可以执行
+            time.sleep(POLL_INTERVAL)
+            results = self.driver.execute_script(POLL_BATCH_SCRIPT, key)
+            if results is not None:
+                return results
+        logger.warning(f"等待页面内请求结果超时（{timeout} 秒）")
+        return [{"status": 0, "error": "timeout"} for _ in urls]
+
+    def iter_page_batches(self, make_url, first_page=1, last_page=None, pages_per_batch=None,
+                          extract_script=None, as_json=True):
+        """按页码分批并发请求，每批返回一组结果，由调用方决定何时停止
+
+        Args:
+            make_url: 根据页码生成URL的函数
+            first_page: 起始页码
+            last_page: 最后一页页码（包含），None表示不限制
+            pages_per_batch: 每批请求的页数，默认等于最大并发数
+            extract_script: 同fetch_batch
+            as_json: 同fetch_batch
+
+        Yields:
+            list: 元素为 (页码, 结果) 的列表
+        """
+        pages_per_batch = pages_per_batch or self.max_in_flight
+        page = first_page
+        while last_page is None or page <= last_page:
+            end = page + pages_per_batch - 1
+            if last_page is not None:
+                end = min(end, last_page)
+            pages = list(range(page, end + 1))
+            results = self.fetch_batch([make_url(p) for p in pages], extract_script, as_json)
+            yield list(zip(pages, results))
+            page = end + 1
@@ -0,0 +1,218 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+浏览器用户数据目录池 - 复用预热过的浏览器配置目录
+
+每个爬虫从池中租用一个固定的user-data-dir，HTTP缓存和cookies在多次运行之间保留，
+浏览器不必每次冷启动。归还时的清理工作在后台线程中完成，不占用爬取时间；
+目录体积超过上限时会被回收（删除后重建为空目录）。
+"""
+
+import os
+import time
+import shutil
+import logging
+import tempfile
+import threading
+
+logger = logging.getLogger("profile_pool")
+
+# 配置目录池的位置和容量
+PROFILE_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "browser_profiles")
+MAX_PROFILES = 8  # 池中最多保留的配置目录数量
+MAX_PROFILE_SIZE_MB = 500  # 单个配置目录的体积上限，超过后回收
+
+# 浏览器退出后可能残留的单例锁文件，不清理会导致下次启动失败
+SINGLETON_FILES = ["SingletonLock", "SingletonCookie", "SingletonSocket"]
+
+LOCK_FILE_NAME = ".lease.lock"
+DISPOSABLE_PREFIX = "tmp_"
+
+
+def _pid_alive(pid):
+    """检查进程是否仍在运行"""
+    if pid <= 0:
+        return False
+    if os.name == 'nt':
+        try:
+            import ctypes
+            PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+            handle = ctypes.windll.kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+            if not handle:
+                return False
+            ctypes.windll.kernel32.CloseHandle(handle)
+            return True
+        except Exception:
+            return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _dir_size_mb(path):
+    """计算目录总大小（MB）"""
+    total = 0
+    for root, dirs, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total / (1024 * 1024)
+
+
+def _remove_tree(path, attempts=5, delay=2):
+    """多次尝试删除目录，浏览器进程可能还没有完全释放文件"""
+    for attempt in range(attempts):
+        shutil.rmtree(path, ignore_errors=True)
+        if not os.path.exists(path):
+            return True
+        time.sleep(delay)
+    logger.warning(f"无法自动清理目录，您可以手动删除: {path}")
+    return False
+
+
+class ProfilePool:
+    """浏览器配置目录池，支持跨进程租用（通过锁文件实现）"""
+
+    def __init__(self, root=PROFILE_ROOT, max_profiles=MAX_PROFILES, max_size_mb=MAX_PROFILE_SIZE_MB):
+        """初始化配置目录池
+
+        Args:
+            root: 配置目录池的根目录
+            max_profiles: 池中最多保留的配置目录数量
+            max_size_mb: 单个配置目录的体积上限（MB）
+        """
+        self.root = root
+        self.max_profiles = max_profiles
+        self.max_size_mb = max_size_mb
+        self._cleanup_threads = []
+        os.makedirs(self.root, exist_ok=True)
+
+    def _lock_path(self, profile_dir):
+        return os.path.join(profile_dir, LOCK_FILE_NAME)
+
+    def _try_acquire(self, profile_dir):
+        """尝试获取配置目录的租用锁"""
+        os.makedirs(profile_dir, exist_ok=True)
+        lock_path = self._lock_path(profile_dir)
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            # 持有锁的进程已经退出时，视为过期锁并回收
+            try:
+                with open(lock_path, 'r') as f:
+                    owner_pid = int(f.read().strip() or 0)
+            except (OSError, ValueError):
+                return False
+            if owner_pid == os.getpid() or _pid_alive(owner_pid):
+                return False
+            logger.info(f"回收过期的配置目录锁: {profile_dir} (进程 {owner_pid} 已退出)")
+            try:
+                os.remove(lock_path)
+            except OSError:
+                return False
+            return self._try_acquire(profile_dir)
+        with os.fdopen(fd, 'w') as f:
+            f.write(str(os.getpid()))
+        return True
+
+    def lease(self):
+        """租用一个配置目录
+
+        Returns:
+            str: 配置目录路径。池中目录都在使用时返回一个一次性的临时目录
+        """
+        for index in range(self.max_profiles):
+            profile_dir = os.path.join(self.root, f"profile_{index}")
+            if self._try_acquire(profile_dir):
+                for name in SINGLETON_FILES:
+                    try:
+                        os.remove(os.path.join(profile_dir, name))
+                    except OSError:
+                        pass
+                logger.info(f"租用浏览器配置目录: {profile_dir}")
+                return profile_dir
+        temp_dir = tempfile.mkdtemp(prefix=DISPOSABLE_PREFIX, dir=self.root)
+        logger.info(f"配置目录池已满，使用一次性临时目录: {temp_dir}")
+        return temp_dir
+
+    def release(self, profile_dir, wait=False):
+        """归还配置目录，清理工作在后台线程中进行
+
+        Args:
+            profile_dir: lease()返回的配置目录
+            wait: 是否等待后台清理完成
+        """
+        thread = threading.Thread(target=self._finish_release, args=(profile_dir,),
+                                  name="profile-cleanup")
+        thread.start()
+        self._cleanup_threads = [t for t in self._cleanup_threads if t.is_alive()]
+        self._cleanup_threads.append(thread)
+        if wait:
+            thread.join()
+
+    def discard(self, path, wait=False):
+        """在后台删除不属于池的目录（例如调用方自行指定的临时目录）"""
+        thread = threading.Thread(target=_remove_tree, args=(path,), name="profile-discard")
+        thread.start()
+        self._cleanup_threads.append(thread)
+        if wait:
+            thread.join()
+
+    def _finish_release(self, profile_dir):
+        """后台清理：删除一次性目录，回收超限目录，最后释放租用锁"""
+        try:
+            if os.path.basename(profile_dir).startswith(DISPOSABLE_PREFIX):
+                _remove_tree(profile_dir)
+                return
+            size_mb = _dir_size_mb(profile_dir)
+            if size_mb > self.max_size_mb:
+                logger.info(f"配置目录 {profile_dir} 大小 {size_mb:.0f}MB 超过上限 {self.max_size_mb}MB，回收重建")
+                lock_path = self._lock_path(profile_dir)
+                for entry in os.listdir(profile_dir):
+                    entry_path = os.path.join(profile_dir, entry)
+                    if entry_path == lock_path:
+                        continue
+                    if os.path.isdir(entry_path):
+                        _remove_tree(entry_path)
+                    else:
+                        try:
+                            os.remove(entry_path)
+                        except OSError:
+                            pass
+            for name in SINGLETON_FILES:
+                try:
+                    os.remove(os.path.join(profile_dir, name))
+                except OSError:
+                    pass
+        except Exception as e:
+            logger.warning(f"清理配置目录 {profile_dir} 时出错: {e}")
+        finally:
+            try:
+                os.remove(self._lock_path(profile_dir))
+            except OSError:
+                pass
+
+    def wait_for_cleanup(self, timeout=None):
+        """等待所有后台清理任务完成"""
+        for thread in list(self._cleanup_threads):
+            thread.join(timeout)
+
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+
+def get_profile_pool():
+    """获取进程内共享的配置目录池"""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = ProfilePool()
+        return _default_pool
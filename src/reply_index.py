@@ -0,0 +1,216 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+B站评论线程索引 - 把评论的父子关系保存在CSV旁边的SQLite数据库中
+
+CSV中的线程结构只体现在"3.2"这样的编号里，重建线程需要解析编号并扫描整个文件。
+ReplyIndex 按评论ID保存每条评论的父评论ID和根评论ID，并为每个线程维护回复数：
+  - 按根评论ID建立索引，读取一个线程只访问该线程的评论
+  - 线程回复数按大小建立索引，"回复最多的线程"只读取前N个线程
+
+用法:
+    python reply_index.py <评论CSV或索引文件> [--top 10] [--thread 评论ID]
+    传入CSV时会先根据其中的评论ID列建立（或补全）索引
+"""
+
+import os
+import csv
+import sys
+import logging
+import sqlite3
+import argparse
+
+logger = logging.getLogger("reply_index")
+
+# 索引文件与CSV同名，扩展名替换为该后缀
+INDEX_SUFFIX = "_replies.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS replies (
+    reply_id TEXT PRIMARY KEY,
+    parent_id TEXT,
+    root_id TEXT,
+    number TEXT,
+    user_name TEXT,
+    user_id TEXT,
+    content TEXT,
+    publish_time TEXT,
+    likes TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_replies_root ON replies(root_id);
+CREATE INDEX IF NOT EXISTS idx_replies_parent ON replies(parent_id);
+CREATE TABLE IF NOT EXISTS threads (
+    root_id TEXT PRIMARY KEY,
+    size INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_threads_size ON threads(size DESC);
+"""
+
+# 评论记录的列 -> replies表的列
+RECORD_COLUMNS = [
+    ('评论ID', 'reply_id'),
+    ('父评论ID', 'parent_id'),
+    ('根评论ID', 'root_id'),
+    ('编号', 'number'),
+    ('用户名', 'user_name'),
+    ('用户ID', 'user_id'),
+    ('评论内容', 'content'),
+    ('发布时间', 'publish_time'),
+    ('点赞数', 'likes')
+]
+
+
+def index_path(csv_filename):
+    """评论CSV对应的索引文件路径"""
+    return os.path.splitext(csv_filename)[0] + INDEX_SUFFIX
+
+
+class ReplyIndex:
+    """评论父子关系索引（SQLite）"""
+
+    def __init__(self, path):
+        """
+        Args:
+            path: 索引数据库文件路径，不存在时自动创建
+        """
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(SCHEMA)
+
+    def add_records(self, records):
+        """加入评论记录（包含评论ID、父评论ID、根评论ID列），已存在的评论会被忽略
+
+        Returns:
+            int: 新增的评论数量
+        """
+        added = 0
+        with self.conn:
+            for record in records:
+                reply_id = str(record.get('评论ID') or '')
+                if not reply_id:
+                    continue
+                values = [None if record.get(key) in (None, '') else str(record.get(key))
+                          for key, _ in RECORD_COLUMNS]
+                cursor = self.conn.execute(
+                    f"INSERT OR IGNORE INTO replies ({', '.join(column for _, column in RECORD_COLUMNS)}) "
+                    f"VALUES ({', '.join('?' for _ in RECORD_COLUMNS)})", values)
+                if not cursor.rowcount:
+                    continue
+                added += 1
+                # 一级评论创建线程，二级评论增加所属线程的回复数（二级评论可能先于一级评论写入）
+                root_id = values[2] or reply_id
+                self.conn.execute("INSERT OR IGNORE INTO threads (root_id, size) VALUES (?, 0)", (root_id,))
+                if values[2]:
+                    self.conn.execute("UPDATE threads SET size = size + 1 WHERE root_id = ?", (root_id,))
+        return added
+
+    def get(self, reply_id):
+        """读取一条评论，不存在时返回None"""
+        row = self.conn.execute("SELECT * FROM replies WHERE reply_id = ?", (str(reply_id),)).fetchone()
+        return dict(row) if row else None
+
+    def thread(self, reply_id):
+        """读取评论所在的整个线程
+
+        Args:
+            reply_id: 线程中任意一条评论的ID
+
+        Returns:
+            list: 一级评论在前，随后是按写入顺序排列的二级评论，评论不存在时为空列表
+        """
+        reply = self.get(reply_id)
+        if not reply:
+            return []
+        root_id = reply['root_id'] or reply['reply_id']
+        root = self.get(root_id)
+        subs = self.conn.execute("SELECT * FROM replies WHERE root_id = ? ORDER BY rowid", (root_id,)).fetchall()
+        return ([root] if root else []) + [dict(row) for row in subs]
+
+    def children(self, reply_id):
+        """读取直接回复该评论的评论"""
+        rows = self.conn.execute("SELECT * FROM replies WHERE parent_id = ? ORDER BY rowid", (str(reply_id),))
+        return [dict(row) for row in rows]
+
+    def top_threads(self, limit=10):
+        """回复数最多的线程
+
+        Returns:
+            list: [(一级评论, 回复数), ...]，一级评论不在索引中时为只含reply_id的字典
+        """
+        rows = self.conn.execute("SELECT root_id, size FROM threads ORDER BY size DESC LIMIT ?", (limit,)).fetchall()
+        return [(self.get(row['root_id']) or {'reply_id': row['root_id']}, row['size']) for row in rows]
+
+    def close(self):
+        self.conn.close()
+
+
+def write_reply_index(csv_filename, records):
+    """把刚写入CSV的评论记录加入对应的索引文件
+
+    Returns:
+        int: 新增的评论数量
+    """
+    index = ReplyIndex(index_path(csv_filename))
+    try:
+        return index.add_records(records)
+    finally:
+        index.close()
+
+
+def build_index(csv_filename):
+    """根据已有的评论CSV建立（或补全）索引
+
+    Returns:
+        str: 索引文件路径，CSV中没有评论ID列时返回None
+    """
+    with open(csv_filename, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.DictReader(f)
+        if '评论ID' not in (reader.fieldnames or []):
+            logger.warning(f"{csv_filename} 中没有评论ID列，无法建立索引")
+            return None
+        added = write_reply_index(csv_filename, reader)
+    logger.info(f"已为 {csv_filename} 建立索引，新增 {added} 条评论")
+    return index_path(csv_filename)
+
+
+def _format_reply(reply):
+    content = (reply.get('content') or '').replace('\n', ' ')
+    if len(content) > 40:
+        content = content[:37] + "..."
+    return f"[{reply.get('number') or '-'}] {reply.get('user_name') or ''}: {content}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="查询B站评论的线程索引")
+    parser.add_argument("path", help="评论CSV文件或索引文件")
+    parser.add_argument("--top", type=int, default=10, help="显示回复数最多的N个线程")
+    parser.add_argument("--thread", help="显示该评论所在的整个线程")
+    args = parser.parse_args()
+
+    db_path = args.path
+    if not args.path.endswith(INDEX_SUFFIX):
+        db_path = build_index(args.path)
+        if not db_path:
+            print("CSV中没有评论ID列，请使用新版爬虫重新爬取")
+            sys.exit(1)
+
+    index = ReplyIndex(db_path)
+    try:
+        if args.thread:
+            replies = index.thread(args.thread)
+            if not replies:
+                print(f"索引中没有评论 {args.thread}")
+            for reply in replies:
+                indent = "    " if reply.get('root_id') else ""
+                print(f"{indent}{_format_reply(reply)}")
+        else:
+            for root, size in index.top_threads(args.top):
+                print(f"{size:6d} 条回复  {_format_reply(root)}")
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
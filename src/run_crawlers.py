@@ -141,8 +141,9 @@ def main():
                 # 确保关闭driver
                 if driver:
                     try:
-                        driver.quit()
-                        logger.info("浏览器实例已关闭")
+                        from driver_pool import release_driver
+                        release_driver(driver)
+                        logger.info("浏览器实例已归还")
                     except:
                         pass
                 logger.info("爬虫任务结束")
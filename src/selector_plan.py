@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+选择器方案学习 - 从前几条评论中学习每个字段使用哪个选择器
+
+页面中同一列表的评论结构相同，逐条尝试所有候选选择器是重复劳动。
+SelectorPlan 在学习阶段对前几条评论按优先级尝试候选选择器，统计每个选择器
+实际提供字段值的次数，选出每个字段提供次数最多的选择器组成方案；之后的评论优先使用
+方案中的选择器，未命中时再按优先级尝试其余候选选择器，单条评论的字段不会丢失。
+如果方案中的选择器最近的命中率明显低于学习时的命中率（例如页面中出现了另一种结构），
+重新进入学习阶段。
+"""
+
+import logging
+from collections import Counter, deque
+
+logger = logging.getLogger("selector_plan")
+
+# 学习阶段使用的评论数量
+DEFAULT_LEARN_SIZE = 5
+# 统计最近命中率的评论数量
+DEFAULT_WINDOW = 20
+# 最近命中率比学习时低多少时重新学习
+DEFAULT_MAX_DROP = 0.3
+
+
+class FieldRule:
+    """一个字段的候选选择器及取值方法"""
+
+    def __init__(self, name, selectors, extract):
+        """
+        Args:
+            name: 字段名
+            selectors: 候选CSS选择器列表，按优先级排列
+            extract: 从匹配的元素中取值的函数，返回空值表示未命中
+        """
+        self.name = name
+        self.selectors = list(selectors)
+        self.extract = extract
+
+
+class SelectorPlan:
+    """学习并应用每个字段的选择器方案"""
+
+    def __init__(self, rules, learn_size=DEFAULT_LEARN_SIZE, window=DEFAULT_WINDOW, max_drop=DEFAULT_MAX_DROP):
+        """
+        Args:
+            rules: FieldRule列表
+            learn_size: 学习阶段使用的评论数量
+            window: 统计最近命中率的评论数量
+            max_drop: 最近命中率比学习时低多少时重新学习
+        """
+        self.rules = list(rules)
+        self.learn_size = learn_size
+        self.window = window
+        self.max_drop = max_drop
+        self.plan = None  # 字段名 -> 选择器（None表示学习时没有任何选择器命中）
+        self.learned_rates = {}  # 字段名 -> 学习阶段的命中率
+        self.relearn_count = 0
+        self._start_learning()
+        # 整体统计：字段名 -> {"lookups", "hits", "selectors": Counter}
+        self.stats = {rule.name: {"lookups": 0, "hits": 0, "selectors": Counter()} for rule in self.rules}
+
+    def _start_learning(self):
+        self.plan = None
+        self._learned_items = 0
+        self._learn_hits = {rule.name: Counter() for rule in self.rules}
+        self._recent = {rule.name: deque(maxlen=self.window) for rule in self.rules}
+
+    def _try(self, rule, item, selector):
+        try:
+            tag = item.select_one(selector)
+        except Exception:
+            return None
+        if tag is None:
+            return None
+        return rule.extract(tag) or None
+
+    def _first_match(self, rule, item, skip=None):
+        """按优先级尝试候选选择器，返回 (值, 选择器)，都未命中时返回 (None, None)"""
+        for selector in rule.selectors:
+            if selector == skip:
+                continue
+            value = self._try(rule, item, selector)
+            if value is not None:
+                return value, selector
+        return None, None
+
+    def _learn(self, item):
+        """学习阶段：按优先级尝试候选选择器，只统计实际提供字段值的选择器"""
+        values = {}
+        for rule in self.rules:
+            value, selector = self._first_match(rule, item)
+            if selector:
+                self._learn_hits[rule.name][selector] += 1
+                self.stats[rule.name]["selectors"][selector] += 1
+            values[rule.name] = value
+
+        self._learned_items += 1
+        if self._learned_items >= self.learn_size:
+            self._compile()
+        return values
+
+    def _compile(self):
+        """根据学习阶段各选择器提供字段值的次数确定方案，次数相同时取优先级高的选择器"""
+        plan = {}
+        for rule in self.rules:
+            hits = self._learn_hits[rule.name]
+            best = None
+            for selector in rule.selectors:
+                if hits[selector] and (best is None or hits[selector] > hits[best]):
+                    best = selector
+            plan[rule.name] = best
+            self.learned_rates[rule.name] = hits[best] / self._learned_items if best else 0.0
+        self.plan = plan
+        logger.info("选择器方案: " + "，".join(f"{name}={selector or '无'}" for name, selector in plan.items()))
+
+    def _apply(self, item):
+        """应用阶段：每个字段优先使用方案中的选择器，未命中时按优先级尝试其余候选选择器"""
+        values = {}
+        for rule in self.rules:
+            selector = self.plan.get(rule.name)
+            value = self._try(rule, item, selector) if selector else None
+            # 最近命中率只统计方案中的选择器，用于判断是否需要重新学习
+            self._recent[rule.name].append(value is not None)
+            if value is None:
+                value, selector = self._first_match(rule, item, skip=selector)
+            if value is not None:
+                self.stats[rule.name]["selectors"][selector] += 1
+            values[rule.name] = value
+
+        for rule in self.rules:
+            recent = self._recent[rule.name]
+            if len(recent) < self.window:
+                continue
+            rate = sum(recent) / len(recent)
+            if rate < self.learned_rates.get(rule.name, 0) - self.max_drop:
+                logger.info(f"字段 {rule.name} 最近命中率 {rate:.0%} 低于学习时的 "
+                            f"{self.learned_rates[rule.name]:.0%}，重新学习选择器方案")
+                self.relearn_count += 1
+                self._start_learning()
+                break
+        return values
+
+    def extract(self, item):
+        """从一条评论中提取所有字段
+
+        Args:
+            item: 支持select_one()的评论元素
+
+        Returns:
+            dict: 字段名 -> 值，未命中的字段为None
+        """
+        values = self._learn(item) if self.plan is None else self._apply(item)
+        for name, value in values.items():
+            self.stats[name]["lookups"] += 1
+            if value is not None:
+                self.stats[name]["hits"] += 1
+        return values
+
+    def format_stats(self):
+        """把每个字段的命中统计格式化为多行文本"""
+        lines = []
+        for rule in self.rules:
+            stat = self.stats[rule.name]
+            lookups = stat["lookups"]
+            rate = stat["hits"] / lookups if lookups else 0.0
+            used = "，".join(f"{selector} x{count}" for selector, count in stat["selectors"].most_common(3))
+            lines.append(f"  {rule.name}: 命中 {stat['hits']}/{lookups} ({rate:.0%})" + (f"，{used}" if used else ""))
+        if self.relearn_count:
+            lines.append(f"  重新学习 {self.relearn_count} 次")
+        return "\n".join(lines)
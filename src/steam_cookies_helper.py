@@ -10,60 +10,23 @@ import os
 import pickle
 import json
 import time
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
-from webdriver_manager.chrome import ChromeDriverManager
 from pathlib import Path
 
+from driver_pool import lease_driver, release_driver
+
 def setup_driver(use_headless=False):
-    """设置Chrome WebDriver"""
-    options = webdriver.ChromeOptions()
-    
-    if use_headless:
-        options.add_argument('--headless=new')
-    
-    # 基本设置
-    options.add_argument('--disable-gpu')
-    options.add_argument('--no-sandbox')
-    options.add_argument('--disable-dev-shm-usage')
-    options.add_argument('--window-size=1920,1080')
-    
-    # 绕过反爬虫
-    options.add_argument('--disable-blink-features=AutomationControlled')
-    options.add_experimental_option('excludeSwitches', ['enable-automation'])
-    options.add_experimental_option('useAutomationExtension', False)
-    
-    # 设置用户代理
-    options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
+    """从共享浏览器池获取Chrome WebDriver"""
+    print("正在从共享浏览器池获取ChromeDriver...")
+    driver = lease_driver("chrome", use_headless)
+    print("ChromeDriver初始化成功")
     
-    # 为macOS找到正确的Chrome路径
-    if os.name == 'posix' and os.path.exists("/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"):
-        options.binary_location = "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"
-        print("使用macOS系统Chrome路径")
+    # 设置超时时间
+    driver.set_page_load_timeout(60)
+    driver.set_script_timeout(60)
+    driver.implicitly_wait(20)
     
-    try:
-        print("正在初始化ChromeDriver...")
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=options)
-        print("ChromeDriver初始化成功")
-        
-        # 设置超时时间
-        driver.set_page_load_timeout(60)
-        driver.set_script_timeout(60)
-        driver.implicitly_wait(20)
-        
-        return driver
-    except Exception as e:
-        print(f"ChromeDriver初始化失败: {e}")
-        try:
-            print("尝试备用方法初始化ChromeDriver...")
-            driver = webdriver.Chrome(options=options)
-            print("备用方法初始化成功")
-            return driver
-        except Exception as e2:
-            print(f"备用方法也失败: {e2}")
-            raise
+    return driver
 
 def login_and_save_cookies():
     """登录Steam并保存Cookies"""
@@ -202,7 +165,7 @@ def login_and_save_cookies():
         print(f"发生错误: {e}")
     finally:
         print("\n正在关闭浏览器...")
-        driver.quit()
+        release_driver(driver)
         print("完成！")
 
 def test_cookies():
@@ -246,7 +209,7 @@ def test_cookies():
         if not has_login_secure:
             print("⚠️ 警告: 未检测到steamLoginSecure cookie，可能无法正常登录")
             print("建议重新运行login_and_save_cookies()获取cookies")
-            driver.quit()
+            release_driver(driver)
             return
         
         for cookie in cookies:
@@ -314,7 +277,7 @@ def test_cookies():
         print(f"发生错误: {e}")
     finally:
         print("\n正在关闭浏览器...")
-        driver.quit()
+        release_driver(driver)
         print("测试完成！")
 
 if __name__ == "__main__":
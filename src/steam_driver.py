@@ -5,117 +5,43 @@
 Steam WebDriver模块 - 处理浏览器初始化和操作
 """
 
-import os
 import time
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
-from webdriver_manager.chrome import ChromeDriverManager
+from driver_pool import lease_driver
 
 # 导入配置
 from steam_config import (
-    CHROME_PATHS, USER_AGENT, PAGE_LOAD_TIMEOUT, 
-    SCRIPT_TIMEOUT, IMPLICIT_WAIT
+    USER_AGENT, PAGE_LOAD_TIMEOUT, SCRIPT_TIMEOUT, IMPLICIT_WAIT
+)
+
+# Steam需要的附加启动参数（共享浏览器池的通用参数之外）
+STEAM_BROWSER_ARGS = (
+    # Cookie相关设置 - 提高cookie处理的兼容性，避免cookie被清除或限制
+    '--enable-cookies',
+    '--cookies-without-same-site-must-be-secure=false',
+    '--disable-site-isolation-trials',
+    # 多个--disable-features只有最后一个生效，这里合并为一个
+    '--disable-features=TranslateUI,IsolateOrigins,site-per-process,BlockThirdPartyCookies,SameSiteByDefaultCookies',
+    '--disable-web-security',
+    '--allow-running-insecure-content',
+    # 会话保持相关设置
+    '--enable-file-cookies',
+    '--process-per-site',
+    # 设置用户代理
+    f'--user-agent={USER_AGENT}'
 )
 
 def setup_driver(use_headless=False):
-    """设置并初始化WebDriver
+    """从共享浏览器池获取WebDriver
     
     Args:
         use_headless (bool): 是否使用无头模式运行浏览器
         
     Returns:
-        WebDriver: 初始化好的WebDriver实例
+        WebDriver: 初始化好的WebDriver实例，使用完毕后调用release_driver()归还
     """
-    options = webdriver.ChromeOptions()
-    
-    # 基本设置
-    if use_headless:
-        options.add_argument('--headless=new')
-    
-    # 禁用各种可能导致问题的功能
-    options.add_argument('--disable-gpu')
-    options.add_argument('--no-sandbox')
-    options.add_argument('--disable-dev-shm-usage')
-    options.add_argument('--disable-features=TranslateUI')
-    options.add_argument('--disable-extensions')
-    options.add_argument('--disable-background-timer-throttling')
-    options.add_argument('--disable-backgrounding-occluded-windows')
-    options.add_argument('--disable-renderer-backgrounding')
-    
-    # 内存和稳定性相关选项
-    options.add_argument('--disable-web-security')
-    options.add_argument('--allow-running-insecure-content')
-    options.add_argument('--disable-popup-blocking')
-    options.add_argument('--ignore-certificate-errors')
-    options.add_argument('--window-size=1920,1080')
-    
-    # Cookie相关设置 - 提高cookie处理的兼容性
-    options.add_argument('--enable-cookies')
-    options.add_argument('--cookies-without-same-site-must-be-secure=false')
-    options.add_argument('--disable-site-isolation-trials')
-    
-    # 添加更多隐私设置，避免cookie被清除或限制
-    options.add_argument('--disable-features=IsolateOrigins,site-per-process')
-    options.add_argument('--disable-features=BlockThirdPartyCookies')
-    options.add_argument('--disable-features=SameSiteByDefaultCookies')
-    
-    # 会话保持相关设置
-    options.add_argument('--enable-file-cookies') 
-    options.add_argument('--process-per-site')
-    
-    # 绕过部分反爬虫机制
-    options.add_argument('--disable-blink-features=AutomationControlled')
-    options.add_experimental_option('excludeSwitches', ['enable-automation'])
-    options.add_experimental_option('useAutomationExtension', False)
-    
-    # 尝试显式指定Chrome路径
-    if os.name == 'nt':  # Windows
-        for path in CHROME_PATHS["windows"]:
-            expanded_path = os.path.expandvars(path)
-            if os.path.exists(expanded_path):
-                options.binary_location = expanded_path
-                print(f"使用Chrome路径: {expanded_path}")
-                break
-    elif os.name == 'posix' and os.path.exists(CHROME_PATHS["mac"]):
-        options.binary_location = CHROME_PATHS["mac"]
-        print("使用macOS系统Chrome路径")
-    
-    # 设置语言
-    options.add_argument('--lang=zh-CN')
-    
-    # 设置用户代理
-    options.add_argument(f'user-agent={USER_AGENT}')
-    
-    # 禁用日志
-    options.add_experimental_option('excludeSwitches', ['enable-logging'])
-    
-    # 创建ChromeDriver
-    try:
-        print("正在初始化ChromeDriver...")
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=options)
-        
-        # 执行反检测JavaScript
-        driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {
-            'source': '''
-            Object.defineProperty(navigator, 'webdriver', {
-                get: () => undefined
-            })
-            '''
-        })
-        
-        print("ChromeDriver初始化成功")
-    except Exception as e:
-        print(f"ChromeDriver初始化失败: {e}")
-        # 尝试使用备用方法初始化
-        try:
-            print("尝试备用方法初始化ChromeDriver...")
-            driver = webdriver.Chrome(options=options)
-            print("备用方法初始化成功")
-        except Exception as e2:
-            print(f"备用方法也失败: {e2}")
-            raise
+    print("正在从共享浏览器池获取ChromeDriver...")
+    driver = lease_driver("chrome", use_headless, extra_args=STEAM_BROWSER_ARGS)
     
     # 设置超时时间
     driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
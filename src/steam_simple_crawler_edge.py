@@ -19,9 +19,6 @@ import argparse
 import platform
 import traceback
 
-from selenium import webdriver
-from selenium.webdriver.edge.service import Service
-from selenium.webdriver.edge.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
@@ -30,11 +27,11 @@ from selenium.common.exceptions import (
     WebDriverException, StaleElementReferenceException
 )
 
-try:
-    from webdriver_manager.microsoft import EdgeChromiumDriverManager
-    WEBDRIVER_MANAGER_INSTALLED = True
-except ImportError:
-    WEBDRIVER_MANAGER_INSTALLED = False
+from driver_pool import lease_driver, release_driver, note_page
+from lean_mode import enable_lean_mode, measure_page, format_page_stats
+from page_fetch import PageFetcher
+from auto_scroll import AutoScroller
+from output_index import note_output_write
 
 # 配置常量
 OUTPUT_DIR = "output"
@@ -47,6 +44,64 @@ SCROLL_PAUSE_TIME = 2
 BATCH_SIZE = 10
 MAX_RETRIES = 3
 
+# "显示更多评论"按钮
+LOAD_MORE_SELECTORS = [".apphub_ShowMoreComments", ".apphub_ShowMoreCommentsButton", ".apphub_LoadMoreButton"]
+# 页面内自动滚动的总超时时间（秒）
+AUTO_SCROLL_TIMEOUT = 3600
+
+# 评论页面滚动加载时使用的分页接口，每页10条评论，与页面同源
+REVIEWS_PER_PAGE = 10
+HOMECONTENT_URL = (
+    "https://steamcommunity.com/app/{app_id}/homecontent/?userreviewsoffset={offset}&p={page}"
+    "&workshopitemspage={page}&readytouseitemspage={page}&mtxitemspage={page}&itemspage={page}"
+    "&screenshotspage={page}&videospage={page}&artpage={page}&allguidepage={page}"
+    "&webguidepage={page}&integratedguidepage={page}&discussionspage={page}"
+    "&numperpage={per_page}&browsefilter=toprated&appid={app_id}&appHubSubSection=10"
+    "&filterLanguage=default&searchText=&maxInappropriateScore=100&forceanon=1"
+)
+
+# 在页面中把分页接口返回的HTML片段解析为评论字段（与extract_review_data使用相同的选择器）
+REVIEW_CARDS_EXTRACT_SCRIPT = """
+var doc = new DOMParser().parseFromString(text, 'text/html');
+var cards = doc.querySelectorAll('.apphub_Card');
+var reviews = [];
+function textOf(root, selector) {
+    var el = root.querySelector(selector);
+    return el ? el.textContent.trim() : '';
+}
+for (var i = 0; i < cards.length; i++) {
+    var card = cards[i];
+    var author = card.querySelector('.apphub_CardContentAuthorName a');
+    var content = '';
+    var contentEl = card.querySelector('.apphub_CardTextContent');
+    if (contentEl) {
+        var clone = contentEl.cloneNode(true);
+        var brs = clone.querySelectorAll('br');
+        for (var j = 0; j < brs.length; j++) {
+            brs[j].replaceWith('\\n');
+        }
+        var dateEl = clone.querySelector('.date_posted');
+        if (dateEl) {
+            dateEl.remove();
+        }
+        content = clone.textContent.trim();
+    }
+    reviews.push({
+        id: card.id || card.getAttribute('data-modal-content-url') || '',
+        user_name: author ? author.textContent.trim() : '',
+        user_profile: author ? author.href : '',
+        content: content,
+        title: textOf(card, '.title'),
+        voted: card.className,
+        posted_date: textOf(card, '.date_posted'),
+        hours: textOf(card, '.hours'),
+        helpful: textOf(card, '.found_helpful'),
+        comments: textOf(card, '.apphub_CardCommentButton')
+    });
+}
+return reviews;
+"""
+
 # 设置日志
 log_dir = Path("logs")
 log_dir.mkdir(exist_ok=True)
@@ -68,71 +123,24 @@ logger = logging.getLogger("SteamSimpleCrawlerEdge")
 # 输出系统信息
 logger.info(f"系统信息: {platform.platform()}")
 logger.info(f"Python版本: {platform.python_version()}")
-logger.info(f"WebDriver Manager已安装: {WEBDRIVER_MANAGER_INSTALLED}")
 
 def setup_driver(use_headless=False):
-    """设置并返回配置好的WebDriver
+    """从共享浏览器池获取配置好的Edge WebDriver
     
     Args:
         use_headless: 是否使用无头模式
         
     Returns:
-        WebDriver实例
+        WebDriver实例，使用完毕后调用release_driver()归还
     """
     try:
-        logger.info("初始化Edge WebDriver...")
-        
-        options = Options()
-        
-        # 无头模式配置
-        if use_headless:
-            options.add_argument('--headless=new')  # 新版Edge需要使用新的无头参数
-        
-        # 基本设置
-        options.add_argument('--disable-gpu')
-        options.add_argument('--no-sandbox')
-        options.add_argument('--disable-dev-shm-usage')
-        options.add_argument('--disable-extensions')
-        options.add_argument('--disable-popup-blocking')
-        options.add_argument('--ignore-certificate-errors')
-        options.add_argument('--window-size=1920,1080')
-        options.add_argument('--lang=zh-CN,zh,en-US,en')
-        
-        # 禁用图片加载以提高性能（可选）
-        # options.add_argument('--blink-settings=imagesEnabled=false')
-        
-        # 设置反爬配置
-        options.add_argument('--disable-blink-features=AutomationControlled')
-        options.add_experimental_option('excludeSwitches', ['enable-automation'])
-        options.add_experimental_option('useAutomationExtension', False)
-        
-        # 创建和初始化WebDriver
-        if WEBDRIVER_MANAGER_INSTALLED:
-            try:
-                logger.info("使用WebDriver Manager安装Edge驱动...")
-                service = Service(EdgeChromiumDriverManager().install())
-                driver = webdriver.Edge(service=service, options=options)
-                logger.info("Edge WebDriver初始化成功")
-            except Exception as e:
-                logger.error(f"使用WebDriver Manager初始化Edge驱动失败: {e}")
-                logger.error(traceback.format_exc())
-                
-                # 尝试使用默认方式初始化
-                logger.info("尝试使用默认方式初始化Edge驱动...")
-                driver = webdriver.Edge(options=options)
-                logger.info("使用默认方式初始化Edge驱动成功")
-        else:
-            logger.warning("WebDriver Manager未安装，使用系统Edge Driver")
-            driver = webdriver.Edge(options=options)
-            logger.info("使用系统Edge驱动初始化成功")
+        logger.info("从共享浏览器池获取Edge WebDriver...")
+        driver = lease_driver("edge", use_headless)
         
         # 设置超时时间
         driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
         driver.set_script_timeout(SCRIPT_TIMEOUT)
         
-        # 设置窗口大小
-        driver.set_window_size(1920, 1080)
-        
         # 输出浏览器信息
         try:
             browser_version = driver.capabilities.get('browserVersion', 'unknown')
@@ -142,15 +150,6 @@ def setup_driver(use_headless=False):
         except Exception as e:
             logger.warning(f"无法获取浏览器版本信息: {e}")
         
-        # 隐藏浏览器指纹
-        driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {
-            'source': '''
-                Object.defineProperty(navigator, 'webdriver', {
-                    get: () => undefined
-                });
-            '''
-        })
-        
         logger.info("WebDriver初始化成功")
         return driver
         
@@ -627,6 +626,7 @@ class JsonDataWriter:
             file_path = os.path.join(game_dir, f"{review_id}.json")
             with open(file_path, 'w', encoding='utf-8') as f:
                 json.dump(review_data, f, ensure_ascii=False, indent=2)
+            note_output_write(file_path, 1, app_id=str(app_id), title=review_data.get('game_title'))
                 
             # 记录保存的文件
             self.saved_files.append(file_path)
@@ -697,6 +697,7 @@ class CsvDataWriter:
                     self.saved_files[file_path] += 1
                 else:
                     self.saved_files[file_path] = 1
+            note_output_write(file_path, 1, app_id=str(app_id), title=game_title)
             logger.info(f"成功保存评论数据到: {file_path}")
             return file_path
         except Exception as e:
@@ -714,15 +715,21 @@ class CsvDataWriter:
 class SteamSimpleCrawlerEdge:
     """简化版Steam爬虫类 - Edge浏览器版本 - 无需登录，只处理年龄限制和内容警告"""
     
-    def __init__(self, use_headless=False, data_writer=None):
+    def __init__(self, use_headless=False, data_writer=None, lean_mode=False, fetch_mode=True, auto_scroll=True):
         """初始化Steam爬虫
         
         Args:
             use_headless: 是否使用无头模式
             data_writer: 数据写入器对象
+            lean_mode: 是否启用精简加载模式（拦截图片、字体、音视频和统计脚本）
+            fetch_mode: 是否在页面中直接请求评论分页接口（失败时回退到滚动加载）
+            auto_scroll: 是否由页面内的脚本自主完成滚动循环（否则每一步由Python控制）
         """
         # 初始化基本属性
         self.use_headless = use_headless
+        self.lean_mode = lean_mode
+        self.fetch_mode = fetch_mode
+        self.auto_scroll = auto_scroll
         self.driver = None
         self.data_writer = data_writer
         self.total_reviews_count = 0
@@ -772,6 +779,8 @@ class SteamSimpleCrawlerEdge:
         try:
             logger.info("设置Edge WebDriver...")
             self.driver = setup_driver(self.use_headless)
+            if self.lean_mode:
+                self.lean_mode = enable_lean_mode(self.driver, "steam")
             logger.info("Edge WebDriver设置完成")
         except Exception as e:
             logger.error(f"设置WebDriver失败: {e}")
@@ -779,12 +788,13 @@ class SteamSimpleCrawlerEdge:
             raise
     
     def close(self):
-        """关闭爬虫和浏览器"""
+        """关闭爬虫，把浏览器归还到共享池"""
         if self.driver:
             try:
-                logger.info("关闭浏览器...")
-                self.driver.quit()
-                logger.info("浏览器已关闭")
+                logger.info("归还浏览器到共享池...")
+                release_driver(self.driver)
+                self.driver = None
+                logger.info("浏览器已归还")
             except Exception as e:
                 logger.error(f"关闭浏览器出错: {e}")
                 logger.error(traceback.format_exc())
@@ -993,7 +1003,12 @@ class SteamSimpleCrawlerEdge:
                 logger.info(f"访问评论页面: {reviews_url}")
                 
                 try:
+                    nav_start = time.time()
                     self.driver.get(reviews_url)
+                    note_page(self.driver)
+                    logger.info(f"[耗时] 页面导航: {time.time() - nav_start:.2f} 秒")
+                    page_stats = measure_page(self.driver, "steam", self.lean_mode)
+                    logger.info(f"[资源] {format_page_stats(page_stats, self.lean_mode)}")
                     time.sleep(IMPLICIT_WAIT)
                     
                     # 处理可能的年龄验证
@@ -1068,6 +1083,12 @@ class SteamSimpleCrawlerEdge:
                 
                 return 0
             
+            # 优先在页面中直接请求评论分页接口，无需滚动
+            if self.fetch_mode:
+                fetched_count = self.fetch_reviews_in_page(game_info, max_reviews)
+                if fetched_count is not None:
+                    return fetched_count
+            
             # 待处理的评论总数
             processed_count = 0
             batch_size = 5000  # 每批次处理的评论数量
@@ -1087,103 +1108,10 @@ class SteamSimpleCrawlerEdge:
             except TimeoutException:
                 logger.warning("等待评论加载超时")
             
-            last_reviews_count = 0
-            same_count_times = 0  # 连续相同评论数的次数，用于判断是否已加载完所有评论
-            scroll_count = 0
-            
-            # 记录滚动开始时间，用于计算滚动速度和估计剩余时间
-            scroll_start_time = time.time()
-            
-            # 滚动循环 - 仅滚动必要的次数，直到满足加载条件
-            while True:
-                # 获取当前页面所有评论
-                review_cards = self.driver.find_elements(By.CSS_SELECTOR, ".apphub_Card")
-                current_reviews_count = len(review_cards)
-                
-                # 重要：如果设置了评论数限制，且已达到或超过目标数量，立即停止滚动
-                if max_reviews is not None and current_reviews_count >= max_reviews:
-                    logger.info(f"已达到目标评论数: {max_reviews}，停止滚动")
-                    self.report_progress("scroll", 0.99, f"已加载 {current_reviews_count} 条评论，达到目标数量")
-                    break
-                
-                # 计算并报告滚动进度
-                if max_reviews is not None:
-                    progress = min(current_reviews_count / max_reviews, 0.99)
-                    self.report_progress("scroll", progress, f"已加载 {current_reviews_count} 条评论")
-                else:
-                    # 没有设置最大值时，根据滚动次数计算进度
-                    progress = min(scroll_count / 200, 0.99)  # 假设200次滚动为满进度
-                    self.report_progress("scroll", progress, f"已加载 {current_reviews_count} 条评论，滚动次数: {scroll_count}")
-                
-                # 计算滚动速度和估计剩余时间（仅当有增量时）
-                if current_reviews_count > last_reviews_count and scroll_count > 0:
-                    elapsed_time = time.time() - scroll_start_time
-                    scroll_speed = current_reviews_count / elapsed_time if elapsed_time > 0 else 0
-                    
-                    # 如果设置了最大评论数
-                    if max_reviews is not None:
-                        remaining = max_reviews - current_reviews_count
-                        if remaining > 0 and scroll_speed > 0:
-                            est_time = remaining / scroll_speed
-                            logger.info(f"当前加载速度: {scroll_speed:.1f}评论/秒，预计还需 {est_time/60:.1f}分钟")
-                            self.report_progress("scroll", progress, f"加载速度: {scroll_speed:.1f}评论/秒，预计还需 {est_time/60:.1f}分钟")
-                
-                # 每100条评论显示一次日志
-                if current_reviews_count // 100 > last_reviews_count // 100:
-                    logger.info(f"已加载 {current_reviews_count} 条评论，滚动次数: {scroll_count}")
-                
-                # 判断是否已加载完所有评论
-                if current_reviews_count == last_reviews_count:
-                    same_count_times += 1
-                    # 连续3次滚动后评论数量未增加，认为已加载完成
-                    if same_count_times >= 3:
-                        logger.info("连续多次滚动后评论数量未增加，认为已加载完所有评论")
-                        break
-                else:
-                    same_count_times = 0  # 重置计数器
-                
-                # 记录当前评论数，用于下次比较
-                last_reviews_count = current_reviews_count
-                
-                # 滚动到页面底部以加载更多评论
-                try:
-                    self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                    
-                    # 如果有指定的评论数限制，减少等待时间以加快处理
-                    if max_reviews is not None:
-                        wait_time = SCROLL_PAUSE_TIME * 0.5  # 对于有限制的爬取，减少等待时间
-                    else:
-                        wait_time = SCROLL_PAUSE_TIME
-                        
-                    time.sleep(wait_time)  # 等待加载
-                    
-                    # 尝试点击"显示更多评论"按钮（如果存在）
-                    try:
-                        load_more_buttons = self.driver.find_elements(By.CSS_SELECTOR, 
-                            ".apphub_ShowMoreComments, .apphub_ShowMoreCommentsButton, .apphub_LoadMoreButton")
-                        for btn in load_more_buttons:
-                            if btn.is_displayed():
-                                logger.info("点击'显示更多评论'按钮")
-                                self.driver.execute_script("arguments[0].click();", btn)
-                                time.sleep(wait_time)  # 等待加载
-                    except:
-                        pass  # 忽略按钮不存在的情况
-                    
-                except Exception as e:
-                    logger.error(f"滚动加载更多评论出错: {e}")
-                    break
-                
-                scroll_count += 1
-                
-                # 添加额外检查：如果设置了max_reviews，并且当前评论已达到目标数量的80%以上，减少等待时间，加快最后阶段
-                if max_reviews is not None and current_reviews_count >= max_reviews * 0.8:
-                    logger.info(f"已接近目标评论数，加快加载过程")
-                    time.sleep(SCROLL_PAUSE_TIME * 0.25)  # 进一步缩短等待时间
-                    
-                # 安全措施：如果滚动过多次（超过max_reviews的10倍），强制退出循环
-                if max_reviews is not None and scroll_count > max_reviews * 10:
-                    logger.warning(f"滚动次数过多，强制退出滚动循环，已加载 {current_reviews_count} 条评论")
-                    break
+            if self.auto_scroll:
+                self._scroll_reviews_in_page(max_reviews)
+            else:
+                self._scroll_reviews_stepwise(max_reviews)
             
             # 滚动完成后，获取所有评论卡片
             all_review_cards = self.driver.find_elements(By.CSS_SELECTOR, ".apphub_Card")
@@ -1236,6 +1164,254 @@ class SteamSimpleCrawlerEdge:
             self.report_progress("extract", 1.0, f"处理评论页面出错: {e}")
             return 0
     
+    def _scroll_reviews_in_page(self, max_reviews=None):
+        """由页面内的自动滚动脚本完成滚动加载，按段报告进度
+        
+        Args:
+            max_reviews: 最大爬取评论数，None表示无限制
+        """
+        def on_progress(state):
+            count = state.get("count", 0)
+            if max_reviews is not None:
+                progress = min(count / max_reviews, 0.99)
+            else:
+                progress = min(state.get("cycles", 0) / 200, 0.99)  # 假设200次滚动为满进度
+            speed = count / state["elapsed"] if state.get("elapsed") else 0
+            logger.info(f"已加载 {count} 条评论，滚动次数: {state.get('cycles', 0)}，加载速度: {speed:.1f}评论/秒")
+            self.report_progress("scroll", progress, f"已加载 {count} 条评论，滚动次数: {state.get('cycles', 0)}")
+        
+        scroller = AutoScroller(
+            self.driver, [".apphub_Card"], target=max_reviews, no_growth_cycles=3,
+            pause=SCROLL_PAUSE_TIME * 0.5 if max_reviews is not None else SCROLL_PAUSE_TIME,
+            timeout=AUTO_SCROLL_TIMEOUT, load_more_selectors=LOAD_MORE_SELECTORS
+        )
+        try:
+            scroller.run(on_progress)
+        except Exception as e:
+            logger.error(f"页面内自动滚动出错: {e}，改用逐步滚动")
+            self._scroll_reviews_stepwise(max_reviews)
+    
+    def _scroll_reviews_stepwise(self, max_reviews=None):
+        """逐步滚动加载评论，每一步由Python控制
+        
+        Args:
+            max_reviews: 最大爬取评论数，None表示无限制
+        """
+        last_reviews_count = 0
+        same_count_times = 0  # 连续相同评论数的次数，用于判断是否已加载完所有评论
+        scroll_count = 0
+        
+        # 记录滚动开始时间，用于计算滚动速度和估计剩余时间
+        scroll_start_time = time.time()
+        
+        # 滚动循环 - 仅滚动必要的次数，直到满足加载条件
+        while True:
+            # 获取当前页面所有评论
+            review_cards = self.driver.find_elements(By.CSS_SELECTOR, ".apphub_Card")
+            current_reviews_count = len(review_cards)
+            
+            # 重要：如果设置了评论数限制，且已达到或超过目标数量，立即停止滚动
+            if max_reviews is not None and current_reviews_count >= max_reviews:
+                logger.info(f"已达到目标评论数: {max_reviews}，停止滚动")
+                self.report_progress("scroll", 0.99, f"已加载 {current_reviews_count} 条评论，达到目标数量")
+                break
+            
+            # 计算并报告滚动进度
+            if max_reviews is not None:
+                progress = min(current_reviews_count / max_reviews, 0.99)
+                self.report_progress("scroll", progress, f"已加载 {current_reviews_count} 条评论")
+            else:
+                # 没有设置最大值时，根据滚动次数计算进度
+                progress = min(scroll_count / 200, 0.99)  # 假设200次滚动为满进度
+                self.report_progress("scroll", progress, f"已加载 {current_reviews_count} 条评论，滚动次数: {scroll_count}")
+            
+            # 计算滚动速度和估计剩余时间（仅当有增量时）
+            if current_reviews_count > last_reviews_count and scroll_count > 0:
+                elapsed_time = time.time() - scroll_start_time
+                scroll_speed = current_reviews_count / elapsed_time if elapsed_time > 0 else 0
+                
+                # 如果设置了最大评论数
+                if max_reviews is not None:
+                    remaining = max_reviews - current_reviews_count
+                    if remaining > 0 and scroll_speed > 0:
+                        est_time = remaining / scroll_speed
+                        logger.info(f"当前加载速度: {scroll_speed:.1f}评论/秒，预计还需 {est_time/60:.1f}分钟")
+                        self.report_progress("scroll", progress, f"加载速度: {scroll_speed:.1f}评论/秒，预计还需 {est_time/60:.1f}分钟")
+            
+            # 每100条评论显示一次日志
+            if current_reviews_count // 100 > last_reviews_count // 100:
+                logger.info(f"已加载 {current_reviews_count} 条评论，滚动次数: {scroll_count}")
+            
+            # 判断是否已加载完所有评论
+            if current_reviews_count == last_reviews_count:
+                same_count_times += 1
+                # 连续3次滚动后评论数量未增加，认为已加载完成
+                if same_count_times >= 3:
+                    logger.info("连续多次滚动后评论数量未增加，认为已加载完所有评论")
+                    break
+            else:
+                same_count_times = 0  # 重置计数器
+            
+            # 记录当前评论数，用于下次比较
+            last_reviews_count = current_reviews_count
+            
+            # 滚动到页面底部以加载更多评论
+            try:
+                self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+                
+                # 如果有指定的评论数限制，减少等待时间以加快处理
+                if max_reviews is not None:
+                    wait_time = SCROLL_PAUSE_TIME * 0.5  # 对于有限制的爬取，减少等待时间
+                else:
+                    wait_time = SCROLL_PAUSE_TIME
+                    
+                time.sleep(wait_time)  # 等待加载
+                
+                # 尝试点击"显示更多评论"按钮（如果存在）
+                try:
+                    load_more_buttons = self.driver.find_elements(By.CSS_SELECTOR, ", ".join(LOAD_MORE_SELECTORS))
+                    for btn in load_more_buttons:
+                        if btn.is_displayed():
+                            logger.info("点击'显示更多评论'按钮")
+                            self.driver.execute_script("arguments[0].click();", btn)
+                            time.sleep(wait_time)  # 等待加载
+                except:
+                    pass  # 忽略按钮不存在的情况
+                
+            except Exception as e:
+                logger.error(f"滚动加载更多评论出错: {e}")
+                break
+            
+            scroll_count += 1
+            
+            # 添加额外检查：如果设置了max_reviews，并且当前评论已达到目标数量的80%以上，减少等待时间，加快最后阶段
+            if max_reviews is not None and current_reviews_count >= max_reviews * 0.8:
+                logger.info(f"已接近目标评论数，加快加载过程")
+                time.sleep(SCROLL_PAUSE_TIME * 0.25)  # 进一步缩短等待时间
+                
+            # 安全措施：如果滚动过多次（超过max_reviews的10倍），强制退出循环
+            if max_reviews is not None and scroll_count > max_reviews * 10:
+                logger.warning(f"滚动次数过多，强制退出滚动循环，已加载 {current_reviews_count} 条评论")
+                break
+
+    def fetch_reviews_in_page(self, game_info, max_reviews=None):
+        """在评论页面中并发请求评论分页接口，直接提取并保存评论
+        
+        Args:
+            game_info: 游戏基本信息
+            max_reviews: 最大爬取评论数，None表示无限制
+            
+        Returns:
+            int: 成功保存的评论数；第一批请求没有拿到任何评论时返回None（由调用方回退到滚动加载）
+        """
+        app_id = game_info.get('app_id')
+        if not app_id:
+            return None
+        
+        logger.info("尝试在页面中直接请求评论分页接口...")
+        self.report_progress("scroll", 0.0, "开始通过分页接口获取评论")
+        start_time = time.time()
+        fetcher = PageFetcher(self.driver)
+        last_page = None
+        if max_reviews is not None:
+            last_page = (max_reviews + REVIEWS_PER_PAGE - 1) // REVIEWS_PER_PAGE
+        
+        def page_url(page):
+            return HOMECONTENT_URL.format(app_id=app_id, page=page, offset=(page - 1) * REVIEWS_PER_PAGE,
+                                          per_page=REVIEWS_PER_PAGE)
+        
+        processed_count = 0
+        seen_ids = set()
+        try:
+            for batch in fetcher.iter_page_batches(page_url, last_page=last_page,
+                                                   extract_script=REVIEW_CARDS_EXTRACT_SCRIPT):
+                finished = False
+                for page_number, result in batch:
+                    raw_reviews = result["data"] or []
+                    if not raw_reviews:
+                        finished = True
+                        continue
+                    for raw in raw_reviews:
+                        if max_reviews is not None and processed_count >= max_reviews:
+                            finished = True
+                            break
+                        if raw.get('id') and raw['id'] in seen_ids:
+                            continue
+                        seen_ids.add(raw.get('id'))
+                        review_data = self._build_fetched_review(raw, game_info)
+                        if not review_data:
+                            self.failed_reviews += 1
+                            continue
+                        if self.data_writer:
+                            self.data_writer.write_review(review_data)
+                        processed_count += 1
+                        self.successful_reviews += 1
+                
+                if processed_count == 0:
+                    logger.info("分页接口没有返回评论，改用滚动加载")
+                    return None
+                
+                if max_reviews is not None:
+                    progress = min(processed_count / max_reviews, 0.99)
+                else:
+                    progress = min(processed_count / (processed_count + 100), 0.99)
+                self.report_progress("extract", progress, f"已通过分页接口获取 {processed_count} 条评论")
+                logger.info(f"已通过分页接口获取 {processed_count} 条评论")
+                if finished:
+                    break
+        except Exception as e:
+            logger.error(f"在页面中请求评论分页接口出错: {e}")
+            if processed_count == 0:
+                return None
+        
+        elapsed_time = time.time() - start_time
+        logger.info(f"分页接口获取完成，共保存 {processed_count} 条评论，用时 {elapsed_time:.1f} 秒")
+        self.report_progress("extract", 1.0, f"评论提取完成，共处理 {processed_count} 条评论")
+        return processed_count
+    
+    def _build_fetched_review(self, raw, game_info):
+        """把页面中解析出的评论字段转换为与extract_review_data一致的评论数据"""
+        if not raw.get('content'):
+            return None
+        review_data = {
+            'app_id': game_info.get('app_id'),
+            'game_title': game_info.get('title'),
+            'crawl_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'review_id': raw.get('id') or f"unknown_{int(time.time())}_{random.randint(1000, 9999)}",
+            'user_name': raw.get('user_name') or "未知用户",
+            'user_profile': raw.get('user_profile', ''),
+            'content': raw['content']
+        }
+        
+        steam_id_match = re.search(r'/profiles/(\d+)', review_data['user_profile'] or '')
+        if steam_id_match:
+            review_data['steam_id'] = steam_id_match.group(1)
+        
+        title_text = (raw.get('title') or '').lower()
+        if "不推荐" in title_text or "not recommended" in title_text:
+            review_data['recommended'] = False
+        elif "推荐" in title_text or "recommended" in title_text:
+            review_data['recommended'] = True
+        elif "voted_up" in (raw.get('voted') or ''):
+            review_data['recommended'] = True
+        elif "voted_down" in (raw.get('voted') or ''):
+            review_data['recommended'] = False
+        else:
+            review_data['recommended'] = None
+        
+        review_data['posted_date'] = (raw.get('posted_date') or '').replace("Posted: ", "").strip()
+        
+        hours_match = re.search(r'(\d+\.?\d*)', (raw.get('hours') or '').replace(',', ''))
+        review_data['hours_played'] = float(hours_match.group(1)) if hours_match else 0
+        
+        helpful_match = re.search(r'(\d+).*?(\d+)', raw.get('helpful') or '')
+        review_data['helpful_count'] = int(helpful_match.group(1)) if helpful_match else 0
+        review_data['total_votes'] = int(helpful_match.group(2)) if helpful_match else 0
+        
+        comment_match = re.search(r'(\d+)', raw.get('comments') or '')
+        review_data['comment_count'] = int(comment_match.group(1)) if comment_match else 0
+        return review_data
+    
     def _process_review_batch(self, review_cards, game_info, batch_num=1, total_batches=1):
         """处理一批评论卡片
         
@@ -1485,6 +1661,8 @@ def main():
     parser.add_argument('--output', type=str, default=OUTPUT_DIR, help='输出目录')
     parser.add_argument('--format', type=str, choices=['json', 'csv'], default='csv', help='输出格式，默认为CSV')
     parser.add_argument('--timestamp', type=str, default=None, help='文件名时间戳（可选）')
+    parser.add_argument('--lean', action='store_true', help='精简加载模式，不加载图片、字体、音视频和统计脚本')
+    parser.add_argument('--no-fetch', action='store_true', help='不直接请求评论分页接口，始终使用滚动加载')
     args = parser.parse_args()
     
     # 优先使用命令行参数，否则自动生成
@@ -1496,7 +1674,8 @@ def main():
         data_writer = CsvDataWriter(args.output, timestamp=timestamp)
     
     # 初始化并运行爬虫
-    crawler = SteamSimpleCrawlerEdge(use_headless=args.headless, data_writer=data_writer)
+    crawler = SteamSimpleCrawlerEdge(use_headless=args.headless, data_writer=data_writer, lean_mode=args.lean,
+                                     fetch_mode=not args.no_fetch)
     result = crawler.run(args.url, args.max_reviews)
     
     if result:
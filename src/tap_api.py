@@ -0,0 +1,293 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+TapTap评价接口解析 - 把评价列表接口返回的JSON直接转换为评论记录
+
+记录格式与TapCrawler从页面提取的格式一致：评论ID、用户名、评论内容、评论时间、点赞数、URL
+
+TapReviewClient 不需要浏览器，直接通过HTTP请求评价列表接口：
+使用连接池复用连接，并发预取后续页面，按页码顺序返回结果。
+第一页之后的页面请求失败时抛出 IncompleteReviewsError，调用方可以从失败的偏移量继续获取。
+"""
+
+import os
+import re
+import time
+import html
+import uuid
+import logging
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger("tap_api")
+
+# 评价列表接口的URL规则
+REVIEW_API_PATTERNS = [
+    r"taptap\.(?:cn|com|io)/webapiv2/review/v\d+/(?:list-by-app|by-app)",
+    r"taptap\.(?:cn|com|io)/webapiv2/(?:feeds|moment)/v\d+/.*review"
+]
+
+BASE_URL = "https://www.taptap.cn"
+# HTTP引擎请求的接口地址，可以指向本地的fixture_server.py进行离线测试
+API_BASE_URL = os.environ.get("TAPTAP_API_BASE_URL", BASE_URL)
+# 每页评价数
+PAGE_SIZE = 10
+# 网页版请求接口时附带的客户端标识
+X_UA_FIELDS = {
+    "V": "1", "PN": "WebApp", "LANG": "zh_CN", "VN_CODE": "102", "LOC": "CN",
+    "PLT": "PC", "DS": "Android", "OS": "Windows", "OSV": "10", "DT": "PC"
+}
+_CLIENT_UID = str(uuid.uuid4())
+
+
+def review_list_url(app_id, offset=0, limit=PAGE_SIZE, sort="default", base_url=BASE_URL):
+    """评价列表接口地址（按偏移量分页，可以并发请求）"""
+    x_ua = urllib.parse.urlencode(dict(X_UA_FIELDS, UID=_CLIENT_UID))
+    query = urllib.parse.urlencode({
+        "app_id": app_id, "from": offset, "limit": limit, "sort": sort, "X-UA": x_ua
+    })
+    return f"{base_url.rstrip('/')}/webapiv2/review/v2/list-by-app?{query}"
+
+
+def app_detail_url(app_id, base_url=BASE_URL):
+    """游戏详情接口地址（用于获取游戏名称）"""
+    x_ua = urllib.parse.urlencode(dict(X_UA_FIELDS, UID=_CLIENT_UID))
+    query = urllib.parse.urlencode({"id": app_id, "X-UA": x_ua})
+    return f"{base_url.rstrip('/')}/webapiv2/app/v4/detail?{query}"
+
+
+def _strip_html(text):
+    """评价内容可能带有HTML标签，转换为纯文本"""
+    text = re.sub(r'<br\s*/?>|</p>', ' ', text or '')
+    text = re.sub(r'<[^>]+>', '', text)
+    return re.sub(r'\s+', ' ', html.unescape(text)).strip()
+
+
+def _format_time(timestamp):
+    try:
+        return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(int(timestamp)))
+    except (TypeError, ValueError):
+        return ""
+
+
+def _first(*values):
+    """返回第一个非空值"""
+    for value in values:
+        if value not in (None, ''):
+            return value
+    return None
+
+
+def parse_review(item, url=""):
+    """解析单条评价，兼容动态(moment)包装和直接返回评价两种结构
+
+    Returns:
+        dict: 评论记录，无法识别时返回None
+    """
+    moment = item.get('moment') or item
+    review = moment.get('review') or item.get('review') or moment
+    author = moment.get('author') or review.get('author') or {}
+    user = author.get('user') or author
+    contents = review.get('contents') or moment.get('contents') or {}
+    stat = moment.get('stat') or review.get('stat') or {}
+
+    if isinstance(contents, dict):
+        text = _first(contents.get('text'), contents.get('raw_text'), '')
+    else:
+        text = contents
+    content = _strip_html(text)
+    if not content:
+        return None
+
+    review_id = _first(review.get('id'), moment.get('id'), item.get('id'), '')
+    return {
+        '评论ID': str(review_id),
+        '用户名': user.get('name', ''),
+        '评论内容': content,
+        '评论时间': _format_time(_first(moment.get('publish_time'), moment.get('created_time'),
+                                     review.get('created_time'))),
+        '点赞数': str(_first(stat.get('ups'), stat.get('supported'), review.get('ups'), 0)),
+        'URL': url
+    }
+
+
+def parse_review_page(data, url=""):
+    """解析一页评价列表接口响应
+
+    Args:
+        data: 接口返回的JSON（已解析为dict）
+        url: 写入记录的游戏页面URL
+
+    Returns:
+        dict: {"reviews": 评论记录列表, "next_page": 下一页地址或None, "total": 评价总数}，
+              响应不是评价数据时返回None
+    """
+    if not isinstance(data, dict) or data.get('success') is False:
+        return None
+    body = data.get('data') or {}
+    items = body.get('list')
+    if not isinstance(items, list):
+        return None
+    reviews = []
+    for item in items:
+        if isinstance(item, dict):
+            record = parse_review(item, url)
+            if record:
+                reviews.append(record)
+    return {
+        'reviews': reviews,
+        'next_page': body.get('next_page') or None,
+        'total': body.get('total', 0)
+    }
+
+
+# HTTP引擎的默认并发数（同时预取的页面数）
+DEFAULT_MAX_WORKERS = 4
+# 单个请求的超时时间（秒）
+REQUEST_TIMEOUT = 20
+REQUEST_HEADERS = {
+    "User-Agent": ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                   "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"),
+    "Accept": "application/json, text/plain, */*",
+    "Accept-Language": "zh-CN,zh;q=0.9"
+}
+
+
+class IncompleteReviewsError(Exception):
+    """第一页之后的评价页面请求失败，已获取的评价列表不完整"""
+
+    def __init__(self, offset, comments=None):
+        """
+        Args:
+            offset: 请求失败的页面偏移量，从这里继续获取即可补全
+            comments: 失败之前已经获取到的评论记录
+        """
+        super().__init__(f"偏移量 {offset} 的评价页面请求失败，评价列表不完整")
+        self.offset = offset
+        self.comments = comments or []
+
+
+class TapReviewClient:
+    """不依赖浏览器的TapTap评价接口客户端"""
+
+    def __init__(self, base_url=None, max_workers=DEFAULT_MAX_WORKERS, timeout=REQUEST_TIMEOUT):
+        """
+        Args:
+            base_url: 接口地址，默认使用API_BASE_URL
+            max_workers: 同时预取的页面数
+            timeout: 单个请求的超时时间（秒）
+        """
+        self.base_url = (base_url or API_BASE_URL).rstrip('/')
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update(REQUEST_HEADERS)
+        self.session.headers["Referer"] = self.base_url + "/"
+        retry = Retry(total=3, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504),
+                      allowed_methods=("GET",))
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.max_workers, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def get_json(self, url):
+        """请求接口并解析JSON，失败时返回None"""
+        try:
+            response = self.session.get(url, timeout=self.timeout)
+            if response.status_code != 200:
+                logger.warning(f"接口返回状态码 {response.status_code}: {url}")
+                return None
+            return response.json()
+        except (requests.RequestException, ValueError) as e:
+            logger.warning(f"请求接口失败: {url} {e}")
+            return None
+
+    def fetch_page(self, app_id, offset, url=""):
+        """请求一页评价，返回parse_review_page()的结果"""
+        return parse_review_page(self.get_json(review_list_url(app_id, offset, base_url=self.base_url)), url)
+
+    def iter_pages(self, app_id, url="", start_offset=0):
+        """按顺序返回每一页评价，后续页面在后台并发预取
+
+        Args:
+            app_id: 游戏ID
+            url: 写入每条记录的游戏页面URL
+            start_offset: 起始偏移量（从上次失败的位置继续时使用）
+
+        Yields:
+            dict: parse_review_page()的结果，没有更多评价或第一页就无法获取时停止
+
+        Raises:
+            IncompleteReviewsError: 之后的页面请求失败（offset为失败页面的偏移量）
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="tap-api") as executor:
+            pending = {}
+            next_offset = start_offset
+            current = start_offset
+            try:
+                while True:
+                    # 保持max_workers个页面在请求中
+                    while len(pending) < self.max_workers:
+                        pending[next_offset] = executor.submit(self.fetch_page, app_id, next_offset, url)
+                        next_offset += PAGE_SIZE
+                    page = pending.pop(current).result()
+                    if not page:
+                        if current == 0:
+                            return
+                        raise IncompleteReviewsError(current)
+                    yield page
+                    if not page["reviews"] or not page["next_page"]:
+                        return
+                    current += PAGE_SIZE
+            finally:
+                for future in pending.values():
+                    future.cancel()
+
+    def fetch_reviews(self, app_id, url="", on_page=None, start_offset=0):
+        """获取一个游戏的全部评价
+
+        Args:
+            app_id: 游戏ID
+            url: 写入每条记录的游戏页面URL
+            on_page: 每获取一页后调用的回调函数，参数为已获取的评价数量
+            start_offset: 起始偏移量（从上次失败的位置继续时使用）
+
+        Returns:
+            list: 评论记录列表（按评论ID去重），第一页就无法获取时返回None
+
+        Raises:
+            IncompleteReviewsError: 之后的页面请求失败，comments为失败之前已获取的评论
+        """
+        comments = []
+        seen_ids = set()
+        pages = 0
+        try:
+            for page in self.iter_pages(app_id, url, start_offset):
+                pages += 1
+                for comment in page["reviews"]:
+                    if comment["评论ID"] and comment["评论ID"] in seen_ids:
+                        continue
+                    seen_ids.add(comment["评论ID"])
+                    comments.append(comment)
+                if on_page:
+                    on_page(len(comments))
+        except IncompleteReviewsError as e:
+            e.comments = comments
+            raise
+        return comments if pages else None
+
+    def fetch_game_name(self, app_id):
+        """通过游戏详情接口获取游戏名称，失败时返回空字符串"""
+        data = self.get_json(app_detail_url(app_id, self.base_url))
+        if not isinstance(data, dict) or data.get('success') is False:
+            return ""
+        body = data.get('data') or {}
+        app = body.get('app') or body
+        return (app.get('title') or app.get('name') or "").strip()
+
+    def close(self):
+        self.session.close()
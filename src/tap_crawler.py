@@ -3,22 +3,151 @@ TapTap爬虫适配器 - 专门用于爬取TapTap网站的评论
 """
 
 from crawler_base import BaseCrawler, ExcelWriter
+from tap_api import (REVIEW_API_PATTERNS, PAGE_SIZE, parse_review_page, review_list_url, TapReviewClient,
+                     IncompleteReviewsError)
+from page_fetch import PageFetcher
+from selector_plan import SelectorPlan, FieldRule
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.support import expected_conditions as EC
-from bs4 import BeautifulSoup
+from html_parser import parse_html, parse_fragments, default_backend
+from json_cache import JsonCache, CACHE_DIR
 import re
 import time
 import sys
 import os
+import urllib.parse
+
+# 游戏ID到游戏名称的缓存，多次运行和并行工作进程共享
+GAME_NAME_CACHE_FILE = os.path.join(CACHE_DIR, "tap_game_names.json")
+GAME_NAME_TTL = 30 * 24 * 3600
+
+# 评论容器，找不到评论时把容器滚动到可见区域以触发加载
+COMMENT_CONTAINER_SELECTORS = [
+    ".comment-list",  # 常见的评论容器
+    ".reviews-container",  # 评测容器
+    "#comments",  # 评论区ID
+    "#reviews",  # 评测区ID
+    "[id*='comment']",  # 包含comment的ID
+    "[class*='comment']",  # 包含comment的类
+    "[class*='review']",  # 包含review的类
+    ".app-comments-wrap",  # TapTap特定评论包装
+    ".review-feed-wrap"  # 评测列表包装
+]
+
+# 评论元素选择器，匹配TapTap最新版本，按优先级排列
+COMMENT_ITEM_SELECTORS = [
+    ".comment-item",  # 常见的评论项
+    ".review-item",  # 评测项
+    ".comment-list .item",  # 嵌套的评论项
+    ".review-list .item",  # 嵌套的评测项
+    "[class*='comment-item']",  # 部分匹配类名
+    "[class*='review-item']",  # 部分匹配评测项
+    ".taptap-comment .comment-item",  # TapTap特定的评论项
+    ".community-content .comment",  # 社区内容评论
+    ".review-item-wrap",  # 评测项包装
+    ".app-comments-wrap *",  # 评论区内所有元素
+    ".review-item-card"  # 评测卡片
+]
+
+# 等待评论元素出现的最长时间（秒）
+COMMENT_WAIT_TIMEOUT = 15
+# HTTP引擎中途请求失败时，从失败位置重试的次数（仍然失败时改用浏览器从该位置继续）
+HTTP_RESUME_RETRIES = 2
+
+# 按优先级检查所有评论选择器，返回第一个有匹配的选择器；
+# 都没有匹配时把评论容器滚动到可见区域（只滚动一次），返回null继续等待
+FIND_COMMENTS_SCRIPT = """
+var selectors = arguments[0], containers = arguments[1];
+for (var i = 0; i < selectors.length; i++) {
+    var n = document.querySelectorAll(selectors[i]).length;
+    if (n > 0) {
+        return {selector: selectors[i], count: n, container: window.__tapCommentContainer || null};
+    }
+}
+if (!window.__tapCommentContainer) {
+    for (var j = 0; j < containers.length; j++) {
+        var container = document.querySelector(containers[j]);
+        if (container) {
+            container.scrollIntoView(true);
+            window.__tapCommentContainer = containers[j];
+            break;
+        }
+    }
+}
+return null;
+"""
+
+# 评论各字段的候选选择器，按优先级排列
+USERNAME_SELECTORS = [
+    ".name", ".username", ".user-name", ".nickname",
+    "[class*='user'] [class*='name']", "[class*='author']",
+    ".user", ".author", ".commentator-name"
+]
+CONTENT_SELECTORS = [
+    ".review-content",
+    ".comment-content",
+    ".desc",
+    ".content",
+    ".text",
+    "p.text",
+    ".body",
+    ".review-item > div > p",
+    "[class*='content']:not([class*='author']):not([class*='time']):not([class*='user'])"
+]
+TIME_SELECTORS = [
+    ".time", ".date", ".timestamp", ".publish-time",
+    "[class*='time']", "[class*='date']", "[datetime]",
+    ".meta time", ".info time"
+]
+LIKE_SELECTORS = [
+    ".like-count", ".thumbs-up", ".like-num", ".like",
+    "[class*='like']", "[class*='vote']", ".vote-count",
+    "[class*='upvote']", ".upvote", "[data-like-count]"
+]
+
+def _first_number(tag):
+    """取元素文本中的第一个数字"""
+    match = re.search(r'\d+', tag.text.strip())
+    return match.group() if match else None
+
+def _merge_comments(comments, more):
+    """把more中评论ID未出现过的评论追加到comments之后（没有评论ID的评论总是保留）"""
+    seen_ids = {comment["评论ID"] for comment in comments if comment["评论ID"]}
+    return comments + [comment for comment in more if not comment["评论ID"] or comment["评论ID"] not in seen_ids]
+
+def _comment_key(comment):
+    """按用户名和评论内容（忽略空白差异）识别同一条评论，用于和没有评价ID的页面记录比较"""
+    return comment["用户名"], re.sub(r'\s+', ' ', comment["评论内容"] or "").strip()
 
 class TapCrawler(BaseCrawler):
     """TapTap爬虫类，专门用于爬取TapTap网站的评论"""
     
-    def __init__(self, use_headless=False):
-        """初始化TapTap爬虫"""
-        super().__init__(use_headless)
+    platform_name = "taptap"
+    
+    def __init__(self, use_headless=False, lean_mode=False, capture_mode=True, fetch_mode=True, driver=None,
+                 http_mode=True, api_base_url=None):
+        """初始化TapTap爬虫
+        
+        Args:
+            http_mode: 是否优先不使用浏览器，直接通过HTTP请求评价接口（浏览器仅在接口不可用时启动）
+            api_base_url: HTTP引擎使用的接口地址，默认使用tap_api.API_BASE_URL
+        """
+        super().__init__(use_headless, lean_mode=lean_mode, capture_mode=capture_mode, fetch_mode=fetch_mode,
+                         driver=driver, lazy_driver=http_mode)
+        self.http_mode = http_mode
+        self.http_client = TapReviewClient(api_base_url) if http_mode else None
         self.data_writer = ExcelWriter()
+        self.selector_plan = None  # 当前页面学习到的评论字段选择器方案
+        self.comment_selector = None  # 上一次命中的评论元素选择器，下次优先尝试
+        self.game_names = JsonCache(GAME_NAME_CACHE_FILE, ttl=GAME_NAME_TTL)
+    
+    def cleanup(self):
+        """关闭HTTP连接池，并清理浏览器（如果启动过）"""
+        if self.http_client is not None:
+            self.http_client.close()
+        super().cleanup()
     
     def get_comment_selectors(self):
         """获取TapTap网站评论元素的CSS选择器"""
@@ -103,15 +232,32 @@ class TapCrawler(BaseCrawler):
         # 提取游戏ID
         game_id = self.extract_game_id(url)
         
-        # 获取游戏名称
-        game_name = self.get_game_name(url, game_id)
-        print(f"获取到游戏名称: {game_name}")
+        # 优先使用缓存的游戏名称，缓存中没有时在页面加载后从页面获取
+        game_name = self.game_names.get(game_id)
+        if game_name:
+            print(f"使用缓存的游戏名称: {game_name}")
+        
+        # 优先直接通过HTTP请求评价接口，不启动浏览器
+        http_comments, resume_offset = self.fetch_comments_over_http(game_id, url)
+        if http_comments and resume_offset is None:
+            if not game_name:
+                game_name = self.http_client.fetch_game_name(game_id)
+                if game_name:
+                    self.game_names.set(game_id, game_name)
+                else:
+                    game_name = game_id
+            print(f"通过HTTP接口获取到 {len(http_comments)} 条评论")
+            self.save_api_comments(http_comments, self.get_output_filename(game_id, game_name))
+            return
         
         # 设置页面加载超时时间
         self.driver.set_page_load_timeout(90)  # 增加到90秒超时
+        
+        # 在访问页面前开始收集评价接口的响应
+        self.start_network_capture(REVIEW_API_PATTERNS)
         try:
             print(f"正在访问URL: {url}")
-            self.driver.get(url)
+            self.navigate(url)
             print("页面加载成功")
         except Exception as e:
             print(f"访问URL时出错: {e}")
@@ -131,6 +277,21 @@ class TapCrawler(BaseCrawler):
                 self.save_progress(self.progress)
                 return
         
+        if not game_name:
+            game_name = self.get_game_name(url, game_id)
+            print(f"获取到游戏名称: {game_name}")
+        excel_filename = self.get_output_filename(game_id, game_name)
+        
+        # 优先在页面中直接请求评价接口，无需滚动加载；HTTP引擎中途失败时从失败的位置继续
+        fetched_comments = self.fetch_comments_in_page(game_id, url, start_offset=resume_offset or 0)
+        if fetched_comments and resume_offset:
+            fetched_comments = _merge_comments(http_comments, fetched_comments)
+        if fetched_comments:
+            self.stop_network_capture()
+            print(f"通过评价接口获取到 {len(fetched_comments)} 条评论")
+            self.save_api_comments(fetched_comments, excel_filename)
+            return
+        
         # 在爬取评论之前滚动到页面底部
         print("开始滚动页面以加载评论...")
         comments_found = self.scroll_to_bottom()
@@ -147,10 +308,25 @@ class TapCrawler(BaseCrawler):
         except Exception as e:
             print(f"保存源码失败: {e}")
         
+        # 其次使用网络抓取到的评价接口数据，不再依赖页面结构
+        captured_comments = self.extract_captured_comments(url)
+        if captured_comments and http_comments:
+            # HTTP引擎中途失败时已获取的评论与滚动加载的评论合并
+            captured_comments = _merge_comments(http_comments, captured_comments)
+        if captured_comments:
+            print(f"从评价接口响应中提取到 {len(captured_comments)} 条评论")
+            self.save_api_comments(captured_comments, excel_filename)
+            return
+        
         # 识别评论容器
         comment_found, all_reply_items = self.find_comment_elements()
         
         # 检查是否成功获取了评论
+        if not all_reply_items and http_comments:
+            # 页面中没有评论，保留HTTP引擎中途失败前已获取的评论
+            self.write_error_log(f"游戏 {game_id} 的评价只获取到偏移量 {resume_offset} 之前的 {len(http_comments)} 条")
+            self.save_api_comments(http_comments, excel_filename)
+            return
         if not all_reply_items or len(all_reply_items) == 0:
             error_message = f'第{self.progress["game_count"] + 1}个游戏被跳过：ID {game_id} URL {url}找到了评论元素但无法提取内容'
             print(error_message)
@@ -160,17 +336,7 @@ class TapCrawler(BaseCrawler):
             return
         
         print(f"开始处理 {len(all_reply_items)} 条评论...")
-        
-        # 创建文件名
-        if game_name and game_name != game_id:
-            # 清理游戏名称中的非法字符
-            game_name = re.sub(r'[\\/*?:"<>|]', "", game_name)
-            # 限制名称长度
-            if len(game_name) > 50:
-                game_name = game_name[:47] + "..."
-            excel_filename = f"{game_id}_{game_name}_comments.xlsx"
-        else:
-            excel_filename = f"{game_id}_comments.xlsx"
+        self.selector_plan = self.new_selector_plan()
         
         # 初始化计数器
         total_comments = len(all_reply_items)
@@ -184,6 +350,15 @@ class TapCrawler(BaseCrawler):
         
         # 处理评论数据
         comments_data = []
+        # HTTP引擎中途失败前已获取的评论先写入，页面中提取到的同一评论不再重复写入
+        # （页面元素没有评价ID，按用户名和评论内容判断是否为同一评论）
+        http_keys = {_comment_key(comment) for comment in http_comments}
+        if http_comments and start_index == 0:
+            try:
+                self.data_writer.write(http_comments, excel_filename)
+            except Exception as e:
+                print(f"保存HTTP接口获取的评论时出错: {e}")
+                self.write_error_log(f"保存Excel {excel_filename} 时出错: {e}")
         
         # 单独处理每条评论
         for i, reply_item in enumerate(all_reply_items):
@@ -195,6 +370,8 @@ class TapCrawler(BaseCrawler):
                 # 提取评论数据
                 comment_data = self.extract_comment_data(reply_item, i, url)
                 
+                if comment_data and _comment_key(comment_data) in http_keys:
+                    comment_data = None
                 if comment_data:
                     comments_data.append(comment_data)
                     processed_comments += 1
@@ -226,6 +403,8 @@ class TapCrawler(BaseCrawler):
         
         # 处理完成，重置评论索引并增加游戏计数
         print(f"成功处理了 {processed_comments}/{total_comments} 条评论")
+        print("各字段选择器命中统计:")
+        print(self.selector_plan.format_stats())
         self.progress["first_comment_index"] = 0
         self.progress["game_count"] += 1
         self.progress["last_game_id"] = ""
@@ -240,150 +419,231 @@ class TapCrawler(BaseCrawler):
                 print(f"保存最终Excel文件时出错: {e}")
                 self.write_error_log(f"保存最终Excel {excel_filename} 时出错: {e}")
     
-    def find_comment_elements(self):
-        """查找评论元素"""
-        # 识别评论容器
-        comment_containers = [
-            ".comment-list",  # 常见的评论容器
-            ".reviews-container",  # 评测容器
-            "#comments",  # 评论区ID
-            "#reviews",  # 评测区ID
-            "[id*='comment']",  # 包含comment的ID
-            "[class*='comment']",  # 包含comment的类
-            "[class*='review']",  # 包含review的类
-            ".app-comments-wrap",  # TapTap特定评论包装
-            ".review-feed-wrap"  # 评测列表包装
-        ]
-        
-        container_found = False
-        for container in comment_containers:
-            container_elements = self.driver.find_elements(By.CSS_SELECTOR, container)
-            if container_elements and len(container_elements) > 0:
-                print(f"找到评论容器! 使用选择器: {container}")
-                container_found = True
-                
-                # 检查容器内的内容
-                container_html = container_elements[0].get_attribute('innerHTML')
-                if container_html:
-                    print(f"评论容器HTML长度: {len(container_html)}")
-                    
-                    # 尝试在容器内查找评论元素
-                    self.driver.execute_script("arguments[0].scrollIntoView(true);", container_elements[0])
-                    time.sleep(3)  # 等待评论加载
-                    break
+    def get_output_filename(self, game_id, game_name):
+        """根据游戏ID和名称生成输出文件名"""
+        if game_name and game_name != game_id:
+            # 清理游戏名称中的非法字符
+            game_name = re.sub(r'[\\/*?:"<>|]', "", game_name)
+            # 限制名称长度
+            if len(game_name) > 50:
+                game_name = game_name[:47] + "..."
+            return f"{game_id}_{game_name}_comments.xlsx"
+        return f"{game_id}_comments.xlsx"
+    
+    def save_api_comments(self, comments, excel_filename):
+        """保存从接口获取的评论，并把进度推进到下一个游戏"""
+        try:
+            self.data_writer.write(comments, excel_filename)
+            print(f"已成功保存 {len(comments)} 条评论到 {excel_filename}")
+        except Exception as e:
+            print(f"保存Excel文件时出错: {e}")
+            self.write_error_log(f"保存Excel {excel_filename} 时出错: {e}")
+        self.progress["first_comment_index"] = 0
+        self.progress["game_count"] += 1
+        self.progress["last_game_id"] = ""
+        self.save_progress(self.progress)
+    
+    def fetch_comments_over_http(self, game_id, url):
+        """不使用浏览器，直接通过HTTP并发请求评价列表接口
         
-        # 更新评论元素选择器，匹配TapTap最新版本
-        comment_selectors = [
-            ".comment-item",  # 常见的评论项
-            ".review-item",  # 评测项
-            ".comment-list .item",  # 嵌套的评论项
-            ".review-list .item",  # 嵌套的评测项
-            "[class*='comment-item']",  # 部分匹配类名
-            "[class*='review-item']",  # 部分匹配评测项
-            ".taptap-comment .comment-item",  # TapTap特定的评论项
-            ".community-content .comment",  # 社区内容评论
-            ".review-item-wrap",  # 评测项包装
-            ".app-comments-wrap *",  # 评论区内所有元素
-            ".review-item-card"  # 评测卡片
-        ]
+        Args:
+            game_id: 游戏ID
+            url: 游戏页面URL，写入每条评论记录
+            
+        Returns:
+            tuple: (评论记录列表, 继续获取的偏移量)。获取完整时偏移量为None；
+                   中途请求失败且重试后仍失败时返回已获取的评论和失败的偏移量，由浏览器从该位置继续；
+                   未启用或接口不可用时为 ([], None)（由浏览器方式继续处理）
+        """
+        if not self.http_mode or not str(game_id).isdigit():
+            return [], None
         
-        # 更详细的日志
-        print(f"开始尝试定位评论元素...")
+        print(f"尝试通过HTTP接口获取评价: {self.http_client.base_url}")
+        fetch_start = time.time()
+        comments = []
+        seen_ids = set()
+        offset = 0
         
-        comment_found = False
-        all_reply_items = []
+        def on_page(count):
+            self.report_progress("fetch", None, f"已通过HTTP接口获取 {len(comments) + count} 条评论")
         
-        for selector in comment_selectors:
+        for attempt in range(HTTP_RESUME_RETRIES + 1):
             try:
-                # 尝试多次定位评论元素，有时需要等待JavaScript执行
-                for attempt in range(3):
-                    comment_elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                    if comment_elements and len(comment_elements) > 0:
-                        print(f"找到评论元素！使用选择器: {selector}，找到 {len(comment_elements)} 个评论")
-                        comment_found = True
-                        
-                        # 尝试将视图滚动到第一个评论
-                        self.driver.execute_script("arguments[0].scrollIntoView(true);", comment_elements[0])
-                        time.sleep(2)  # 等待视图变更
-                        
-                        # 获取页面源码，用BeautifulSoup解析
-                        soup = BeautifulSoup(self.driver.page_source, "html.parser")
-                        
-                        # 根据找到的选择器选择正确的解析方法
-                        all_reply_items = soup.select(selector)
-                        
-                        # 如果找到了评论但列表为空，尝试其他方法提取
-                        if not all_reply_items or len(all_reply_items) == 0:
-                            print(f"警告：虽然在DOM中找到了评论元素，但无法用BeautifulSoup提取。尝试其他方法...")
-                            
-                            # 尝试直接从评论元素获取数据
-                            print("尝试直接从浏览器DOM获取评论数据...")
-                            all_reply_items = []
-                            
-                            for idx, comment_element in enumerate(comment_elements[:20]):  # 限制为前20个避免过长
-                                try:
-                                    comment_html = comment_element.get_attribute('outerHTML')
-                                    comment_soup = BeautifulSoup(comment_html, "html.parser")
-                                    all_reply_items.append(comment_soup)
-                                except Exception as e:
-                                    print(f"无法获取第{idx+1}个评论的HTML: {e}")
-                        
-                        # 输出找到的评论数量
-                        print(f"成功提取到 {len(all_reply_items)} 条评论")
-                        break
-                    else:
-                        print(f"尝试{attempt+1}/3: 未找到评论元素，使用选择器: {selector}")
-                        time.sleep(2)  # 再等待一些时间
-                
-                if comment_found:
+                page_comments = self.http_client.fetch_reviews(game_id, url, on_page=on_page, start_offset=offset)
+                offset = None
+            except IncompleteReviewsError as e:
+                page_comments = e.comments
+                offset = e.offset
+            for comment in page_comments or []:
+                if comment["评论ID"] and comment["评论ID"] in seen_ids:
+                    continue
+                seen_ids.add(comment["评论ID"])
+                comments.append(comment)
+            if offset is None:
+                break
+            print(f"HTTP接口在偏移量 {offset} 处请求失败，已获取 {len(comments)} 条评论，"
+                  f"从该位置重试 ({attempt + 1}/{HTTP_RESUME_RETRIES})...")
+        self.record_timing("http_fetch", time.time() - fetch_start, url)
+        
+        if offset is not None:
+            print(f"HTTP接口获取的评价不完整，改用浏览器从偏移量 {offset} 继续获取...")
+            return comments, offset
+        if not comments:
+            print("HTTP接口不可用或没有返回评价，改用浏览器加载页面...")
+            return [], None
+        return comments, None
+    
+    def fetch_comments_in_page(self, game_id, url, start_offset=0):
+        """在已打开的TapTap页面中并发请求评价列表接口
+        
+        请求在页面上下文中发出，自动带上浏览器的cookies。
+        
+        Args:
+            game_id: 游戏ID
+            url: 游戏页面URL，写入每条评论记录
+            start_offset: 起始偏移量（HTTP引擎中途失败时从失败的位置继续）
+            
+        Returns:
+            list: 评论记录列表，接口不可用时为空列表
+        """
+        if not self.fetch_mode or not str(game_id).isdigit():
+            return []
+        
+        # 接口与当前页面同源，避免跨域
+        current = urllib.parse.urlparse(self.driver.current_url)
+        base_url = f"{current.scheme}://{current.netloc}" if "taptap" in current.netloc else "https://www.taptap.cn"
+        
+        print("尝试在页面中直接请求评价接口...")
+        fetcher = PageFetcher(self.driver)
+        comments = []
+        seen_ids = set()
+        try:
+            batches = fetcher.iter_page_batches(
+                lambda page: review_list_url(game_id, (page - 1) * PAGE_SIZE, base_url=base_url),
+                first_page=start_offset // PAGE_SIZE + 1)
+            for batch in batches:
+                finished = False
+                for page_number, result in batch:
+                    page = parse_review_page(result["data"], url)
+                    if not page or not page["reviews"]:
+                        finished = True
+                        continue
+                    for comment in page["reviews"]:
+                        if comment["评论ID"] and comment["评论ID"] in seen_ids:
+                            continue
+                        seen_ids.add(comment["评论ID"])
+                        comments.append(comment)
+                    if not page["next_page"]:
+                        finished = True
+                self.report_progress("fetch", None, f"已通过接口获取 {len(comments)} 条评论")
+                if finished:
                     break
-            except Exception as e:
-                print(f"尝试选择器 '{selector}' 时出错: {e}")
+        except Exception as e:
+            print(f"在页面中请求评价接口时出错: {e}")
+        return comments
+    
+    def extract_captured_comments(self, url):
+        """从网络抓取到的评价接口响应中提取评论
         
-        return comment_found, all_reply_items
+        Args:
+            url: 游戏页面URL，写入每条评论记录
+            
+        Returns:
+            list: 评论记录列表（按评论ID去重），没有抓取到数据时为空列表
+        """
+        comments = []
+        seen_ids = set()
+        for response in self.stop_network_capture():
+            page = parse_review_page(response["data"], url)
+            if not page:
+                continue
+            for comment in page["reviews"]:
+                if comment["评论ID"] and comment["评论ID"] in seen_ids:
+                    continue
+                seen_ids.add(comment["评论ID"])
+                comments.append(comment)
+        return comments
+    
+    def find_comment_elements(self):
+        """查找评论元素
+        
+        所有候选选择器在一次页面脚本中按优先级检查，由WebDriverWait轮询直到任一选择器命中或超时，
+        不再逐个选择器重试等待。
+        """
+        # 优先尝试上一个页面命中的选择器
+        comment_selectors = list(COMMENT_ITEM_SELECTORS)
+        if self.comment_selector in comment_selectors:
+            comment_selectors.remove(self.comment_selector)
+            comment_selectors.insert(0, self.comment_selector)
+        
+        print(f"开始尝试定位评论元素...")
+        discovery_start = time.time()
+        match = None
+        try:
+            match = WebDriverWait(self.driver, COMMENT_WAIT_TIMEOUT, poll_frequency=0.5).until(
+                lambda driver: driver.execute_script(FIND_COMMENTS_SCRIPT, comment_selectors,
+                                                     COMMENT_CONTAINER_SELECTORS))
+        except TimeoutException:
+            pass
+        except Exception as e:
+            print(f"定位评论元素时出错: {e}")
+        self.record_timing("element_discovery", time.time() - discovery_start, self.driver.current_url)
+        
+        if not match:
+            print(f"在 {COMMENT_WAIT_TIMEOUT} 秒内未找到评论元素")
+            return False, []
+        
+        selector = match["selector"]
+        print(f"找到评论元素！使用选择器: {selector}，找到 {match['count']} 个评论")
+        if match.get("container"):
+            print(f"评论容器: {match['container']}")
+        self.comment_selector = selector
+        
+        # 获取页面源码，整个页面只解析一次，每条评论直接使用文档中的子树
+        parse_start = time.time()
+        document = parse_html(self.driver.page_source)
+        all_reply_items = document.select(selector)
+        print(f"使用 {default_backend()} 解析页面，用时 {time.time() - parse_start:.2f} 秒")
+        
+        # 如果找到了评论但列表为空，尝试其他方法提取
+        if not all_reply_items:
+            print(f"警告：虽然在DOM中找到了评论元素，但无法从页面源码中提取。尝试其他方法...")
+            
+            # 尝试直接从评论元素获取数据
+            print("尝试直接从浏览器DOM获取评论数据...")
+            comment_htmls = self.driver.execute_script(
+                "return Array.from(document.querySelectorAll(arguments[0]))"
+                ".slice(0, 20).map(function(e) { return e.outerHTML; });", selector) or []  # 限制为前20个避免过长
+            
+            # 所有评论片段合并后一次解析
+            all_reply_items = parse_fragments(comment_htmls)
+        
+        # 输出找到的评论数量
+        print(f"成功提取到 {len(all_reply_items)} 条评论")
+        return True, all_reply_items
+    
+    def new_selector_plan(self):
+        """创建评论字段的选择器方案，每个页面重新学习"""
+        return SelectorPlan([
+            FieldRule("用户名", USERNAME_SELECTORS, lambda tag: tag.text.strip()),
+            FieldRule("评论内容", CONTENT_SELECTORS, lambda tag: re.sub(r'\s+', ' ', tag.text.strip())),
+            FieldRule("评论时间", TIME_SELECTORS, lambda tag: tag.text.strip()),
+            FieldRule("点赞数", LIKE_SELECTORS, _first_number)
+        ])
     
     def extract_comment_data(self, reply_item, index, url):
         """从评论元素中提取数据"""
         comment_id = f"comment_{index+1}"
-        username = ""
-        comment_content = ""
-        comment_time = ""
-        like_count = "0"
-        
-        # 尝试多种选择器提取用户名
-        username_selectors = [
-            ".name", ".username", ".user-name", ".nickname", 
-            "[class*='user'] [class*='name']", "[class*='author']",
-            ".user", ".author", ".commentator-name"
-        ]
-        
-        for selector in username_selectors:
-            username_tag = reply_item.select_one(selector)
-            if username_tag and username_tag.text.strip():
-                username = username_tag.text.strip()
-                break
         
-        # 尝试多种选择器提取评论内容
-        content_selectors = [
-            ".review-content", 
-            ".comment-content", 
-            ".desc", 
-            ".content", 
-            ".text",
-            "p.text",
-            ".body",
-            ".review-item > div > p",
-            "[class*='content']:not([class*='author']):not([class*='time']):not([class*='user'])"
-        ]
+        # 按学习到的选择器方案提取各字段（前几条评论尝试全部候选选择器，之后只用方案中的选择器）
+        if self.selector_plan is None:
+            self.selector_plan = self.new_selector_plan()
+        fields = self.selector_plan.extract(reply_item)
+        username = fields["用户名"] or ""
+        comment_content = fields["评论内容"] or ""
+        comment_time = fields["评论时间"] or ""
+        like_count = fields["点赞数"] or "0"
         
-        for selector in content_selectors:
-            content_tag = reply_item.select_one(selector)
-            if content_tag and content_tag.text.strip():
-                comment_content = content_tag.text.strip()
-                # 清理评论内容（去除多余空格和换行符）
-                comment_content = re.sub(r'\s+', ' ', comment_content)
-                break
-
         # 如果依然没找到评论内容，尝试查找所有段落标签
         if not comment_content:
             paragraphs = reply_item.find_all("p")
@@ -446,19 +706,6 @@ class TapCrawler(BaseCrawler):
         if comment_content == username:
             comment_content = "无法提取评论内容"
         
-        # 尝试多种选择器提取评论时间
-        time_selectors = [
-            ".time", ".date", ".timestamp", ".publish-time", 
-            "[class*='time']", "[class*='date']", "[datetime]", 
-            ".meta time", ".info time"
-        ]
-        
-        for selector in time_selectors:
-            time_tag = reply_item.select_one(selector)
-            if time_tag:
-                comment_time = time_tag.text.strip()
-                break
-        
         # 尝试提取日期属性
         if not comment_time:
             date_attrs = ["datetime", "data-time", "title"]
@@ -475,23 +722,6 @@ class TapCrawler(BaseCrawler):
                 except Exception:
                     pass
         
-        # 尝试多种选择器提取点赞数
-        like_selectors = [
-            ".like-count", ".thumbs-up", ".like-num", ".like", 
-            "[class*='like']", "[class*='vote']", ".vote-count", 
-            "[class*='upvote']", ".upvote", "[data-like-count]"
-        ]
-        
-        for selector in like_selectors:
-            like_tag = reply_item.select_one(selector)
-            if like_tag:
-                like_text = like_tag.text.strip()
-                # 尝试提取数字
-                like_match = re.search(r'\d+', like_text)
-                if like_match:
-                    like_count = like_match.group()
-                    break
-        
         # 如果无法从元素中提取点赞数，尝试从属性中提取
         if like_count == "0":
             like_attrs = ["data-like-count", "data-votes", "data-count"]
@@ -524,7 +754,7 @@ class TapCrawler(BaseCrawler):
         }
 
     def get_game_name(self, url, game_id):
-        """获取游戏名称
+        """获取游戏名称，成功获取后写入缓存
         
         Args:
             url: 游戏URL
@@ -533,11 +763,38 @@ class TapCrawler(BaseCrawler):
         Returns:
             str: 游戏名称
         """
+        cached_name = self.game_names.get(game_id)
+        if cached_name:
+            return cached_name
+        
+        game_name = self._find_game_name(url, game_id)
+        if game_name and game_name != game_id:
+            self.game_names.set(game_id, game_name)
+        return game_name
+    
+    def game_name_from_title(self, title):
+        """从页面标题中解析游戏名称，例如"原神 - 官方正版下载 | TapTap" """
+        if not title:
+            return ""
+        name = re.split(r'\s+[-|_｜]\s+|\s*[|｜]\s*', title.strip())[0].strip()
+        name = re.sub(r'\s*(的)?(玩家)?(评价|评测)$', '', name).strip('《》 ')
+        if not name or name.lower() in ("taptap", "tap tap"):
+            return ""
+        return name
+    
+    def _find_game_name(self, url, game_id):
+        """依次从页面标题、页面元素、游戏主页获取游戏名称"""
         try:
             # 如果URL没有指向游戏页面，则构造游戏页面URL
             if "taptap.cn/app/" not in url and "taptap.com/app/" not in url:
                 url = f"https://www.taptap.cn/app/{game_id}"
                 
+            # 页面标题中通常包含游戏名称，无需查找元素
+            game_name = self.game_name_from_title(self.driver.title)
+            if game_name:
+                print(f"从页面标题获取到游戏名称: {game_name}")
+                return game_name
+            
             # 已经在游戏页面，尝试获取标题
             print(f"正在从当前页面获取游戏名称...")
                 
@@ -614,10 +871,21 @@ if __name__ == "__main__":
     try:
         # 创建TapTap爬虫实例
         use_headless = input("是否使用无头模式运行浏览器(无界面，推荐用于解决闪退问题)? [y/n]: ").strip().lower() == 'y'
-        crawler = TapCrawler(use_headless)
-        
-        # 运行爬虫
-        crawler.run()
+        workers = input("并行浏览器数量 (默认1，多个浏览器可同时处理不同游戏): ").strip()
+        workers = int(workers) if workers.isdigit() else 1
+        lean_mode = input("是否启用精简加载模式(不加载图片、字体和视频，节省流量和时间)? [y/n]: ").strip().lower() == 'y'
+        
+        if workers > 1 and input("是否在同一个浏览器中使用隔离上下文并行(内存占用更少)? [y/n]: ").strip().lower() == 'y':
+            # 上下文模式：所有任务共享一个浏览器进程，每个任务使用独立的上下文
+            TapCrawler.run_in_contexts('game_list.txt', contexts=workers, use_headless=use_headless, lean_mode=lean_mode)
+        elif workers > 1:
+            # 并行模式：每个工作进程持有一个浏览器
+            TapCrawler.run_parallel('game_list.txt', workers=workers, use_headless=use_headless, lean_mode=lean_mode)
+        else:
+            crawler = TapCrawler(use_headless, lean_mode=lean_mode)
+            
+            # 运行爬虫
+            crawler.run()
     except Exception as e:
         print(f"程序运行时发生未处理的异常: {e}")
         # 记录错误